@@ -1,25 +1,58 @@
 # 1.3.3
 __author__ = "蜜柑魚"
+__version__ = "1.3.3"
 
-import ctypes
-import tkinter as tk
-import re
 import time
+_STARTUP_BEGIN = time.perf_counter()  # 程序开始执行的时间（启动耗时测量用）
+
+import re
 import os
 import sys
 import logging
-import tkinter.font as tkfont
+import importlib.util
 from datetime import datetime 
 from pathlib import Path
-from collections import deque
+from collections import deque, OrderedDict
 import threading
 import queue
+import argparse
+import unicodedata
+import json
+import hashlib
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import math
+
+# 启动加速：keyboard、ctypes、tkinter.font、http.server 等较慢的模块在首次使用时才导入
+# 这里只检查 keyboard 库是否已安装，不实际导入
+KEYBOARD_AVAILABLE = importlib.util.find_spec("keyboard") is not None
+if not KEYBOARD_AVAILABLE:
+    logging.warning("keyboard 库未安装，全局快捷键不可用")
+
+# NumPy 为可选依赖，仅统计功能使用（未安装时退化为逐条计算）
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# tkinter 只有悬浮窗需要：没有 python3-tk 的 Linux 监控主机上仍可使用终端前端（--tui）
 try:
-    import keyboard
-    KEYBOARD_AVAILABLE = True
+    import tkinter as tk
+    TK_AVAILABLE = True
 except ImportError:
-    KEYBOARD_AVAILABLE = False
-    logging.warning("keyboard 库未安装，全局快捷键不可用")
+    tk = None
+    TK_AVAILABLE = False
+
+_STARTUP_IMPORTS_DONE = time.perf_counter()  # 模块导入完成的时间
+
+def get_keyboard():
+    """延迟导入 keyboard 库（导入时会初始化系统钩子，较慢）"""
+    import keyboard
+    return keyboard
+
+def get_numpy():
+    """延迟导入 NumPy（只在统计时需要，不增加悬浮窗启动耗时）"""
+    import numpy
+    return numpy
 
 def get_base_path():
     """获取程序运行的基础路径"""
@@ -45,6 +78,466 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+# 日志条目起始行（以时间戳开头）
+LOG_START_PATTERN = re.compile(r'\[\d{2}:\d{2}:\d{2}\.\d{3}\]')
+
+def parse_log_time_ms(line):
+    """解析行首的 [HH:MM:SS.mmm] 时间戳为当天毫秒数，无法解析时返回 None"""
+    try:
+        return (int(line[1:3]) * 3600000 + int(line[4:6]) * 60000
+                + int(line[7:9]) * 1000 + int(line[10:13]))
+    except (ValueError, IndexError):
+        return None
+
+def parse_time_of_day(text):
+    """解析 HH:MM[:SS[.mmm]] 格式的时间为当天毫秒数，格式错误时抛出 ValueError"""
+    match = re.fullmatch(r'\s*(\d{1,2}):(\d{2})(?::(\d{2})(?:\.(\d{1,3}))?)?\s*', text)
+    if not match:
+        raise ValueError("时间格式应为 HH:MM、HH:MM:SS 或 HH:MM:SS.mmm")
+    hours, minutes, seconds = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if hours > 23 or minutes > 59 or seconds > 59:
+        raise ValueError("时间超出范围")
+    return (hours * 3600 + minutes * 60 + seconds) * 1000 + int((match.group(4) or "0").ljust(3, "0"))
+
+def _next_entry_start(f, offset):
+    """从字节偏移 offset 起找到第一条日志条目 - 返回 (条目起始偏移, 当天毫秒数)，之后没有条目时返回 (None, None)"""
+    if offset > 0:
+        # 跳到下一个行首（offset 恰好是行首时不跳过该行）
+        f.seek(offset - 1)
+        f.readline()
+    else:
+        f.seek(0)
+    while True:
+        position = f.tell()
+        line = f.readline()
+        if not line:
+            return None, None
+        head = line[:16].decode('ascii', errors='replace')
+        if LOG_START_PATTERN.match(head):
+            time_ms = parse_log_time_ms(head)
+            if time_ms is not None:
+                return position, time_ms
+
+def seek_log_time(f, time_ms):
+    """在当天日志文件（二进制模式打开）中二分查找第一条时间不早于 time_ms 的条目，返回其字节偏移
+
+    每步只定位到一个偏移并读取到下一个条目开头，读取次数为 O(log 文件大小)；
+    条目中早于首条时间12小时以上的时间戳视为跨越午夜后的次日时间。只有文件确实跨越了午夜、
+    且目标时间不晚于末条时间时，目标才按次日时间查找，否则按首条所在当天查找。没有这样的条目时返回文件大小
+    """
+    size = f.seek(0, os.SEEK_END)
+    first_offset, first_ms = _next_entry_start(f, 0)
+    if first_offset is None:
+        return size
+    
+    def normalize(ms):
+        return ms + 86400000 if ms < first_ms - 43200000 else ms
+    
+    target_ms = time_ms
+    if normalize(time_ms) != time_ms:
+        last_entries, _ = read_log_entries_before(f, size, 1)
+        last_ms = parse_log_time_ms(last_entries[0]) if last_entries else None
+        if last_ms is not None and normalize(last_ms) != last_ms and time_ms <= last_ms:
+            target_ms = normalize(time_ms)
+    low, high = first_offset, size  # 起始偏移小于 low 的条目都早于目标时间
+    while low < high:
+        middle = (low + high) // 2
+        offset, entry_ms = _next_entry_start(f, middle)
+        if offset is not None and normalize(entry_ms) < target_ms:
+            low = offset + 1
+        else:
+            high = middle
+    offset, _ = _next_entry_start(f, low)
+    return size if offset is None else offset
+
+def read_log_entries(f, offset, count):
+    """从条目起始偏移 offset 读取最多 count 条日志条目（续行合并到所属条目）- 返回 (条目列表, 下一条目的偏移)"""
+    f.seek(offset)
+    entries = []
+    while True:
+        position = f.tell()
+        raw_line = f.readline()
+        if not raw_line:
+            return entries, position
+        line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+        if LOG_START_PATTERN.match(line):
+            if len(entries) == count:
+                return entries, position
+            entries.append(line)
+        elif entries:
+            entries[-1] += " " + line.strip()
+
+def read_log_entries_before(f, offset, count):
+    """读取条目起始偏移 offset 之前的最多 count 条日志条目 - 返回 (条目列表, 第一条的偏移)
+
+    从 offset 向前按块读取，块内条目不足时加倍扩大，不从文件开头扫描
+    """
+    block_size = 65536
+    while True:
+        block_start = max(0, offset - block_size)
+        f.seek(block_start)
+        data = f.read(offset - block_start)
+        starts = []
+        position = block_start
+        for index, raw_line in enumerate(data.split(b'\n')):
+            # 块的第一行可能不完整（除非从文件开头读取）
+            if (index or not block_start) and LOG_START_PATTERN.match(raw_line[:16].decode('ascii', errors='replace')):
+                starts.append(position)
+            position += len(raw_line) + 1
+        if len(starts) >= count or block_start == 0:
+            break
+        block_size *= 2
+    if not starts:
+        return [], offset
+    first = starts[-count] if len(starts) >= count else starts[0]
+    return read_log_entries(f, first, min(count, len(starts)))[0], first
+
+# 任务检测正则表达式 - 匹配不同类型的任务
+TASK_PATTERNS = {
+    "JS脚本": re.compile(r'→ 开始执行JS脚本: "(.+?)"'),
+    "配置文件": re.compile(r'assets/(.+?\.json)'),
+    "地图任务": re.compile(r'→ 开始执行(?:地图|路径)追踪任务: "(.+?)"'),
+    "钓鱼点": re.compile(r'当前钓鱼点:\s*([^\n]+)'),
+}
+
+# 配置组正则表达式
+CONFIG_GROUP_PATTERN = re.compile(
+    r'配置组\s*"(.+?)"\s*(?:加载完成|执行结束|开始执行|共\d+个脚本)'
+)
+
+# 日志格式处理正则表达式 - 提取时间戳、级别和消息
+LOG_FORMAT_PATTERN = re.compile(
+    r'^(\[\d{2}:\d{2}:\d{2}\.\d{3}\])\s+\[(\w+)\]\s+[\w\.]+\s*(.*)$'
+)
+
+# 日志级别 -> 着色配置项（配置值留空时该级别使用普通文字颜色）
+LEVEL_COLOR_KEYS = {"ERR": "error_color", "FTL": "error_color", "WRN": "warning_color", "DBG": "debug_color"}
+
+def _normalize_task_name(task_name):
+    """提取纯任务名 - 去掉路径和扩展名"""
+    if '/' in task_name or '\\' in task_name:
+        # 提取文件名（含扩展名），再移除扩展名
+        return os.path.splitext(os.path.basename(task_name))[0]
+    if '.' in task_name:
+        # 如果只有文件名但包含扩展名，也移除扩展名
+        return os.path.splitext(task_name)[0]
+    return task_name
+
+# 进度信息正则表达式
+PROGRESS_PATTERNS = {
+    "任务开始进度": re.compile(r'\[(\d+)/(\d+)\][^"]*"([^"]+)":\s*开始执行'),
+    "当前进度": re.compile(r'当前进度：\s*(\d+)/(\d+)\s*\([^)]+\)'),
+    "组任务进度": re.compile(r'开始处理第\s*(\d+)\s*组第\s*(\d+)/(\d+)\s*个([^\.]+\.json)'),
+    "产出进度": re.compile(r'当前产出(?:（预计）)?：*(\d+/\d+)个'),
+    "运行时间进度": re.compile(r'当前运行时间：([\d.]+)/(\d+)分钟')
+}
+
+def _convert_builtin_progress(progress_type, groups):
+    """内置进度格式的转换 - 返回 (显示文本, 当前值, 总数, 任务名)，任务名只有“任务开始进度”提供"""
+    if progress_type == "任务开始进度" and len(groups) >= 3:
+        current, total, task_name = groups[:3]
+        return f"{current}/{total}", int(current), int(total), task_name
+    elif progress_type == "当前进度" and len(groups) >= 2:
+        current, total = groups[:2]
+        return f"{current}/{total}", int(current), int(total), None
+    elif progress_type == "组任务进度" and len(groups) >= 4:
+        group_num, current, total, task_name = groups[:4]
+        return f"{current}/{total}", int(current), int(total), None
+    # 新增：产出进度格式
+    elif progress_type == "产出进度" and len(groups) >= 1:
+        progress_str = groups[0]
+        current, total = progress_str.split('/')
+        return f"{progress_str}个", int(current), int(total), None  # 添加單位
+    # 新增：运行时间进度格式
+    elif progress_type == "运行时间进度" and len(groups) >= 2:
+        # 礦JS本體做好日志秒數顯示轉換的話
+        # current_time, total_time = groups[:2]
+        # return f"{current_time}/{total_time}分钟"  # 添加單位
+
+        current_time, total_time = groups[:2]
+        # 將小數分鐘轉換為分鐘:秒格式（秒數四捨五入）
+        try:
+            current_minutes = float(current_time)
+            minutes = int(current_minutes)
+            seconds = round((current_minutes - minutes) * 60)  # 四捨五入到整數秒
+            
+            # 處理四捨五入後可能出現60秒的情況
+            if seconds == 60:
+                minutes += 1
+                seconds = 0
+                
+            # 格式化為 分鐘.秒 (秒數顯示兩位數)
+            formatted_time = f"{minutes}.{seconds:02d}"
+            return f"{formatted_time}/{total_time}分钟", current_minutes, int(total_time), None
+        except (ValueError, TypeError):
+            # 如果轉換失敗，返回原始格式
+            return f"{current_time}/{total_time}分钟", None, None, None
+    return None
+
+def _parse_progress_number(text):
+    """解析进度数值 - 整数返回 int，否则返回 float"""
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+def required_literal(pattern):
+    """提取正则表达式每次匹配都必然包含的最长字面子串（用于预筛选），无法确定时返回空字符串
+
+    遍历 re 模块解析出的语法树，只取顶层连续的普通字符：分组、字符类、\\d 等转义类和可出现零次的量词都会打断字面串；
+    顶层含 | 或忽略大小写时无法保证任何子串必然出现。解析器属于 re 的内部接口，不可用或解析出错时不做预筛选
+    """
+    parser = getattr(re, "_parser", None) or getattr(re, "sre_parse", None)  # Python 3.11+ / 3.10 及以下
+    if parser is None:
+        return ""
+    try:
+        parsed = parser.parse(pattern.pattern, pattern.flags)
+        if parsed.state.flags & re.IGNORECASE:
+            return ""
+        repeat_ops = (parser.MAX_REPEAT, parser.MIN_REPEAT, getattr(parser, "POSSESSIVE_REPEAT", None))
+        runs = []
+        run = ""
+        for op, value in parsed:
+            if op is parser.LITERAL:
+                run += chr(value)
+                continue
+            if op in repeat_ops and value[0] >= 1 and all(sub_op is parser.LITERAL for sub_op, _ in value[2]):
+                run += "".join(chr(code) for _, code in value[2])  # 至少出现一次的字面串（如 a+），其后不再连续
+            runs.append(run)
+            run = ""
+        runs.append(run)
+    except Exception as e:
+        logging.debug(f"无法解析正则表达式的预筛选子串: {str(e)}")
+        return ""
+    return max(runs, key=len)
+
+class LogPattern:
+    """任务或进度识别模式（内置或用户自定义），附带预筛选子串和命中、耗时计数"""
+    
+    def __init__(self, kind, name, pattern, template=None, unit="", builtin=False):
+        self.kind = kind          # "task" 或 "progress"
+        self.name = name          # 任务类型或进度类型名称
+        self.pattern = pattern
+        self.template = template  # 用户模式的显示模板
+        self.unit = unit          # 用户进度模式的单位
+        self.builtin = builtin
+        self.literal = required_literal(pattern)
+        self.checks = 0      # 通过预筛选、实际运行正则的次数
+        self.hits = 0        # 匹配成功的次数
+        self.elapsed_ns = 0  # 运行正则和转换的累计耗时（纳秒）
+    
+    def convert(self, match):
+        """将匹配结果转换为 "任务类型: 任务名" 或 (进度类型, 显示文本, 当前值, 总数, 任务名)，无法转换时返回 None"""
+        if self.kind == "task":
+            if self.builtin:
+                return f"{self.name}: {_normalize_task_name(match.group(1).strip())}"
+            values = {key: (value or "").strip() for key, value in match.groupdict().items()}
+            task_name = values.get("name") or (match.group(1) or "").strip()
+            if not task_name:
+                return None
+            values["name"] = _normalize_task_name(task_name)
+            return f"{self.name}: {self.template.format(**values)}"
+        
+        try:
+            if self.builtin:
+                converted = _convert_builtin_progress(self.name, match.groups())
+                return None if converted is None else (self.name, *converted)
+            values = {key: (value or "").strip() for key, value in match.groupdict().items()}
+            current = _parse_progress_number(values["current"])
+            total = _parse_progress_number(values["total"])
+            return self.name, self.template.format(**values) + self.unit, current, total, values.get("task") or None
+        except (ValueError, IndexError) as e:
+            logging.warning(f"进度信息解析失败: {match.string}, 错误: {e}")
+            return None
+
+def parse_user_pattern(kind, name, value):
+    """解析用户自定义模式 - 格式：正则表达式 => 显示模板 => 单位（模板和单位可省略）
+
+    任务模式使用命名分组 name（或第一个分组）作为任务名，默认模板为 {name}；
+    进度模式必须包含命名分组 current 和 total，可选命名分组 task，默认模板为 {current}/{total}
+    返回 (类型, 名称, 正则表达式, 显示模板, 单位)，格式错误时抛出 ValueError
+    """
+    parts = [part.strip() for part in value.split('=>')]
+    if len(parts) > 3 or (kind == "task" and len(parts) > 2):
+        raise ValueError("格式应为 正则表达式 => 显示模板" + (" => 单位" if kind == "progress" else ""))
+    regex = parts[0]
+    template = parts[1] if len(parts) > 1 and parts[1] else None
+    unit = parts[2] if len(parts) > 2 else ""
+    try:
+        pattern = re.compile(regex)
+    except re.error as e:
+        raise ValueError(f"正则表达式无效: {e}")
+    
+    group_names = set(pattern.groupindex)
+    if kind == "progress":
+        if not {"current", "total"} <= group_names:
+            raise ValueError("进度模式需要命名分组 (?P<current>...) 和 (?P<total>...)")
+        template = template or "{current}/{total}"
+    else:
+        if "name" not in group_names and pattern.groups < 1:
+            raise ValueError("任务模式需要命名分组 (?P<name>...) 或至少一个分组")
+        template = template or "{name}"
+    
+    # 用示例值试填模板，尽早发现引用了不存在分组的模板
+    try:
+        template.format(**{group: "1" for group in group_names | {"name"}})
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"显示模板无效: {template} - {e}")
+    return kind, name, regex, template, unit
+
+class LogPatternMatcher:
+    """任务/进度模式匹配器 - 内置模式和用户自定义模式编译为一个预筛选匹配器
+
+    每个模式提取一个必然出现的字面子串，所有子串合并为一个正则表达式：
+    普通日志行只需一次扫描即可排除，只有包含某个子串的行才运行对应模式的完整正则，
+    因此增加模式几乎不增加每行的开销
+    """
+    
+    def __init__(self, user_patterns=()):
+        """user_patterns: 用户自定义模式列表（见 parse_user_pattern），排在同类内置模式之后"""
+        user_patterns = [LogPattern(kind, name, re.compile(regex), template, unit)
+                         for kind, name, regex, template, unit in user_patterns]
+        self.task_patterns = ([LogPattern("task", name, pattern, builtin=True) for name, pattern in TASK_PATTERNS.items()]
+                              + [pattern for pattern in user_patterns if pattern.kind == "task"])
+        self.progress_patterns = ([LogPattern("progress", name, pattern, builtin=True) for name, pattern in PROGRESS_PATTERNS.items()]
+                                  + [pattern for pattern in user_patterns if pattern.kind == "progress"])
+        self.patterns = self.task_patterns + self.progress_patterns
+        
+        # 长的子串在前，避免较短的子串抢先匹配导致扫描提前结束在较短的位置
+        self._literals = sorted({pattern.literal for pattern in self.patterns if pattern.literal}, key=len, reverse=True)
+        self._prefilter = re.compile("|".join(map(re.escape, self._literals))) if self._literals else None
+        self._has_unfiltered = any(not pattern.literal for pattern in self.patterns)
+    
+    def match_line(self, line):
+        """匹配单行日志 - 返回 (任务, 进度)，任务为 "任务类型: 任务名"，进度为 (进度类型, 显示文本, 当前值, 总数, 任务名)
+
+        同类模式按顺序尝试，第一个成功的结果生效（内置模式优先），未识别的部分为 None
+        """
+        if self._prefilter is not None and self._prefilter.search(line):
+            # 命中至少一个子串时才逐个确认（子串之间可能重叠，合并正则只报告其中一个）
+            present = {literal for literal in self._literals if literal in line}
+        elif self._has_unfiltered:
+            present = ()
+        else:
+            return None, None
+        return self._match(self.task_patterns, line, present), self._match(self.progress_patterns, line, present)
+    
+    @staticmethod
+    def _match(patterns, line, present):
+        """按顺序尝试通过预筛选的模式，返回第一个成功转换的结果"""
+        for pattern in patterns:
+            if pattern.literal and pattern.literal not in present:
+                continue
+            pattern.checks += 1
+            start = time.perf_counter_ns()
+            match = pattern.pattern.search(line)
+            result = pattern.convert(match) if match else None
+            pattern.elapsed_ns += time.perf_counter_ns() - start
+            if result is not None:
+                pattern.hits += 1
+                return result
+        return None
+    
+    def get_stats(self):
+        """各模式的统计 - 返回 [(类型, 名称, 检查次数, 命中次数, 累计秒数)]"""
+        return [(pattern.kind, pattern.name, pattern.checks, pattern.hits, pattern.elapsed_ns / 1e9)
+                for pattern in self.patterns]
+
+# 默认的任务切换频率规则：1分钟内5次
+DEFAULT_TASK_SWITCH_RULE = "task_switch,5/60"
+
+def parse_rate_rule(name, value):
+    """解析频率检测规则 - 格式：匹配方式,次数/秒数
+
+    匹配方式：task_switch（任务切换）、level:ERR（指定级别）、keyword:关键字（包含关键字的行）
+    返回 (名称, 类型, 参数, 次数, 秒数)，格式错误时抛出 ValueError
+    """
+    match_spec, _, limit = value.rpartition(',')
+    threshold, _, window = limit.partition('/')
+    kind, _, argument = match_spec.strip().partition(':')
+    kind = kind.strip()
+    argument = argument.strip()
+    
+    if kind not in ("task_switch", "level", "keyword"):
+        raise ValueError(f"未知的匹配方式: {kind}")
+    if kind != "task_switch" and not argument:
+        raise ValueError(f"{kind} 需要指定参数，如 {kind}:ERR")
+    threshold = int(threshold)
+    window = int(window)
+    if threshold <= 0 or window <= 0:
+        raise ValueError("次数和秒数必须大于0")
+    return name, kind, argument, threshold, window
+
+# 告警规则支持的动作
+ALERT_ACTIONS = ("highlight", "beep", "log", "command")
+
+def parse_alert_rule(name, value):
+    """解析告警规则 - 格式：关键字1|关键字2|...,动作1+动作2,冷却秒数[,次数/秒数]
+
+    动作：highlight（高亮日志行）、beep（提示音）、log（写入 alerts.log）、command（运行 alert_command）
+    冷却秒数内同一规则只触发一次；次数/秒数为可选的频率上限（窗口内最多触发的次数）
+    返回 (名称, 关键字元组, 动作元组, 冷却秒数, 上限次数, 上限秒数)，未设置上限时后两项为 0，格式错误时抛出 ValueError
+    """
+    parts = [part.strip() for part in value.split(',')]
+    if len(parts) not in (3, 4):
+        raise ValueError("格式应为 关键字1|关键字2,动作,冷却秒数[,次数/秒数]")
+    keywords = tuple(dict.fromkeys(keyword.strip() for keyword in parts[0].split('|') if keyword.strip()))
+    if not keywords:
+        raise ValueError("至少需要一个关键字")
+    actions = tuple(action.strip() for action in parts[1].split('+') if action.strip())
+    if not actions or any(action not in ALERT_ACTIONS for action in actions):
+        raise ValueError(f"动作必须是 {'、'.join(ALERT_ACTIONS)} 中的一个或多个（用+连接）")
+    cooldown = int(parts[2])
+    if cooldown < 0:
+        raise ValueError("冷却秒数不能为负数")
+    limit, window = 0, 0
+    if len(parts) == 4:
+        limit, _, window = parts[3].partition('/')
+        limit, window = int(limit), int(window)
+        if limit <= 0 or window <= 0:
+            raise ValueError("频率上限的次数和秒数必须大于0")
+    return name, keywords, actions, cooldown, limit, window
+
+class FrozenSettings:
+    """只读设置对象的基类 - 子类用 __slots__ 声明字段，创建后不能修改，切换样式时整体替换"""
+    __slots__ = ()
+    
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 是只读的，请创建新的设置对象")
+    
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ReaderSettings(FrozenSettings):
+    """日志读取器设置"""
+    __slots__ = ("display_lines", "skip_debug_log", "dynamic_height", "auto_wrap", "max_width",
+                 "font_size", "font_weight", "collapse_repeats", "glyph_metrics_file", "show_level_rates")
+
+
+class LayoutSettings(FrozenSettings):
+    """窗口布局设置"""
+    __slots__ = ("max_width", "max_height", "display_lines", "refresh_interval", "dynamic_height", "auto_wrap")
+
+
+class RenderSettings(FrozenSettings):
+    """渲染设置 - 颜色和标题行字体
+
+    level_colors 为 ((日志级别, 颜色), ...)，只包含配置了颜色的级别；
+    alert_colors 按告警规则顺序排列每条规则的颜色（alert_color_规则名称 优先，否则使用 alert_color）
+    """
+    __slots__ = ("bg_color", "window_alpha", "normal_color", "stale_color", "high_freq_color",
+                 "status_header_color", "task_header_color", "header_font", "alert_colors", "level_colors")
+
+
+class DisplaySettings(FrozenSettings):
+    """当前样式下的全部显示设置，由 ConfigLoader 在加载和切换样式时生成"""
+    __slots__ = ("reader", "layout", "render")
+
+
 class ConfigLoader:
     def __init__(self, config_file="config.txt"):
         """配置文件加载器 - 从config.txt读取用户设置"""
@@ -63,6 +556,9 @@ class ConfigLoader:
             "high_freq_color": "#FFA500", # 高频切换警告颜色
             "status_header_color": "#87CEFA",  # 状态行标题颜色（配置组行）
             "task_header_color": "#87CEFA",    # 任务行标题颜色
+            "error_color": "#FF6B6B", # 错误日志行颜色（留空不着色）
+            "warning_color": "#FFD700", # 警告日志行颜色（留空不着色）
+            "debug_color": "",        # 调试日志行颜色（留空不着色）
             "font_name": "Consolas",  # 字体名称
             "font_size": 11,          # 字体大小
             "font_weight": "bold",    # 字体粗细
@@ -78,7 +574,22 @@ class ConfigLoader:
             "author_style2": False,   # 仿BGI日志窗口样式默认状态
             "window_x": None,         # 窗口X坐标
             "window_y": None,          # 窗口Y坐标
-            "dynamic_height": False   # 动态调整窗口高度
+            "dynamic_height": False,  # 动态调整窗口高度
+            "status_server": False,   # 是否启用本地只读状态服务
+            "status_server_port": 8765,  # 本地状态服务端口（仅监听127.0.0.1）
+            "metrics_exporter": False,  # 是否启用指标导出（Prometheus文本格式）
+            "metrics_port": 9108,       # 指标导出端口（仅监听127.0.0.1）
+            "metrics_file_interval": 60,  # 指标写入滚动文件的间隔（秒），0为不写入
+            "state_snapshot": True,     # 是否保存状态快照（启动时立即显示上次画面并继续读取）
+            "event_store": False,       # 是否将解析出的事件保存到本地SQLite数据库
+            "event_store_retention_days": 30,  # 事件保留天数
+            "glyph_metrics_file": "",   # 字形度量文件（留空不使用），换行时查表计算宽度
+            "collapse_repeats": True,   # 是否将连续重复的日志合并为一条并显示重复次数
+            "show_level_rates": False,  # 是否显示日志速率状态行（最近一分钟各级别条数、距最后日志的时间）
+            "alert_color": "#FF00FF",   # 告警高亮行颜色
+            "alert_command": "",        # 告警规则 command 动作运行的命令
+            "profile_seconds": 30,      # 性能分析持续时间（秒）
+            "profile_on_start": False   # 是否在启动后立即开始性能分析
         }
         
         # 第二样式配置
@@ -90,6 +601,10 @@ class ConfigLoader:
             "high_freq_color": "#FFFFFF",
             "status_header_color": "#00FF00",  # 第二样式的状态行颜色
             "task_header_color": "#00FFFF",   # 第二样式的任务行颜色
+            "error_color": "#FF6B6B",  # 第二样式的错误日志行颜色
+            "warning_color": "#FFD700",  # 第二样式的警告日志行颜色
+            "debug_color": "",  # 第二样式的调试日志行颜色
+            "alert_color": "#FF00FF",  # 第二样式的告警高亮行颜色
             "font_name": "Consolas",
             "font_size": 9,
             "font_weight": "bold",
@@ -100,6 +615,15 @@ class ConfigLoader:
             "auto_wrap": True  # 第二样式默认启用换行
         }
         
+        # 频率检测规则（rate_rule_名称=匹配方式,次数/秒数），默认包含任务切换规则
+        self.rate_rules = {"任务切换": parse_rate_rule("任务切换", DEFAULT_TASK_SWITCH_RULE)}
+        
+        # 用户自定义任务/进度模式（task_pattern_名称=... 或 progress_pattern_名称=...）
+        self.user_patterns = {}
+        
+        # 关键字告警规则（alert_rule_名称=关键字1|关键字2,动作,冷却秒数[,次数/秒数]）
+        self.alert_rules = {}
+        
         self.config = self.default_config.copy()
         self.user_config = self.default_config.copy()  # 保存用户自定义配置
         self.log_path_configured = False  # 标记log_path是否已正确配置
@@ -120,6 +644,46 @@ class ConfigLoader:
         # 如果配置中启用了第二样式，则应用
         if self.config.get("author_style2", False):
             self.apply_second_style()
+        self.settings = self.build_settings()
+
+    def build_settings(self):
+        """根据当前配置（含已应用的样式）生成只读的显示设置 - 配置以 default_config 为基础，所有项都存在，默认值只在那里定义"""
+        config = self.config
+        alert_color = config["alert_color"]
+        return DisplaySettings(
+            reader=ReaderSettings(
+                display_lines=config["display_lines"],
+                skip_debug_log=config["skip_debug_log"],
+                dynamic_height=config["dynamic_height"],
+                auto_wrap=config["auto_wrap"],
+                max_width=config["max_width"],
+                font_size=config["font_size"],
+                font_weight=config["font_weight"],
+                collapse_repeats=config["collapse_repeats"],
+                glyph_metrics_file=config["glyph_metrics_file"],
+                show_level_rates=config["show_level_rates"],
+            ),
+            layout=LayoutSettings(
+                max_width=config["max_width"],
+                max_height=config["max_height"],
+                display_lines=config["display_lines"],
+                refresh_interval=config["refresh_interval"],
+                dynamic_height=config["dynamic_height"],
+                auto_wrap=config["auto_wrap"],
+            ),
+            render=RenderSettings(
+                bg_color=config["bg_color"],
+                window_alpha=config["window_alpha"],
+                normal_color=config["normal_color"],
+                stale_color=config["stale_color"],
+                high_freq_color=config["high_freq_color"],
+                status_header_color=config["status_header_color"],
+                task_header_color=config["task_header_color"],
+                header_font=(config["font_name"], config["font_size"], config["font_weight"]),
+                alert_colors=tuple(config.get(f"alert_color_{rule[0]}", alert_color) for rule in self.get_alert_rules()),
+                level_colors=tuple((level, config[key]) for level, key in LEVEL_COLOR_KEYS.items() if config.get(key)),
+            ),
+        )
 
     def load_all_settings(self):
         """加载所有配置 - 直接根据配置项名称读取，不依赖段落标记"""
@@ -145,6 +709,15 @@ class ConfigLoader:
                         # 处理第二样式配置（以style2_开头的配置项）
                         if key.startswith('style2_'):
                             self._process_second_style_config(key, value, line_num)
+                        # 处理频率检测规则（以rate_rule_开头的配置项）
+                        elif key.startswith('rate_rule_'):
+                            self._process_rate_rule(key, value, line_num)
+                        # 处理自定义任务/进度模式（以task_pattern_或progress_pattern_开头的配置项）
+                        elif key.startswith(('task_pattern_', 'progress_pattern_')):
+                            self._process_user_pattern(key, value, line_num)
+                        # 处理告警规则（以alert_rule_开头的配置项）
+                        elif key.startswith('alert_rule_'):
+                            self._process_alert_rule(key, value, line_num)
                         else:
                             # 处理普通配置
                             self._process_config_value(key, value, line_num)
@@ -175,6 +748,54 @@ class ConfigLoader:
             except (ValueError, TypeError) as e:
                 logging.warning(f"第二样式配置第{line_num}行: {clean_key} 配置值无效: {value} - {str(e)}")
 
+    def _process_rate_rule(self, key, value, line_num):
+        """处理频率检测规则配置 - 加载时校验，无效规则忽略"""
+        name = key[len('rate_rule_'):]
+        if not value:
+            # 值为空表示禁用该规则（可用于关闭默认的任务切换规则）
+            self.rate_rules.pop(name, None)
+            return
+        try:
+            self.rate_rules[name] = parse_rate_rule(name, value)
+        except ValueError as e:
+            logging.warning(f"第{line_num}行: 频率检测规则 {name} 无效: {value} - {str(e)}")
+
+    def get_rate_rules(self):
+        """获取已校验的频率检测规则列表"""
+        return list(self.rate_rules.values())
+
+    def _process_user_pattern(self, key, value, line_num):
+        """处理自定义任务/进度模式配置 - 加载时校验，无效模式忽略"""
+        kind, _, name = key.partition('_pattern_')
+        if not value:
+            # 值为空表示删除该模式
+            self.user_patterns.pop((kind, name), None)
+            return
+        try:
+            self.user_patterns[(kind, name)] = parse_user_pattern(kind, name, value)
+        except ValueError as e:
+            logging.warning(f"第{line_num}行: 自定义{'任务' if kind == 'task' else '进度'}模式 {name} 无效: {value} - {str(e)}")
+
+    def get_user_patterns(self):
+        """获取已校验的自定义任务/进度模式列表（按配置文件中的顺序）"""
+        return list(self.user_patterns.values())
+
+    def _process_alert_rule(self, key, value, line_num):
+        """处理告警规则配置 - 加载时校验，无效规则忽略"""
+        name = key[len('alert_rule_'):]
+        if not value:
+            # 值为空表示删除该规则
+            self.alert_rules.pop(name, None)
+            return
+        try:
+            self.alert_rules[name] = parse_alert_rule(name, value)
+        except ValueError as e:
+            logging.warning(f"第{line_num}行: 告警规则 {name} 无效: {value} - {str(e)}")
+
+    def get_alert_rules(self):
+        """获取已校验的告警规则列表（按配置文件中的顺序）"""
+        return list(self.alert_rules.values())
+
     def _process_config_value(self, key, value, line_num):
         """处理配置值转换"""
         try:
@@ -197,11 +818,15 @@ class ConfigLoader:
                 self.user_config[key] = float(value)
                 
             elif key in ["font_size", "max_width", "max_height", 
-                    "initial_x", "initial_y", "display_lines", "refresh_interval"]:
+                    "initial_x", "initial_y", "display_lines", "refresh_interval",
+                    "status_server_port", "metrics_port", "metrics_file_interval", "event_store_retention_days",
+                    "profile_seconds"]:
                 self.config[key] = int(value)
                 self.user_config[key] = int(value)
                 
-            elif key in ["transparent_mode", "click_through", "author_style2", "skip_debug_log", "dynamic_height", "auto_wrap"]:
+            elif key in ["transparent_mode", "click_through", "author_style2", "skip_debug_log", "dynamic_height", "auto_wrap",
+                         "status_server", "metrics_exporter", "state_snapshot", "event_store", "collapse_repeats",
+                         "show_level_rates", "profile_on_start"]:
                 self.config[key] = value.lower() in ('true', '1', 'yes', 'on')
                 self.user_config[key] = value.lower() in ('true', '1', 'yes', 'on')
                 
@@ -247,6 +872,7 @@ class ConfigLoader:
         
         # 设置第二样式状态
         self.config["author_style2"] = True
+        self.settings = self.build_settings()
         
         logging.info("应用第二样式")
         
@@ -279,6 +905,7 @@ class ConfigLoader:
         self.user_config["click_through"] = current_click_through
         self.user_config["skip_debug_log"] = current_skip_debug_log
         self.user_config["author_style2"] = False
+        self.settings = self.build_settings()
         
         logging.info("恢复用户自定义样式 - 已应用用户config.txt配置")
 
@@ -373,13 +1000,17 @@ class ConfigLoader:
         }
 
 class GlobalShortcutManager:
-    """全局快捷键管理器"""
+    """全局快捷键管理器 - 快捷键回调通过虚拟事件唤醒Tk主循环，空闲时不产生任何定时唤醒"""
+    
+    # 通知主线程有快捷键事件待处理的Tk虚拟事件
+    VIRTUAL_EVENT = "<<GlobalShortcut>>"
     
     def __init__(self, root_window):
         self.root = root_window
         self.event_queue = queue.Queue()
         self.listening = False
         self.thread = None
+        self._stop_event = threading.Event()
         
     def start_listening(self):
         """启动全局快捷键监听"""
@@ -388,12 +1019,12 @@ class GlobalShortcutManager:
             return
             
         try:
+            # 在主线程中处理事件（收到虚拟事件时才处理，不轮询队列）
+            self.root.bind(self.VIRTUAL_EVENT, self._process_events)
+            
             self.listening = True
             self.thread = threading.Thread(target=self._listen_loop, daemon=True)
             self.thread.start()
-            
-            # 在主线程中处理事件
-            self.root.after(100, self._process_events)
             logging.info("全局快捷键监听已启动")
         except Exception as e:
             logging.error(f"启动全局快捷键监听失败: {str(e)}")
@@ -401,18 +1032,21 @@ class GlobalShortcutManager:
     def _listen_loop(self):
         """后台监听循环"""
         try:
-            # 注册全局快捷键
+            # 注册全局快捷键（在后台线程中导入 keyboard，不阻塞界面）
+            keyboard = get_keyboard()
             keyboard.add_hotkey('alt+p', lambda: self._queue_event('close'))
             keyboard.add_hotkey('alt+u', lambda: self._queue_event('reset_position')) 
             keyboard.add_hotkey('alt+i', lambda: self._queue_event('toggle_transparent'))
             keyboard.add_hotkey('alt+n', lambda: self._queue_event('toggle_click_through'))
             keyboard.add_hotkey('alt+k', lambda: self._queue_event('toggle_second_style'))
+            keyboard.add_hotkey('alt+f', lambda: self._queue_event('toggle_search'))
+            keyboard.add_hotkey('alt+t', lambda: self._queue_event('toggle_jump'))
+            keyboard.add_hotkey('alt+o', lambda: self._queue_event('toggle_profile'))
             
-            logging.info("全局快捷键注册完成: Alt+P(关闭), Alt+U(重置位置), Alt+I(透明模式), Alt+N(不可选中), Alt+K(第二样式)")
+            logging.info("全局快捷键注册完成: Alt+P(关闭), Alt+U(重置位置), Alt+I(透明模式), Alt+N(不可选中), Alt+K(第二样式), Alt+F(搜索), Alt+T(时间跳转), Alt+O(性能分析)")
             
-            # 保持线程运行
-            while self.listening:
-                time.sleep(0.1)
+            # 阻塞等待停止信号（快捷键由 keyboard 库自己的线程回调）
+            self._stop_event.wait()
                 
         except Exception as e:
             logging.error(f"全局快捷键监听异常: {str(e)}")
@@ -420,24 +1054,27 @@ class GlobalShortcutManager:
 
     
     def _queue_event(self, event_type):
-        """将事件放入队列"""
+        """将事件放入队列，并通过虚拟事件唤醒主线程（在 keyboard 回调线程中执行）"""
+        if not self.listening:
+            return
         try:
             self.event_queue.put(event_type)
+            # event_generate 是线程安全的：Tcl 会把调用转交主线程执行
+            self.root.event_generate(self.VIRTUAL_EVENT, when="tail")
+        except (RuntimeError, tk.TclError) as e:
+            # 主循环已退出（程序正在关闭）
+            logging.debug(f"唤醒主线程失败: {str(e)}")
         except Exception as e:
             logging.error(f"事件队列操作失败: {str(e)}")
     
-    def _process_events(self):
-        """在主线程中处理快捷键事件"""
+    def _process_events(self, event=None):
+        """在主线程中处理快捷键事件（由虚拟事件触发）"""
         try:
             while True:
                 event = self.event_queue.get_nowait()
                 self._handle_event(event)
         except queue.Empty:
             pass
-        
-        # 继续检查事件
-        if self.listening:
-            self.root.after(50, self._process_events)
     
     def _handle_event(self, event):
         """处理具体的事件"""
@@ -457,199 +1094,1658 @@ class GlobalShortcutManager:
             elif event == 'toggle_second_style':
                 logging.info("全局快捷键: 接收到切换第二样式指令")
                 self.root._on_second_style_toggle_shortcut()
+            elif event == 'toggle_search':
+                logging.info("全局快捷键: 接收到切换搜索模式指令")
+                self.root._on_search_shortcut()
+            elif event == 'toggle_jump':
+                logging.info("全局快捷键: 接收到切换时间跳转模式指令")
+                self.root._on_jump_shortcut()
+            elif event == 'toggle_profile':
+                logging.info("全局快捷键: 接收到切换性能分析指令")
+                self.root._on_profile_shortcut()
         except Exception as e:
             logging.error(f"处理快捷键事件失败: {str(e)}")
     
     def stop_listening(self):
         """停止监听"""
         self.listening = False
+        self._stop_event.set()
         if KEYBOARD_AVAILABLE:
             try:
-                keyboard.unhook_all()
+                get_keyboard().unhook_all()
                 logging.info("全局快捷键监听已停止")
             except Exception as e:
                 logging.error(f"停止全局快捷键监听失败: {str(e)}")
 
-class SmartLogReader:
-    def __init__(self, log_dir, log_filename_prefix, log_path_configured, display_lines=11, skip_debug_log=False, dynamic_height=False, auto_wrap=False, max_width=460, font_config=None):
-        """智能日志读取器 - 负责读取和解析原神日志文件"""
-        # 在初始化时验证log_dir的有效性
-        if not log_path_configured:
-            self.log_dir = None
-            self.log_path_valid = False
-        elif not log_dir or not log_dir.strip():
-            self.log_dir = None
-            self.log_path_valid = False
-        else:
-            self.log_dir = Path(log_dir)
-            self.log_path_valid = self._check_log_path()
-        
-        self.log_filename_prefix = log_filename_prefix
-        self.log_path_configured = log_path_configured  # 接收配置狀態
-        self.skip_debug_log = skip_debug_log  # 是否跳过调试日志
-        
-        # 新增：换行相关配置
-        self.auto_wrap = auto_wrap
-        self.max_width = max_width
-        self.font_config = font_config  # 字体配置
-        
-        # 字体缓存用于宽度计算
-        self._font_cache = None
-        self._last_font_config = None
-        
-        # 新增：讀取行數（display_lines*2(其中1行為空格)行用於分析）
-        # 优化：当跳过调试日志时，需要读取更多行以确保有足够的非调试日志显示
-        self.read_lines = max(display_lines * 2, 50) if skip_debug_log else display_lines * 2
-        self.display_lines = display_lines  # 保存顯示行數
-        self.dynamic_height=dynamic_height
-        
-        self.current_date = datetime.now().date()  # 当前日志文件日期
-        self._position = 0  # 文件读取位置
-        
-        self._last_valid_content = deque(maxlen=100)  # 内容缓存，限制100行
-        self._current_file = None     # 当前日志文件路径
-        self._current_file_mtime = 0  # 当前文件修改时间
-        
-        # 状态信息
-        self.current_task = "无当前任务"
-        self.current_config = "无激活配置组"
-        
-        # 任务进度信息
-        self.current_progress = "0/0"
-        self.task_progress = {}  # 任务进度缓存
-        
-        # 任务切换频率监测
-        self.task_switch_times = deque(maxlen=10)  # 存储最近10次任务切换时间
-        self.high_frequency_warning = False  # 高频切换警告状态
-        self.high_frequency_start = None     # 高频状态开始时间
-
-        # 任务检测正则表达式 - 匹配不同类型的任务
-        self.task_patterns = {
-            "JS脚本": re.compile(r'→ 开始执行JS脚本: "(.+?)"'),
-            "配置文件": re.compile(r'assets/(.+?\.json)'),
-            "地图任务": re.compile(r'→ 开始执行(?:地图|路径)追踪任务: "(.+?)"'),
-            "钓鱼点": re.compile(r'当前钓鱼点:\s*([^\n]+)'),
-        }
-        
-        # 配置组正则表达式
-        self.config_pattern = re.compile(
-            r'配置组\s*"(.+?)"\s*(?:加载完成|执行结束|开始执行|共\d+个脚本)'
-        )
-        
-        # 日志格式处理正则表达式 - 提取时间戳、级别和消息
-        self.log_format_pattern = re.compile(
-            r'^(\[\d{2}:\d{2}:\d{2}\.\d{3}\])\s+\[(\w+)\]\s+[\w\.]+\s*(.*)$'
-        )
-        
-        # 进度信息正则表达式
-        self.progress_patterns = {
-            "任务开始进度": re.compile(r'\[(\d+)/(\d+)\][^"]*"([^"]+)":\s*开始执行'),
-            "当前进度": re.compile(r'当前进度：\s*(\d+)/(\d+)\s*\([^)]+\)'),
-            "组任务进度": re.compile(r'开始处理第\s*(\d+)\s*组第\s*(\d+)/(\d+)\s*个([^\.]+\.json)'),
-            "产出进度": re.compile(r'当前产出(?:（预计）)?：*(\d+/\d+)个'),
-            "运行时间进度": re.compile(r'当前运行时间：([\d.]+)/(\d+)分钟')
-        }
+def _create_local_http_server(port, handler_mixin, host="127.0.0.1"):
+    """创建本地HTTP服务（延迟导入 http.server，未启用相关功能时不增加启动耗时）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    handler_class = type(handler_mixin.__name__.lstrip('_'), (handler_mixin, BaseHTTPRequestHandler), {})
+    httpd = ThreadingHTTPServer((host, port), handler_class)
+    httpd.daemon_threads = True
+    return httpd
 
-        self._update_log_file()  # 初始化日志文件
 
-    def _check_log_path(self):
-        """检查日志路径是否存在且有效"""
-        if not self.log_dir:
-            return False
-            
-        try:
-            # 检查路径存在性
-            if not self.log_dir.exists():
-                logging.warning(f"日志目录不存在: {self.log_dir}")
-                # 尝试创建目录
-                try:
-                    self.log_dir.mkdir(parents=True, exist_ok=True)
-                    logging.info(f"已创建日志目录: {self.log_dir}")
-                except (PermissionError, OSError) as e:
-                    logging.error(f"创建日志目录失败: {str(e)}")
-                    return False
-                except Exception as e:
-                    logging.error(f"创建日志目录时发生未知错误: {str(e)}")
-                    return False
+class _StatusRequestHandler:
+    """状态服务请求处理 - /status 返回JSON快照，/events 推送SSE增量"""
+    
+    def do_GET(self):
+        status_server = self.server.status_server
+        path = self.path.split('?', 1)[0]
+        
+        if path in ("/", "/status"):
+            version, snapshot = status_server.get_snapshot()
+            body = json.dumps(dict(snapshot, version=version), ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/events":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+            try:
+                status_server.stream_events(self.wfile)
+            except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                pass  # 客户端断开连接
+        else:
+            self.send_error(404)
+    
+    def log_message(self, format, *args):
+        """将访问日志降级为调试日志，避免刷屏"""
+        logging.debug(f"状态服务: {format % args}")
 
-            # 检查是否是目录（不是文件）
-            if not self.log_dir.is_dir():
-                logging.warning(f"日志路径不是目录: {self.log_dir}")
-                return False
-                
-            # 检查目录可读性
-            if not os.access(str(self.log_dir), os.R_OK):
-                logging.warning(f"没有读取日志目录的权限: {self.log_dir}")
-                return False
 
+class StatusServer:
+    """本地只读状态服务 - 在后台线程中提供JSON状态接口和SSE推送（仅监听127.0.0.1）"""
+    
+    HEARTBEAT_SECONDS = 15  # SSE 心跳间隔
+    
+    def __init__(self, port=8765, host="127.0.0.1"):
+        self.host = host
+        self.port = port
+        self._condition = threading.Condition()
+        self._snapshot = {}
+        self._version = 0
+        self._deltas = deque(maxlen=64)  # 最近的增量 (版本号, 增量)
+        self._httpd = None
+        self._thread = None
+        self.running = False
+    
+    def start(self):
+        """启动后台服务线程"""
+        try:
+            self._httpd = _create_local_http_server(self.port, _StatusRequestHandler, self.host)
+            self._httpd.status_server = self
+            self.running = True
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+            self._thread.start()
+            logging.info(f"本地状态服务已启动: http://{self.host}:{self.port}/status")
             return True
-
-        except PermissionError as e:
-            logging.error(f"权限错误: {str(e)}")
-            return False
         except OSError as e:
-            logging.error(f"操作系统错误: {str(e)}")
+            logging.error(f"启动本地状态服务失败: {str(e)}")
+            self.running = False
             return False
+    
+    def stop(self):
+        """停止服务并唤醒所有订阅者"""
+        if not self.running:
+            return
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+        try:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            logging.info("本地状态服务已停止")
         except Exception as e:
-            logging.error(f"检查日志路径时发生未知错误: {str(e)}")
-            return False
-
-    def _generate_log_patterns(self, date=None):
-        """生成所有可能的日志文件模式 - 支持带序号的文件"""
-        target_date = date or self.current_date
-        date_str = target_date.strftime('%Y%m%d')
-        
-        patterns = [
-            # 基础模式: better-genshin-impactYYYYMMDD.log
-            self.log_dir / f"{self.log_filename_prefix}{date_str}.log",
-            # 带序号模式: better-genshin-impactYYYYMMDD_00N.log
-            self.log_dir / f"{self.log_filename_prefix}{date_str}_*.log"
-        ]
+            logging.error(f"停止本地状态服务失败: {str(e)}")
+    
+    def publish(self, state):
+        """发布最新状态 - 只有字段发生变化时才生成增量并通知订阅者"""
+        with self._condition:
+            delta = {key: value for key, value in state.items() if self._snapshot.get(key) != value}
+            if not delta:
+                return False
+            self._snapshot.update(delta)
+            self._version += 1
+            self._deltas.append((self._version, delta))
+            self._condition.notify_all()
+            return True
+    
+    def get_snapshot(self):
+        """获取当前完整快照"""
+        with self._condition:
+            return self._version, dict(self._snapshot)
+    
+    def stream_events(self, wfile):
+        """向单个订阅者推送事件 - 先发送完整快照，之后只推送增量"""
+        version, snapshot = self.get_snapshot()
+        self._write_event(wfile, "snapshot", version, snapshot)
         
-        return patterns
-
-    def _find_active_log_file(self):
-        """查找当前活跃的日志文件（最近被修改的）"""
-        if not self.log_path_valid:
-            return None
+        while self.running:
+            with self._condition:
+                self._condition.wait_for(lambda: self._version != version or not self.running,
+                                         timeout=self.HEARTBEAT_SECONDS)
+                if self._version == version:
+                    pending = None
+                elif self._deltas and self._deltas[0][0] <= version + 1:
+                    pending = [(v, d) for v, d in self._deltas if v > version]
+                else:
+                    # 订阅者落后太多，增量已被丢弃，改为推送完整快照
+                    pending = [(self._version, dict(self._snapshot))]
+                latest_version = self._version
             
-        patterns = self._generate_log_patterns()
-        candidate_files = []
+            if not self.running:
+                break
+            if pending is None:
+                wfile.write(b": keepalive\n\n")
+                wfile.flush()
+                continue
+            for event_version, delta in pending:
+                self._write_event(wfile, "delta", event_version, delta)
+            version = latest_version
+    
+    @staticmethod
+    def _write_event(wfile, event, version, data):
+        """写入一条SSE事件"""
+        payload = json.dumps(data, ensure_ascii=False)
+        wfile.write(f"id: {version}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8'))
+        wfile.flush()
+
+
+class LogMetrics:
+    """日志事件指标 - 在增量读取日志时维护计数器和仪表值，导出时无需访问日志文件"""
+    
+    ERR_BURST_SIZE = 3          # 判定为错误爆发的ERR条数
+    ERR_BURST_WINDOW_MS = 10000 # 错误爆发的时间窗口（日志时间，毫秒）
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
         
-        # 收集所有匹配的日志文件
-        for pattern in patterns:
-            if '*' in str(pattern):
-                # 使用通配符匹配带序号的文件
-                import glob
-                matches = glob.glob(str(pattern))
-                candidate_files.extend([Path(match) for match in matches])
-            else:
-                # 处理固定文件名
-                if pattern.exists():
-                    candidate_files.append(pattern)
+        # 计数器
+        self.lines_total = 0
+        self.entries_by_level = {}
+        self.task_switches = 0
+        self.err_bursts = 0
         
-        if not candidate_files:
-            return None
-            
-        # 优先选择当前日期的文件，然后按修改时间排序
-        current_date_str = self.current_date.strftime('%Y%m%d')
-        current_date_files = [f for f in candidate_files if current_date_str in f.name]
+        # 仪表值
+        self.progress_current = None
+        self.progress_total = None
+        self.last_line_time = None  # 最后一次读到新日志行的时间
         
-        if current_date_files:
-            # 在当前日期文件中选择最新的
-            return max(current_date_files, key=lambda f: f.stat().st_mtime)
-        else:
-            # 如果没有当前日期的，选择所有文件中最新的
-            return max(candidate_files, key=lambda f: f.stat().st_mtime)
+        # 刷新耗时（摘要）
+        self.tick_count = 0
+        self.tick_seconds_sum = 0.0
+        self.tick_seconds_last = 0.0
+        self.tick_seconds_max = 0.0
         
-    def _update_log_file(self):
-        """安全更新日志文件 - 处理日期切换和文件轮换"""
-        if not self.log_path_valid:
-            return
-            
-        new_file = self._find_active_log_file()
+        # 错误爆发检测状态
+        self._err_times = deque(maxlen=self.ERR_BURST_SIZE)
+        self._in_err_burst = False
         
-        # 如果没有找到日志文件，创建默认的
+        # 任务/进度模式匹配器（由读取器设置），导出各模式的检查、命中次数和耗时
+        self.pattern_matcher = None
+        
+        # 告警引擎（由读取器设置），导出各告警规则的命中、触发和抑制次数
+        self.alert_engine = None
+    
+    def record_lines(self, count):
+        """记录读取到的新日志行"""
+        with self._lock:
+            self.lines_total += count
+            self.last_line_time = time.time()
+    
+    def record_entry(self, level, log_time_ms):
+        """记录一条日志条目（按级别计数，并检测ERR爆发）"""
+        level = level or "UNKNOWN"
+        with self._lock:
+            self.entries_by_level[level] = self.entries_by_level.get(level, 0) + 1
+            if level != "ERR" or log_time_ms is None:
+                return
+            
+            # 与上一条ERR间隔超过窗口时，结束当前爆发
+            if self._err_times and (log_time_ms - self._err_times[-1]) % 86400000 > self.ERR_BURST_WINDOW_MS:
+                self._in_err_burst = False
+            self._err_times.append(log_time_ms)
+            
+            # 窗口内ERR条数达到阈值，记为一次爆发
+            if (not self._in_err_burst and len(self._err_times) == self.ERR_BURST_SIZE
+                    and (log_time_ms - self._err_times[0]) % 86400000 <= self.ERR_BURST_WINDOW_MS):
+                self._in_err_burst = True
+                self.err_bursts += 1
+    
+    def record_task_switch(self):
+        """记录一次任务切换"""
+        with self._lock:
+            self.task_switches += 1
+    
+    def record_progress(self, current, total):
+        """记录数值进度（当前值, 总数）"""
+        with self._lock:
+            self.progress_current = current
+            self.progress_total = total
+    
+    def record_tick(self, seconds):
+        """记录一次界面刷新耗时"""
+        with self._lock:
+            self.tick_count += 1
+            self.tick_seconds_sum += seconds
+            self.tick_seconds_last = seconds
+            if seconds > self.tick_seconds_max:
+                self.tick_seconds_max = seconds
+    
+    def render(self):
+        """导出为 Prometheus 文本格式"""
+        with self._lock:
+            now = time.time()
+            lines = [
+                "# HELP bettergi_log_lines_total Log lines read since the overlay started.",
+                "# TYPE bettergi_log_lines_total counter",
+                f"bettergi_log_lines_total {self.lines_total}",
+                "# HELP bettergi_log_entries_total Log entries read, by level.",
+                "# TYPE bettergi_log_entries_total counter",
+            ]
+            for level, count in sorted(self.entries_by_level.items()):
+                lines.append(f'bettergi_log_entries_total{{level="{level}"}} {count}')
+            
+            if self.progress_current is not None and self.progress_total:
+                progress_ratio = min(self.progress_current / self.progress_total, 1.0)
+            else:
+                progress_ratio = float('nan')
+            seconds_since_last_line = now - (self.last_line_time or self.started_at)
+            
+            lines += [
+                "# HELP bettergi_task_switches_total Task switches seen in the log.",
+                "# TYPE bettergi_task_switches_total counter",
+                f"bettergi_task_switches_total {self.task_switches}",
+                "# HELP bettergi_err_bursts_total Bursts of ERR entries "
+                f"({self.ERR_BURST_SIZE} within {self.ERR_BURST_WINDOW_MS // 1000}s of log time).",
+                "# TYPE bettergi_err_bursts_total counter",
+                f"bettergi_err_bursts_total {self.err_bursts}",
+                "# HELP bettergi_progress_ratio Completion ratio of the latest progress line.",
+                "# TYPE bettergi_progress_ratio gauge",
+                f"bettergi_progress_ratio {progress_ratio:.6g}",
+                "# HELP bettergi_seconds_since_last_log_line Seconds since a new log line was read.",
+                "# TYPE bettergi_seconds_since_last_log_line gauge",
+                f"bettergi_seconds_since_last_log_line {seconds_since_last_line:.3f}",
+                "# HELP bettergi_tick_seconds Overlay refresh tick latency.",
+                "# TYPE bettergi_tick_seconds summary",
+                f"bettergi_tick_seconds_sum {self.tick_seconds_sum:.6f}",
+                f"bettergi_tick_seconds_count {self.tick_count}",
+                "# HELP bettergi_tick_seconds_last Latency of the most recent refresh tick.",
+                "# TYPE bettergi_tick_seconds_last gauge",
+                f"bettergi_tick_seconds_last {self.tick_seconds_last:.6f}",
+                "# HELP bettergi_tick_seconds_max Slowest refresh tick since start.",
+                "# TYPE bettergi_tick_seconds_max gauge",
+                f"bettergi_tick_seconds_max {self.tick_seconds_max:.6f}",
+            ]
+            
+            if self.pattern_matcher is not None:
+                pattern_stats = self.pattern_matcher.get_stats()
+                for metric, index, help_text in (
+                    ("bettergi_pattern_checks_total", 2, "Lines that passed the prefilter and ran the full pattern."),
+                    ("bettergi_pattern_hits_total", 3, "Lines recognised by the pattern."),
+                    ("bettergi_pattern_seconds_total", 4, "Time spent running the pattern."),
+                ):
+                    lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                    for stats in pattern_stats:
+                        value = f"{stats[index]:.6f}" if index == 4 else stats[index]
+                        name = stats[1].replace('\\', '\\\\').replace('"', '\\"')
+                        lines.append(f'{metric}{{kind="{stats[0]}",pattern="{name}"}} {value}')
+            
+            if self.alert_engine is not None:
+                alert_stats = self.alert_engine.get_stats()
+                for metric, index, help_text in (
+                    ("bettergi_alert_hits_total", 1, "Live lines matching a keyword of the alert rule."),
+                    ("bettergi_alert_fired_total", 2, "Times the alert rule fired."),
+                    ("bettergi_alert_suppressed_total", 3, "Hits suppressed by the rule's cooldown or rate limit."),
+                ):
+                    lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                    for stats in alert_stats:
+                        name = stats[0].replace('\\', '\\\\').replace('"', '\\"')
+                        lines.append(f'{metric}{{rule="{name}"}} {stats[index]}')
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler:
+    """指标导出请求处理 - /metrics 返回 Prometheus 文本格式"""
+    
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """将访问日志降级为调试日志，避免刷屏"""
+        logging.debug(f"指标导出: {format % args}")
+
+
+class MetricsExporter:
+    """指标导出器 - 在本地端口提供 /metrics，并定期追加写入滚动文件"""
+    
+    MAX_FILE_BYTES = 1024 * 1024  # 单个指标文件最大字节数
+    BACKUP_COUNT = 3              # 保留的历史指标文件数
+    
+    def __init__(self, metrics, port=9108, file_interval=60, host="127.0.0.1"):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.file_interval = file_interval
+        self.metrics_file = Path(get_base_path()) / "metrics.prom"
+        self._stop_event = threading.Event()
+        self._httpd = None
+    
+    def start(self):
+        """启动HTTP服务线程和文件写入线程"""
+        try:
+            self._httpd = _create_local_http_server(self.port, _MetricsRequestHandler, self.host)
+            self._httpd.metrics = self.metrics
+            threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+            logging.info(f"指标导出已启动: http://{self.host}:{self.port}/metrics")
+        except OSError as e:
+            logging.error(f"启动指标导出服务失败: {str(e)}")
+            self._httpd = None
+        
+        if self.file_interval > 0:
+            threading.Thread(target=self._file_loop, daemon=True).start()
+    
+    def stop(self):
+        """停止导出并写入最后一次指标"""
+        self._stop_event.set()
+        if self._httpd is not None:
+            try:
+                self._httpd.shutdown()
+                self._httpd.server_close()
+            except Exception as e:
+                logging.error(f"停止指标导出服务失败: {str(e)}")
+        if self.file_interval > 0:
+            self._append_to_file()
+    
+    def _file_loop(self):
+        """定期将指标追加到滚动文件（在后台线程中执行，不阻塞界面）"""
+        while not self._stop_event.wait(self.file_interval):
+            self._append_to_file()
+    
+    def _append_to_file(self):
+        """追加一次指标快照，超过大小限制时滚动文件"""
+        try:
+            if self.metrics_file.exists() and self.metrics_file.stat().st_size > self.MAX_FILE_BYTES:
+                for index in range(self.BACKUP_COUNT - 1, 0, -1):
+                    older = self.metrics_file.with_name(f"{self.metrics_file.name}.{index}")
+                    if older.exists():
+                        os.replace(older, self.metrics_file.with_name(f"{self.metrics_file.name}.{index + 1}"))
+                os.replace(self.metrics_file, self.metrics_file.with_name(f"{self.metrics_file.name}.1"))
+            
+            with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                f.write(f"# {datetime.now().isoformat(timespec='seconds')}\n")
+                f.write(self.metrics.render())
+        except OSError as e:
+            logging.error(f"写入指标文件失败: {str(e)}")
+
+
+class RuntimeProfiler:
+    """按需性能分析 - 在指定秒数内用 cProfile 分析刷新循环（含日志读取和解析），用 tracemalloc 记录内存分配变化
+
+    cProfile 只分析启用它的线程：刷新循环由 run 分析，后台线程（搜索索引）的每段工作由 run_background
+    用独立的 cProfile 分析，结束时合并到同一份结果中；事件存储、告警动作和 HTTP 服务线程不在分析范围内。
+    未启用时刷新循环只多一次属性判断，cProfile 和 tracemalloc 只在分析期间导入和运行；
+    结果写入程序目录下带时间戳的文件：profile_时间.txt（耗时排行）、profile_时间.prof（可用 snakeviz 等工具查看）
+    和 memory_时间.txt（相邻快照之间的内存分配变化）
+    """
+    
+    SNAPSHOT_INTERVAL = 10  # tracemalloc 快照间隔（秒）
+    TOP_COUNT = 30          # 每项结果输出的条数
+    
+    def __init__(self, seconds=30):
+        self.seconds = seconds
+        self.active = False
+        self._profile = None
+        self._started_at = 0.0
+        self._stamp = ""
+        self._snapshots = []  # [(开始后的秒数, tracemalloc 快照)]
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()  # 保护后台线程的分析结果
+        self._background_stats = None  # 后台线程已完成工作的合并统计（pstats.Stats）
+    
+    def toggle(self):
+        """开始分析，分析进行中时提前结束并写出结果"""
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+    
+    def start(self):
+        """开始分析（持续 seconds 秒）"""
+        if self.active:
+            return
+        import cProfile
+        import tracemalloc
+        self._profile = cProfile.Profile()
+        self._started_at = time.monotonic()
+        self._stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self._snapshots = [(0.0, self._take_snapshot())]
+        self.active = True
+        logging.info(f"性能分析已开始，持续 {self.seconds} 秒")
+    
+    def run(self, func):
+        """在性能分析下执行一次刷新，到达快照间隔时记录内存快照，分析时间结束后写出结果"""
+        self._profile.enable()
+        try:
+            func()
+        finally:
+            self._profile.disable()
+        elapsed = time.monotonic() - self._started_at
+        if elapsed >= self.seconds:
+            self.stop()
+        elif elapsed - self._snapshots[-1][0] >= self.SNAPSHOT_INTERVAL:
+            self._snapshots.append((elapsed, self._take_snapshot()))
+    
+    def run_background(self, func, *args):
+        """在后台线程中执行一段工作，分析期间用该线程自己的 cProfile 记录并合并到结果（分析结束时未完成的工作不计入）"""
+        with self._lock:
+            session = self._profile if self.active else None
+        if session is None:
+            return func(*args)
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            stats = pstats.Stats(profile)
+            with self._lock:
+                if self._profile is session:
+                    if self._background_stats is None:
+                        self._background_stats = stats
+                    else:
+                        self._background_stats.add(stats)
+    
+    def stop(self):
+        """结束分析并写出结果文件"""
+        if not self.active:
+            return
+        import tracemalloc
+        with self._lock:
+            self.active = False
+        self._snapshots.append((time.monotonic() - self._started_at, self._take_snapshot()))
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            self._write_results()
+        except OSError as e:
+            logging.error(f"写入性能分析结果失败: {str(e)}")
+        with self._lock:
+            self._profile = None
+            self._background_stats = None
+        self._snapshots = []
+    
+    @staticmethod
+    def _take_snapshot():
+        """获取内存快照（排除 tracemalloc 自身的分配）"""
+        import tracemalloc
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+    
+    def _write_results(self):
+        """写出 cProfile 统计和 tracemalloc 快照差异"""
+        import io
+        import pstats
+        base = Path(get_base_path())
+        
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        with self._lock:
+            background_stats = self._background_stats
+        if background_stats is not None:
+            stats.add(background_stats)
+        stats.dump_stats(str(base / f"profile_{self._stamp}.prof"))
+        threads = "刷新循环和搜索索引线程" if background_stats is not None else "刷新循环"
+        stream.write(f"性能分析 {self._stamp}，持续 {self._snapshots[-1][0]:.1f} 秒，{threads}\n\n按累计耗时排序：\n")
+        stats.sort_stats('cumulative').print_stats(self.TOP_COUNT)
+        stream.write("\n按自身耗时排序：\n")
+        stats.sort_stats('tottime').print_stats(self.TOP_COUNT)
+        profile_path = base / f"profile_{self._stamp}.txt"
+        profile_path.write_text(stream.getvalue(), encoding='utf-8')
+        
+        lines = [f"内存分配变化 {self._stamp}（按代码行统计，正数为增长）"]
+        pairs = list(zip(self._snapshots, self._snapshots[1:]))
+        if len(pairs) > 1:
+            pairs.append((self._snapshots[0], self._snapshots[-1]))  # 整个分析期间的变化
+        for (start, old), (end, new) in pairs:
+            differences = new.compare_to(old, 'lineno')
+            total = sum(stat.size_diff for stat in differences)
+            lines.append("")
+            lines.append(f"[{start:.1f}s ~ {end:.1f}s] 合计 {total / 1024:+.1f} KiB")
+            lines.extend(str(stat) for stat in differences[:self.TOP_COUNT])
+        memory_path = base / f"memory_{self._stamp}.txt"
+        memory_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        logging.info(f"性能分析结果已保存: {profile_path.name}、{memory_path.name}")
+
+
+def start_metrics_exporter(config):
+    """根据配置创建指标与导出器，未启用时返回 (None, None)"""
+    if not config.get("metrics_exporter", False):
+        return None, None
+    metrics = LogMetrics()
+    exporter = MetricsExporter(metrics, config.get("metrics_port", 9108), config.get("metrics_file_interval", 60))
+    exporter.start()
+    return metrics, exporter
+
+
+def start_status_server(config):
+    """根据配置启动本地状态服务，未启用或启动失败时返回 None"""
+    if not config.get("status_server", False):
+        return None
+    server = StatusServer(config.get("status_server_port", 8765))
+    return server if server.start() else None
+
+
+class EventStore:
+    """SQLite 事件存储 - 保存读取器解析出的事件（任务开始、配置组开始/结束、进度、错误）
+
+    record() 只把事件放入有上限的队列，从不阻塞界面线程；
+    专用写入线程按批次在单个事务中写入（WAL 模式），并定期删除超过保留天数的事件；
+    队列为空时写入线程一直阻塞等待，日志没有新事件时不会被唤醒
+    """
+    
+    DB_FILE = "events.db"          # 数据库文件名（与 config.txt 同目录）
+    QUEUE_LIMIT = 10000            # 待写入事件上限，超过时丢弃新事件
+    BATCH_SIZE = 500               # 单个事务最多写入的事件数
+    FLUSH_INTERVAL = 1.0           # 收到第一个事件后凑批等待的最长时间（秒）
+    RETENTION_CHECK_INTERVAL = 3600  # 清理过期事件的间隔（秒）
+    
+    def __init__(self, retention_days=30):
+        self.db_path = Path(get_base_path()) / self.DB_FILE
+        self.retention_days = retention_days
+        self.dropped = 0  # 队列已满时丢弃的事件数
+        self._queue = queue.Queue(maxsize=self.QUEUE_LIMIT)
+        self._stop = object()  # 停止标记
+        self._thread = None
+    
+    def start(self):
+        """启动写入线程"""
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+        logging.info(f"事件存储已启用: {self.db_path}")
+    
+    def stop(self):
+        """停止写入线程（先写完队列中的事件）"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(self._stop, timeout=1)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=3)
+        self._thread = None
+    
+    def record_event(self, timestamp_ms, kind, config_group, task, detail=""):
+        """记录一个事件（非阻塞）"""
+        try:
+            self._queue.put_nowait((timestamp_ms, kind, config_group, task, detail))
+        except queue.Full:
+            self.dropped += 1
+    
+    def _connect(self):
+        """打开数据库并创建表和索引（在写入线程中调用）"""
+        import sqlite3
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, kind TEXT NOT NULL, "
+            "config_group TEXT, task TEXT, detail TEXT)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events (kind, ts)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_events_task_ts ON events (task, ts)")
+        connection.commit()
+        return connection
+    
+    def _write_loop(self):
+        """写入线程：凑批后在单个事务中写入，写入后检查是否需要清理过期事件"""
+        try:
+            connection = self._connect()
+        except Exception as e:
+            logging.error(f"打开事件数据库失败: {str(e)}")
+            return
+        
+        next_retention_check = 0
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get()  # 空闲时不设超时，避免定期唤醒
+                deadline = time.monotonic() + self.FLUSH_INTERVAL
+                while True:
+                    if item is self._stop:
+                        running = False
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.BATCH_SIZE:
+                        break
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                pass
+            
+            try:
+                if batch:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO events (ts, kind, config_group, task, detail) VALUES (?, ?, ?, ?, ?)",
+                            batch
+                        )
+                if time.monotonic() >= next_retention_check:
+                    next_retention_check = time.monotonic() + self.RETENTION_CHECK_INTERVAL
+                    cutoff_ms = int((time.time() - self.retention_days * 86400) * 1000)
+                    with connection:
+                        connection.execute("DELETE FROM events WHERE ts < ?", (cutoff_ms,))
+            except Exception as e:
+                logging.error(f"写入事件数据库失败: {str(e)}")
+        
+        connection.close()
+
+
+def start_event_store(config):
+    """根据配置启动事件存储，未启用时返回 None"""
+    if not config.get("event_store", False):
+        return None
+    store = EventStore(config.get("event_store_retention_days", 30))
+    store.start()
+    return store
+
+
+class AhoCorasickAutomaton:
+    """Aho-Corasick 多关键字匹配自动机 - 一次扫描找出文本中出现的所有关键字（包括相互重叠的）
+
+    构建时把失败链接展开为完整的状态转移表，扫描时每个字符只查一次字典
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        transitions = [{}]  # 状态 -> {字符: 下一状态}（字典树）
+        outputs = [()]      # 状态 -> 在此结束的关键字编号
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(transitions)
+                    transitions[state][char] = next_state
+                    transitions.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] += (index,)
+        
+        # 按广度优先计算失败链接，并把失败状态的转移和输出并入当前状态
+        failure = [0] * len(transitions)
+        pending = deque(transitions[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in transitions[state].items():
+                pending.append(next_state)
+                # 失败状态的深度更小，已在前面处理完，其转移表已经完整
+                failure[next_state] = transitions[failure[state]].get(char, 0)
+                outputs[next_state] += outputs[failure[next_state]]
+            for char, next_state in transitions[failure[state]].items():
+                transitions[state].setdefault(char, next_state)
+        self._transitions = transitions
+        self._outputs = outputs
+    
+    def find(self, text):
+        """返回文本中出现的关键字编号集合"""
+        transitions = self._transitions
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class AlertRule:
+    """告警规则的运行状态 - 冷却时间、频率上限和命中计数"""
+    
+    def __init__(self, name, keywords, actions, cooldown, limit=0, window=0):
+        self.name = name
+        self.keywords = keywords
+        self.actions = actions
+        self.cooldown_ms = cooldown * 1000
+        self.limit = limit
+        self.window_ms = window * 1000
+        self.hits = 0        # 命中关键字的行数
+        self.fired = 0       # 实际触发的次数
+        self.suppressed = 0  # 因冷却或频率上限未触发的次数
+        self._last_fired_ms = None
+        self._fired_times = deque()  # 频率上限窗口内的触发时间
+    
+    def allow(self, now_ms):
+        """判断此刻能否触发（冷却时间已过且未超过频率上限），可以时记录本次触发"""
+        if self._last_fired_ms is not None and now_ms - self._last_fired_ms < self.cooldown_ms:
+            return False
+        if self.limit:
+            while self._fired_times and self._fired_times[0] <= now_ms - self.window_ms:
+                self._fired_times.popleft()
+            if len(self._fired_times) >= self.limit:
+                return False
+            self._fired_times.append(now_ms)
+        self._last_fired_ms = now_ms
+        return True
+
+
+class AlertEngine:
+    """关键字告警引擎 - 所有规则的关键字编译为一个 Aho-Corasick 自动机，每行新日志只扫描一次
+
+    命中的规则按冷却时间和频率上限决定是否触发；提示音、告警日志和命令在工作线程中执行，不阻塞界面；
+    highlight 动作由前端在渲染时高亮包含关键字的日志行
+    """
+    
+    ALERT_LOG_FILE = "alerts.log"  # 告警日志文件名（与 config.txt 同目录）
+    QUEUE_LIMIT = 100              # 待执行动作上限，超过时丢弃新动作
+    
+    def __init__(self, rules, command=""):
+        """rules: 告警规则列表（见 parse_alert_rule）；command: command 动作运行的命令"""
+        self.rules = [AlertRule(*rule) for rule in rules]
+        self.command = command
+        self.dropped = 0  # 队列已满时丢弃的动作数
+        
+        # 关键字 -> 使用它的规则编号（多个规则可以共用关键字）
+        keyword_rules = {}
+        for rule_index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                keyword_rules.setdefault(keyword, []).append(rule_index)
+        self.automaton = AhoCorasickAutomaton(keyword_rules)
+        self._keyword_rules = list(keyword_rules.values())
+        # 关键字 -> 使用它的第一个 highlight 规则编号（多个规则命中同一行时按配置顺序取第一个）
+        self._highlight_rules = {}
+        for keyword_index, rule_indexes in enumerate(self._keyword_rules):
+            highlight_indexes = [i for i in rule_indexes if "highlight" in self.rules[i].actions]
+            if highlight_indexes:
+                self._highlight_rules[keyword_index] = highlight_indexes[0]
+        
+        self._queue = queue.Queue(maxsize=self.QUEUE_LIMIT)
+        self._stop = object()  # 停止标记
+        self._thread = None
+        self._bell_pending = threading.Event()  # 非 Windows 系统的提示音由前端在界面线程中播放
+    
+    def take_bell(self):
+        """前端每帧调用：有待播放的提示音时返回 True 并清除标记"""
+        if not self._bell_pending.is_set():
+            return False
+        self._bell_pending.clear()
+        return True
+    
+    def start(self):
+        """启动动作执行线程"""
+        self._thread = threading.Thread(target=self._action_loop, daemon=True)
+        self._thread.start()
+        logging.info(f"告警规则已启用: {len(self.rules)} 条规则，{len(self.automaton.keywords)} 个关键字")
+    
+    def stop(self):
+        """停止动作执行线程"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(self._stop, timeout=1)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=3)
+        self._thread = None
+    
+    def process_line(self, line, now_ms):
+        """扫描一行新日志，触发命中的规则（非阻塞），返回触发的规则名称列表"""
+        found = self.automaton.find(line)
+        if not found:
+            return []
+        fired = []
+        matched_rules = {}  # 规则编号 -> 命中的第一个关键字
+        for keyword_index in sorted(found):
+            for rule_index in self._keyword_rules[keyword_index]:
+                matched_rules.setdefault(rule_index, self.automaton.keywords[keyword_index])
+        for rule_index, keyword in sorted(matched_rules.items()):
+            rule = self.rules[rule_index]
+            rule.hits += 1
+            if not rule.allow(now_ms):
+                rule.suppressed += 1
+                continue
+            rule.fired += 1
+            fired.append(rule.name)
+            if any(action != "highlight" for action in rule.actions):
+                try:
+                    self._queue.put_nowait((rule, keyword, line.strip()))
+                except queue.Full:
+                    self.dropped += 1
+        return fired
+    
+    def highlight_rule(self, line):
+        """显示行需要高亮时返回对应的规则编号，否则返回 None（与冷却无关，只看内容）"""
+        if not self._highlight_rules:
+            return None
+        rule_indexes = [self._highlight_rules[index] for index in self.automaton.find(line)
+                        if index in self._highlight_rules]
+        return min(rule_indexes) if rule_indexes else None
+    
+    def get_stats(self):
+        """各规则的统计 - 返回 [(名称, 命中次数, 触发次数, 抑制次数)]"""
+        return [(rule.name, rule.hits, rule.fired, rule.suppressed) for rule in self.rules]
+    
+    def _action_loop(self):
+        """动作执行线程：依次执行触发规则的动作"""
+        while True:
+            item = self._queue.get()
+            if item is self._stop:
+                break
+            rule, keyword, line = item
+            logging.warning(f"告警 [{rule.name}] {keyword}: {line}")
+            for action in rule.actions:
+                try:
+                    if action == "beep":
+                        self._beep()
+                    elif action == "log":
+                        self._append_alert_log(rule, keyword, line)
+                    elif action == "command":
+                        self._run_command(rule, keyword, line)
+                except Exception as e:
+                    logging.error(f"执行告警动作 {action} 失败: {str(e)}")
+    
+    def _beep(self):
+        """播放提示音（Windows 使用系统提示音；其他系统交给前端响铃，终端前端运行时标准输出归 curses 所有）"""
+        try:
+            import winsound
+            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+        except ImportError:
+            self._bell_pending.set()
+    
+    def _append_alert_log(self, rule, keyword, line):
+        """追加一条告警到 alerts.log"""
+        with open(Path(get_base_path()) / self.ALERT_LOG_FILE, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().isoformat(timespec='seconds')} [{rule.name}] {keyword}: {line}\n")
+    
+    def _run_command(self, rule, keyword, line):
+        """运行 alert_command（不经过 shell），参数中的 {rule}、{keyword}、{line} 替换为告警内容"""
+        if not self.command:
+            logging.warning(f"告警规则 {rule.name} 使用了 command 动作，但未设置 alert_command")
+            return
+        import shlex
+        import subprocess
+        arguments = [argument.strip('"') for argument in shlex.split(self.command, posix=(os.name != 'nt'))]
+        # 只替换这三个占位符，命令中的其他花括号（如 PowerShell 脚本块、JSON）原样保留
+        values = (("{rule}", rule.name), ("{keyword}", keyword), ("{line}", line))
+        for placeholder, value in values:
+            arguments = [argument.replace(placeholder, value) for argument in arguments]
+        subprocess.Popen(arguments)
+
+
+def start_alert_engine(config):
+    """根据配置启动告警引擎，没有告警规则时返回 None"""
+    rules = config.get_alert_rules()
+    if not rules:
+        return None
+    engine = AlertEngine(rules, config.get("alert_command", ""))
+    engine.start()
+    return engine
+
+
+STATE_SNAPSHOT_FILE = "state_snapshot.json"  # 状态快照文件名（与 config.txt 同目录）
+
+
+def load_state_snapshot():
+    """读取上次保存的状态快照，不存在或损坏时返回 None"""
+    snapshot_file = Path(get_base_path()) / STATE_SNAPSHOT_FILE
+    try:
+        with open(snapshot_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        return snapshot if isinstance(snapshot, dict) else None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"读取状态快照失败: {str(e)}")
+        return None
+
+
+def save_state_snapshot(snapshot):
+    """保存状态快照（先写临时文件再替换，避免中途退出留下半个文件）"""
+    snapshot_file = Path(get_base_path()) / STATE_SNAPSHOT_FILE
+    temp_file = snapshot_file.with_name(snapshot_file.name + ".tmp")
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_file, snapshot_file)
+    except (OSError, TypeError, ValueError) as e:
+        logging.error(f"保存状态快照失败: {str(e)}")
+
+
+class ProgressRateEstimator:
+    """进度速率估算器 - 按日志时间戳计算进度速率的指数加权移动平均（EWMA），状态为O(1)"""
+    
+    __slots__ = ("alpha", "rate", "last_current", "last_total", "last_time_ms")
+    
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha        # 平滑系数，越大越偏向最近的速率
+        self.rate = None          # 每秒进度
+        self.last_current = None
+        self.last_total = None
+        self.last_time_ms = None
+    
+    def update(self, current, total, log_time_ms):
+        """输入一个进度事件 (当前值, 总数, 日志时间)"""
+        if (self.last_time_ms is None or total != self.last_total
+                or current < self.last_current):
+            # 首个事件、总数变化或进度回退：视为新一轮，重新估算
+            self.rate = None
+            self.last_current = current
+            self.last_total = total
+            self.last_time_ms = log_time_ms
+            return
+        
+        delta = current - self.last_current
+        if delta <= 0:
+            return  # 进度未前进：保留上次时间，停滞时间计入下一次速率
+        
+        elapsed_ms = (log_time_ms - self.last_time_ms) % 86400000  # 处理跨午夜
+        if elapsed_ms <= 0:
+            return
+        
+        instant_rate = delta * 1000 / elapsed_ms
+        if self.rate is None:
+            self.rate = instant_rate
+        else:
+            self.rate = self.alpha * instant_rate + (1 - self.alpha) * self.rate
+        self.last_current = current
+        self.last_time_ms = log_time_ms
+    
+    def eta_seconds(self):
+        """预计剩余秒数，尚无法估算时返回 None"""
+        if not self.rate or self.last_total is None:
+            return None
+        return max(self.last_total - self.last_current, 0) / self.rate
+
+
+class SlidingWindowRateDetector:
+    """滑动窗口频率检测器 - 按日志时间戳分桶计数，每个事件O(1)更新，重放日志结果一致"""
+    
+    BUCKETS_PER_WINDOW = 60  # 每个窗口的分桶数（窗口边界精度为窗口长度的1/60）
+    
+    def __init__(self, name, threshold, window_seconds):
+        self.name = name
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.bucket_ms = max(window_seconds * 1000 // self.BUCKETS_PER_WINDOW, 1)
+        self.bucket_count = -(-window_seconds * 1000 // self.bucket_ms)  # 向上取整
+        self._buckets = [0] * self.bucket_count
+        self._head = None  # 最新的分桶编号（日志时间 // bucket_ms）
+        self.count = 0     # 窗口内事件数
+        self.active = False
+        self.version = 0   # 告警状态或告警中的计数变化时递增
+    
+    def reset(self):
+        """清空窗口"""
+        self._buckets = [0] * self.bucket_count
+        self._head = None
+        self.count = 0
+        if self.active:
+            self.active = False
+            self.version += 1
+    
+    def advance(self, log_time_ms):
+        """推进到指定日志时间，移出已过期的分桶并更新告警状态"""
+        bucket_id = log_time_ms // self.bucket_ms
+        if self._head is None:
+            self._head = bucket_id
+        elif bucket_id > self._head:
+            # 只需清理经过的分桶，最多一轮
+            for step in range(1, min(bucket_id - self._head, self.bucket_count) + 1):
+                slot = (self._head + step) % self.bucket_count
+                if self._buckets[slot]:
+                    self.count -= self._buckets[slot]
+                    self._buckets[slot] = 0
+                    if self.active:
+                        self.version += 1  # 告警行中的次数变化
+            self._head = bucket_id
+        self._update_state()
+    
+    def add(self, log_time_ms):
+        """记录一次事件"""
+        self.advance(log_time_ms)
+        bucket_id = log_time_ms // self.bucket_ms
+        if bucket_id > self._head - self.bucket_count:  # 过旧的乱序事件直接忽略
+            self._buckets[bucket_id % self.bucket_count] += 1
+            self.count += 1
+            if self.active:
+                self.version += 1  # 告警行中的次数变化
+        self._update_state()
+    
+    def _update_state(self):
+        """根据窗口内事件数切换告警状态"""
+        if self.count >= self.threshold:
+            if not self.active:
+                self.active = True
+                self.version += 1
+                logging.warning(f"{self.name}过于频繁！")
+        elif self.active:
+            self.active = False
+            self.version += 1
+            logging.info(f"{self.name}频率恢复正常")
+    
+    def describe(self):
+        """告警描述文本"""
+        window = "分钟" if self.window_seconds == 60 else f"{self.window_seconds}秒"
+        return f"{self.name}过于频繁 ({self.count}次/{window})"
+
+
+class LevelRateCounter:
+    """日志级别速率计数器 - 最近一分钟内各级别的日志条数，每秒一个分桶的固定大小环形缓冲区
+
+    读取时按实际时间推进，记录和读取都只清理经过的分桶，合计随时可用，与日志量无关
+    """
+    
+    WINDOW_SECONDS = 60
+    LEVELS = ("INF", "WRN", "ERR")
+    LEVEL_ALIASES = {"FTL": "ERR"}  # 致命错误计入错误
+    
+    def __init__(self):
+        self._level_index = {level: index for index, level in enumerate(self.LEVELS)}
+        for alias, level in self.LEVEL_ALIASES.items():
+            self._level_index[alias] = self._level_index[level]
+        self._buckets = [[0] * len(self.LEVELS) for _ in range(self.WINDOW_SECONDS)]
+        self._totals = [0] * len(self.LEVELS)
+        self._head = None  # 最新的分桶对应的秒数
+    
+    def advance(self, now):
+        """推进到指定时间（秒），清空已过期的分桶"""
+        second = int(now)
+        if self._head is None:
+            self._head = second
+        elif second > self._head:
+            # 只需清理经过的分桶，最多一轮
+            for step in range(1, min(second - self._head, self.WINDOW_SECONDS) + 1):
+                bucket = self._buckets[(self._head + step) % self.WINDOW_SECONDS]
+                for index, count in enumerate(bucket):
+                    if count:
+                        self._totals[index] -= count
+                        bucket[index] = 0
+            self._head = second
+    
+    def record(self, level, now):
+        """记录一条日志（不统计的级别直接忽略）"""
+        index = self._level_index.get(level)
+        if index is None:
+            return
+        self.advance(now)
+        self._buckets[self._head % self.WINDOW_SECONDS][index] += 1
+        self._totals[index] += 1
+    
+    def per_minute(self):
+        """最近一分钟内各级别的日志条数 [(级别, 条数)]"""
+        return list(zip(self.LEVELS, self._totals))
+
+
+class GlyphWidthTable:
+    """字形宽度表 - 缓存每个字符的宽度，按累计宽度二分查找截断位置
+
+    接口与 tkfont.Font 的 measure/metrics 兼容；每个字符只向字体测量一次，
+    之后测量和截断都只是查表求和，截断位置用二分查找确定
+    """
+    
+    ELLIPSIS = "…"
+    
+    def __init__(self, font=None):
+        self.font = font
+        self._char_widths = {}  # 字符宽度缓存
+    
+    def _measure_char(self, char):
+        """向字体测量单个字符的宽度"""
+        return self.font.measure(char)
+    
+    def _char_width(self, char):
+        """获取单个字符的宽度（查表，首次出现时测量）"""
+        width = self._char_widths.get(char)
+        if width is None:
+            width = self._char_widths[char] = self._measure_char(char)
+        return width
+    
+    def measure(self, text):
+        """测量文本宽度"""
+        return sum(map(self._char_width, text))
+    
+    def metrics(self, option):
+        """字体度量"""
+        return self.font.metrics(option)
+    
+    def prefix_widths(self, text):
+        """累计宽度列表 - 第 i 项为 text[:i] 的宽度"""
+        return list(accumulate(map(self._char_width, text), initial=0))
+    
+    def truncate(self, text, max_width):
+        """截断到 max_width 以内（不加省略号）"""
+        widths = self.prefix_widths(text)
+        return text[:bisect_right(widths, max_width) - 1]
+    
+    def fit(self, text, max_width):
+        """使文本不超过 max_width，超出时截断结尾并加省略号"""
+        return self.elide_middle(text, max_width, keep=len(text))
+    
+    def elide_middle(self, text, max_width, keep=0):
+        """使文本不超过 max_width，超出时省略中间部分
+
+        text[:keep] 尽量完整保留，其后的部分开头和结尾各占一半宽度，中间以省略号代替；
+        keep 部分本身放不下时退化为截断结尾
+        """
+        widths = self.prefix_widths(text)
+        total = widths[-1]
+        if total <= max_width:
+            return text
+        budget = max_width - self._char_width(self.ELLIPSIS)
+        if budget <= 0:
+            return self.truncate(text, max_width)
+        if keep >= len(text) or widths[keep] >= budget:
+            return text[:bisect_right(widths, budget) - 1] + self.ELLIPSIS
+        
+        # 开头取剩余宽度的一半，结尾用掉其余宽度：total - widths[tail] <= budget - widths[head]
+        head = bisect_right(widths, widths[keep] + (budget - widths[keep]) / 2) - 1
+        tail = bisect_left(widths, total - (budget - widths[head]))
+        return text[:head] + self.ELLIPSIS + text[tail:]
+    
+    def save(self, path, font_key):
+        """将已测量的字形宽度保存为度量文件（原子写入），供无图形界面的环境或下次启动直接加载"""
+        data = {
+            "version": FileGlyphWidthTable.VERSION,
+            "font": font_key,
+            "linespace": self.metrics('linespace'),
+            "narrow": self._char_width("0"),
+            "wide": self._char_width("中"),
+            "widths": self._char_widths,
+        }
+        temp_path = Path(f"{path}.tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.error(f"保存字形度量文件失败: {str(e)}")
+
+
+class FileGlyphWidthTable(GlyphWidthTable):
+    """从度量文件加载的字形宽度表 - 不需要字体和图形界面，文件中没有的字符按半角/全角默认宽度估算"""
+    
+    VERSION = 1  # 度量文件格式版本
+    
+    def __init__(self, widths, narrow_width, wide_width, linespace):
+        super().__init__()
+        self._char_widths = dict(widths)
+        self.narrow_width = narrow_width
+        self.wide_width = wide_width
+        self.linespace = linespace
+    
+    def _measure_char(self, char):
+        """估算文件中没有的字符宽度"""
+        if unicodedata.combining(char):
+            return 0
+        if unicodedata.east_asian_width(char) in ('W', 'F'):
+            return self.wide_width
+        return self.narrow_width
+    
+    def metrics(self, option):
+        """字体度量 - 只提供行高"""
+        return self.linespace if option == 'linespace' else 0
+    
+    @classmethod
+    def load(cls, path, font_key=None):
+        """加载度量文件，版本或字体（指定 font_key 时）不匹配、格式错误时抛出 ValueError"""
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"度量文件格式错误: {e}")
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            raise ValueError("度量文件版本不匹配")
+        if font_key is not None and data.get("font") != font_key:
+            raise ValueError(f"度量文件对应的字体为 {data.get('font')}，当前字体为 {font_key}")
+        try:
+            return cls(data["widths"], data["narrow"], data["wide"], data["linespace"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"度量文件格式错误: {e}")
+
+
+class CellWidthMeasurer(GlyphWidthTable):
+    """终端单元格宽度测量器 - 以字符单元格为单位计算宽度，接口与 tkfont.Font 兼容"""
+    
+    def _measure_char(self, char):
+        """获取单个字符占用的单元格数（全角/宽字符为2，组合字符为0）"""
+        if unicodedata.combining(char):
+            return 0
+        if unicodedata.east_asian_width(char) in ('W', 'F'):
+            return 2
+        return 1
+    
+    def metrics(self, option):
+        """字体度量 - 终端中每行固定占用1个单元格高度"""
+        return 1 if option == 'linespace' else 0
+
+
+class LogLayoutEngine:
+    """日志布局引擎 - 格式化日志条目并按宽度换行，不依赖 tkinter
+
+    宽度由字形度量提供器计算（GlyphWidthTable：Tk 字体、终端单元格或度量文件），
+    每个字符只测量一次，换行只是查表求和和二分查找，可在后台线程或无图形界面的环境中运行
+    """
+    
+    INDENT = "　　"  # 续行缩进（两个全角空格）
+    
+    def __init__(self, metrics, max_width, display_lines, auto_wrap=True, highlighter=None):
+        """metrics: 字形度量提供器，为 None 时不换行
+        highlighter: 可选的高亮判断函数（显示文本 -> 告警规则编号或 None），如 AlertEngine.highlight_rule
+        """
+        self.metrics = metrics
+        self.max_width = max_width
+        self.display_lines = display_lines
+        self.auto_wrap = auto_wrap
+        self.highlighter = highlighter
+    
+    @staticmethod
+    def format_line(line):
+        """格式化日志行 - 移除类名部分，简化显示"""
+        return LogLayoutEngine.format_line_level(line)[0]
+    
+    @staticmethod
+    def format_line_level(line):
+        """格式化日志行并返回 (显示文本, 日志级别)，无法识别格式时级别为 None"""
+        match = LOG_FORMAT_PATTERN.match(line)
+        if match:
+            timestamp = match.group(1)
+            log_level = match.group(2)
+            message = match.group(3) or ""  # 确保消息不为None
+            
+            # 完全移除类名部分 - 简化显示（配置组信息保持完整显示）
+            return f"{timestamp[:-5]} {log_level}] {message}", log_level
+        return line, None  # 如果无法匹配，返回原始行
+    
+    def layout(self, entries):
+        """格式化并换行日志条目，返回最多 display_lines 个显示行"""
+        return self.layout_levels(entries)[0]
+    
+    def layout_levels(self, entries):
+        """格式化并换行日志条目 - 返回 (显示行, 各显示行的日志级别, 各显示行的高亮规则编号)
+
+        级别和高亮规则按整条日志（换行前）确定，换行产生的续行沿用所属条目的值，
+        因此被换行拆开的关键字也能识别；未设置 highlighter 时高亮规则编号均为 None
+        """
+        formatted_content = []
+        levels = []
+        rules = []
+        for line in entries:
+            text, level = self.format_line_level(line)
+            rule = self.highlighter(text) if self.highlighter is not None else None
+            wrapped = self.wrap_line(text) if self.auto_wrap else [text]
+            formatted_content.extend(wrapped)
+            levels.extend([level] * len(wrapped))
+            rules.extend([rule] * len(wrapped))
+        
+        # 换行后可能行数超过 display_lines，需要再次限制
+        if self.auto_wrap and len(formatted_content) > self.display_lines:
+            formatted_content = formatted_content[-self.display_lines:]
+            levels = levels[-self.display_lines:]
+            rules = rules[-self.display_lines:]
+        return formatted_content, levels, rules
+    
+    def wrap_line(self, line):
+        """对单行文本进行换行处理 - 优先在空格处换行，超长单词按字符切分，续行添加缩进"""
+        if self.metrics is None or not line.strip():
+            return [line]
+        
+        try:
+            measure = self.metrics.measure
+            # 计算可用宽度（减去缩进和2像素边距）
+            available_width = self.max_width - measure(self.INDENT) - 2
+            
+            # 如果整行宽度不超过可用宽度，直接返回
+            if measure(line) <= available_width:
+                return [line]
+            
+            # 按单词累加宽度（逐个测量单词，不重复测量整行前缀）
+            space_width = measure(" ")
+            wrapped_lines = []
+            current_line = ""
+            current_width = 0
+            for word in line.split(' '):
+                if not word:  # 跳过空单词
+                    continue
+                
+                word_width = measure(word)
+                test_width = current_width + space_width + word_width if current_line else word_width
+                if test_width <= available_width:
+                    current_line = current_line + " " + word if current_line else word
+                    current_width = test_width
+                    continue
+                
+                # 当前行已满，开始新行
+                if current_line:
+                    wrapped_lines.append(current_line)
+                if word_width > available_width:
+                    # 单个单词就超宽，按字符强制分割
+                    wrapped_lines.extend(self._split_long_word(word, available_width))
+                    current_line, current_width = "", 0
+                else:
+                    current_line, current_width = word, word_width
+            
+            # 添加最后一行
+            if current_line:
+                wrapped_lines.append(current_line)
+            if not wrapped_lines:
+                return [line]
+            return wrapped_lines[:1] + [self.INDENT + wrapped for wrapped in wrapped_lines[1:]]
+            
+        except Exception as e:
+            logging.warning(f"换行处理失败: {str(e)}，返回原始行")
+            return [line]
+    
+    def _split_long_word(self, word, available_width):
+        """超长单词的字符级分割 - 按累计宽度二分查找每段的结束位置"""
+        widths = self.metrics.prefix_widths(word)
+        chunks = []
+        start = 0
+        while start < len(word):
+            end = bisect_right(widths, widths[start] + available_width) - 1
+            end = max(end, start + 1)  # 单个字符就超宽时也单独成段
+            chunks.append(word[start:end])
+            start = end
+        return chunks
+
+
+def _naive_wrap_line(line, font, max_width):
+    """逐次测量候选字符串的换行实现（原读取器中的算法，作为基准测试的对照）"""
+    indent = LogLayoutEngine.INDENT
+    available_width = max_width - font.measure(indent) - 2
+    if not line.strip() or font.measure(line) <= available_width:
+        return [line]
+    wrapped_lines = []
+    current_line = ""
+    for word in line.split(' '):
+        if not word:
+            continue
+        test_line = current_line + " " + word if current_line else word
+        if font.measure(test_line) <= available_width:
+            current_line = test_line
+            continue
+        if current_line:
+            wrapped_lines.append(current_line)
+        current_line = word
+        if font.measure(word) > available_width:
+            current_line = ""
+            for char in word:
+                if font.measure(current_line + char) <= available_width:
+                    current_line += char
+                else:
+                    if current_line:
+                        wrapped_lines.append(current_line)
+                    current_line = char
+            wrapped_lines.append(current_line)
+            current_line = ""
+    if current_line:
+        wrapped_lines.append(current_line)
+    return wrapped_lines[:1] + [indent + wrapped for wrapped in wrapped_lines[1:]] if wrapped_lines else [line]
+
+
+class SmartLogReader:
+    def __init__(self, log_dir, log_filename_prefix, log_path_configured, display_lines=11, skip_debug_log=False, dynamic_height=False, auto_wrap=False, max_width=460, font_config=None, measurer=None, metrics=None, rate_rules=None, event_sink=None, pattern_matcher=None, glyph_metrics_file=None, collapse_repeats=True, alert_engine=None, level_rates=False):
+        """智能日志读取器 - 负责读取和解析原神日志文件
+
+        measurer: 可选的宽度测量器（需提供 measure(text) 方法），
+        未提供时使用 tkinter 字体测量，终端前端传入 CellWidthMeasurer
+        metrics: 可选的 LogMetrics，在增量读取新日志时更新
+        rate_rules: 频率检测规则列表（见 parse_rate_rule），默认只检测任务切换
+        event_sink: 可选的事件存储（需提供 record_event 方法），接收新读取到的任务/配置组/进度/错误事件
+        pattern_matcher: 任务/进度模式匹配器（见 LogPatternMatcher），默认只包含内置模式
+        glyph_metrics_file: 可选的字形度量文件路径，与当前字体匹配时换行不再访问 tkinter 字体
+        collapse_repeats: 是否将消息相同（只有时间戳不同）的连续日志条目合并为一条并显示重复次数
+        alert_engine: 可选的告警引擎（见 AlertEngine），扫描新读取到的每行日志
+        level_rates: 是否在状态行中显示最近一分钟各级别的日志速率和距最后一行日志的时间
+        """
+        # 在初始化时验证log_dir的有效性
+        if not log_path_configured:
+            self.log_dir = None
+            self.log_path_valid = False
+        elif not log_dir or not log_dir.strip():
+            self.log_dir = None
+            self.log_path_valid = False
+        else:
+            self.log_dir = Path(log_dir)
+            self.log_path_valid = self._check_log_path()
+        
+        self.log_filename_prefix = log_filename_prefix
+        self.log_path_configured = log_path_configured  # 接收配置狀態
+        self.skip_debug_log = skip_debug_log  # 是否跳过调试日志
+        
+        # 新增：换行相关配置
+        self.auto_wrap = auto_wrap
+        self.max_width = max_width
+        self.font_config = font_config  # 字体配置
+        self.measurer = measurer  # 外部宽度测量器（终端前端使用）
+        self.glyph_metrics_file = glyph_metrics_file  # 字形度量文件（可选）
+        self.metrics = metrics  # 日志事件指标（可选）
+        self.event_sink = event_sink  # 事件存储（可选）
+        self._pending_error_ms = None  # 等待消息行的错误条目时间（事件存储用）
+        
+        # 字形度量缓存和布局引擎（首次换行时创建）
+        self._font_cache = None
+        self._layout_engine = None
+        
+        # 新增：讀取行數（display_lines*2(其中1行為空格)行用於分析）
+        # 优化：当跳过调试日志时，需要读取更多行以确保有足够的非调试日志显示
+        self.read_lines = max(display_lines * 2, 50) if skip_debug_log else display_lines * 2
+        self.display_lines = display_lines  # 保存顯示行數
+        self.dynamic_height=dynamic_height
+        
+        self.current_date = datetime.now().date()  # 当前日志文件日期
+        self._position = 0  # 文件读取位置（已处理完整行的结束字节偏移）
+        self._needs_bootstrap = True  # 新打开文件时先从尾部读取
+        
+        # 已合并的日志条目（跨行条目合并为一条），增量读取时追加
+        self._entries = deque(maxlen=max(self.read_lines, 1))
+        # 与 _entries 一一对应的重复信息：None 或 (重复次数, 最后一次的时间 HH:MM:SS.mmm)
+        self._entry_repeats = deque(maxlen=max(self.read_lines, 1))
+        self.collapse_repeats = collapse_repeats
+        self._skip_current_entry = True  # 当前条目是否被跳过（调试日志或无起始行的残片）
+        
+        # 版本号：只在读取到的内容确实改变时递增，前端比较整数即可判断是否需要重绘
+        self.content_generation = 0  # 日志条目
+        self.status_generation = 0   # 配置组/任务/进度
+        self._formatted_generation = None  # 已格式化内容对应的版本号
+        self._formatted_content = []
+        self._formatted_levels = []  # 各显示行的日志级别（用于按级别着色）
+        self._formatted_alert_rules = []  # 各显示行的告警高亮规则编号（用于告警着色）
+        self._recent_entries = []  # 最近一次显示的原始日志条目（未格式化）
+        self._current_file = None     # 当前日志文件路径
+        self._current_file_mtime = 0  # 当前文件修改时间
+        
+        # 状态信息
+        self.current_task = "无当前任务"
+        self.current_config = "无激活配置组"
+        
+        # 任务进度信息
+        self.current_progress = "0/0"
+        self.current_eta = None  # 当前进度的预计剩余时间（秒）
+        self.task_progress = OrderedDict()  # 任务进度缓存（有上限）
+        self._progress_estimators = OrderedDict()  # 各任务的进度速率估算器（有上限）
+        self._current_entry_time_ms = None  # 当前日志条目的时间戳（当天毫秒数）
+        
+        # 频率检测（按日志时间戳的滑动窗口）
+        if rate_rules is None:
+            rate_rules = [parse_rate_rule("任务切换", DEFAULT_TASK_SWITCH_RULE)]
+        self.rate_detectors = []
+        self._switch_detectors = []   # 任务切换规则
+        self._level_detectors = {}    # 日志级别 -> 规则列表
+        self._keyword_detectors = []  # (关键字, 规则)
+        for name, kind, argument, threshold, window in rate_rules:
+            detector = SlidingWindowRateDetector(name, threshold, window)
+            self.rate_detectors.append(detector)
+            if kind == "task_switch":
+                self._switch_detectors.append(detector)
+            elif kind == "level":
+                self._level_detectors.setdefault(argument, []).append(detector)
+            else:
+                self._keyword_detectors.append((argument, detector))
+        self._entry_keyword_hits = set()  # 当前条目已计入的关键字规则编号
+        self.max_rate_window = max((d.window_seconds for d in self.rate_detectors), default=0)  # 最长检测窗口（秒）
+        self._log_clock_ms = None       # 单调递增的日志时间（跨午夜时累加一天）
+        self._log_clock_epoch_ms = 0    # 日志时间起点所在日期零点的时间戳（毫秒）
+        self._last_ingest_time = time.time()  # 最后一次读到新日志行的时间
+        
+        # 日志速率状态行（可选，只统计新读取到的日志）
+        self.level_rates = LevelRateCounter() if level_rates else None
+        self.rate_line = None  # 当前的速率状态行文本
+        self.rate_generation = 0  # 速率状态行版本号
+
+        # 配置组和日志格式正则表达式（与多天统计共用）
+        self.config_pattern = CONFIG_GROUP_PATTERN
+        self.log_format_pattern = LOG_FORMAT_PATTERN
+        
+        # 任务和进度模式匹配器（内置模式 + 用户自定义模式）
+        self.pattern_matcher = pattern_matcher if pattern_matcher is not None else LogPatternMatcher()
+        if metrics is not None:
+            metrics.pattern_matcher = self.pattern_matcher
+        
+        # 关键字告警引擎（只扫描新读取到的日志，不扫描历史尾部）
+        self.alert_engine = alert_engine
+        if metrics is not None and alert_engine is not None:
+            metrics.alert_engine = alert_engine
+
+        self._update_log_file()  # 初始化日志文件
+
+    # 单次增量读取的最大字节数，超过时改为从尾部重新读取
+    MAX_INCREMENTAL_BYTES = 4 * 1024 * 1024
+    
+    # 任务进度缓存和速率估算器的最大条目数
+    TASK_PROGRESS_LIMIT = 64
+    
+    # 状态快照格式版本（结构变化时递增，旧版本快照将被忽略）
+    SNAPSHOT_VERSION = 3
+    # 文件标识校验的文件头字节数
+    SNAPSHOT_HEAD_BYTES = 256
+
+    def _check_log_path(self):
+        """检查日志路径是否存在且有效"""
+        if not self.log_dir:
+            return False
+            
+        try:
+            # 检查路径存在性
+            if not self.log_dir.exists():
+                logging.warning(f"日志目录不存在: {self.log_dir}")
+                # 尝试创建目录
+                try:
+                    self.log_dir.mkdir(parents=True, exist_ok=True)
+                    logging.info(f"已创建日志目录: {self.log_dir}")
+                except (PermissionError, OSError) as e:
+                    logging.error(f"创建日志目录失败: {str(e)}")
+                    return False
+                except Exception as e:
+                    logging.error(f"创建日志目录时发生未知错误: {str(e)}")
+                    return False
+
+            # 检查是否是目录（不是文件）
+            if not self.log_dir.is_dir():
+                logging.warning(f"日志路径不是目录: {self.log_dir}")
+                return False
+                
+            # 检查目录可读性
+            if not os.access(str(self.log_dir), os.R_OK):
+                logging.warning(f"没有读取日志目录的权限: {self.log_dir}")
+                return False
+
+            return True
+
+        except PermissionError as e:
+            logging.error(f"权限错误: {str(e)}")
+            return False
+        except OSError as e:
+            logging.error(f"操作系统错误: {str(e)}")
+            return False
+        except Exception as e:
+            logging.error(f"检查日志路径时发生未知错误: {str(e)}")
+            return False
+
+    def _generate_log_patterns(self, date=None):
+        """生成所有可能的日志文件模式 - 支持带序号的文件"""
+        target_date = date or self.current_date
+        date_str = target_date.strftime('%Y%m%d')
+        
+        patterns = [
+            # 基础模式: better-genshin-impactYYYYMMDD.log
+            self.log_dir / f"{self.log_filename_prefix}{date_str}.log",
+            # 带序号模式: better-genshin-impactYYYYMMDD_00N.log
+            self.log_dir / f"{self.log_filename_prefix}{date_str}_*.log"
+        ]
+        
+        return patterns
+
+    def _find_active_log_file(self):
+        """查找当前活跃的日志文件 - 按 (日期, 轮换序号) 取最后一个
+
+        旧文件的延迟写入会改变修改时间的先后，因此按文件名中的顺序而不是修改时间选择
+        """
+        if not self.log_path_valid:
+            return None
+            
+        patterns = self._generate_log_patterns()
+        candidate_files = []
+        
+        # 收集所有匹配的日志文件
+        for pattern in patterns:
+            if '*' in str(pattern):
+                # 使用通配符匹配带序号的文件
+                candidate_files.extend(self.log_dir.glob(pattern.name))
+            else:
+                # 处理固定文件名
+                if pattern.exists():
+                    candidate_files.append(pattern)
+        
+        if not candidate_files:
+            return None
+        
+        # 文件名无法识别顺序的排在最前
+        return max(candidate_files, key=lambda f: self._log_file_order(f) or ("", -1))
+        
+    def get_current_file(self):
+        """当前读取的日志文件路径，没有日志文件时返回 None"""
+        return self._current_file
+
+    def _update_log_file(self):
+        """安全更新日志文件 - 处理日期切换和文件轮换"""
+        if not self.log_path_valid:
+            return
+            
+        new_file = self._find_active_log_file()
+        
+        # 已有正在读取的文件时，新文件出现且已写入内容后才切换；在此之前继续读取当前文件
+        # （跨天或轮换后 BetterGI 仍可能向旧文件写入剩余内容），也不替 BetterGI 创建新文件
+        if self._current_file is not None and new_file != self._current_file and not self._has_content(new_file):
+            new_file = self._current_file
+        
+        # 启动时没有找到日志文件，创建默认的
         if new_file is None:
             default_patterns = self._generate_log_patterns()
             new_file = default_patterns[0]
@@ -671,16 +2767,70 @@ class SmartLogReader:
                     self._current_file_mtime = current_mtime
             return
         
+        # 新文件是当前文件之后的日期或轮换文件时，视为同一日志流的延续：
+        # 先读完旧文件剩余的内容，再从新文件开头继续增量读取，保留任务状态和已显示的条目
+        if self._continues_stream(new_file):
+            self._drain_current_file()
+            logging.info(f"日志延续到新文件: {self._current_file.name} → {new_file.name}")
+            self._current_file = new_file
+            self._position = 0
+            if self._current_file.exists():
+                self._current_file_mtime = self._current_file.stat().st_mtime
+            return
+        
         # 切换到新文件，重置状态
         self._current_file = new_file
         self._position = 0
-        self._last_valid_content.clear()
+        self._needs_bootstrap = True
+        self._entries.clear()
+        self._entry_repeats.clear()
+        self.content_generation += 1
         
         if self._current_file.exists():
             self._current_file_mtime = self._current_file.stat().st_mtime
 
         logging.info(f"切换到日志文件: {new_file}")
 
+    @staticmethod
+    def _has_content(path):
+        """文件存在且已写入内容"""
+        try:
+            return path is not None and path.stat().st_size > 0
+        except OSError:
+            return False
+
+    @staticmethod
+    def _log_file_order(path):
+        """日志文件在日志流中的顺序 (日期, 轮换序号)，文件名无法识别时返回 None"""
+        match = re.search(r'(\d{8})(?:_(\d+))?\.log$', path.name)
+        return (match.group(1), int(match.group(2) or 0)) if match else None
+
+    def _continues_stream(self, new_file):
+        """新文件是否为当前文件的后续（之后日期的文件或之后的轮换文件），且当前文件已在增量读取"""
+        if self._current_file is None or self._needs_bootstrap:
+            return False
+        current_order = self._log_file_order(self._current_file)
+        new_order = self._log_file_order(new_file)
+        return current_order is not None and new_order is not None and new_order > current_order
+
+    def _drain_current_file(self):
+        """读取当前文件剩余的全部内容（切换到后续文件前调用，旧文件不会再写入，末尾没有换行的行也一并处理）"""
+        try:
+            remaining = self._current_file.stat().st_size - self._position
+            if remaining <= 0:
+                return
+            if remaining > self.MAX_INCREMENTAL_BYTES:
+                logging.info(f"旧日志文件剩余内容过多，不再读取: {self._current_file}")
+                return
+            with open(self._current_file, 'rb') as f:
+                f.seek(self._position)
+                data = f.read(remaining)
+        except OSError as e:
+            logging.error(f"读取旧日志文件剩余内容失败: {str(e)}")
+            return
+        self._position += len(data)
+        self._ingest_new_lines([line for line in data.decode('utf-8', 'ignore').splitlines() if line.strip()])
+
     def _detect_date_change(self):
         """精确检测日期变更 - 处理跨天的日志文件切换"""
         today = datetime.now().date()
@@ -691,36 +2841,12 @@ class SmartLogReader:
             return True
         return False
 
-    def _merge_log_lines(self, lines):
-        """合并跨行的日志条目 - 处理异常堆栈等多行日志"""
-        merged_lines = []
-        current_entry = None
-        
-        for line in lines:
-            # 检测是否是新的日志条目开头（以时间戳开头）
-            if self._is_log_start(line):
-                # 保存前一个条目
-                if current_entry is not None:
-                    merged_lines.append(current_entry)
-                # 开始新条目
-                current_entry = line
-            else:
-                # 追加到当前条目（异常信息等）
-                if current_entry is not None:
-                    current_entry += " " + line.strip()
-        
-        # 添加最后一个条目
-        if current_entry is not None:
-            merged_lines.append(current_entry)
-            
-        return merged_lines
-
     def _is_log_start(self, line):
         """检测行是否以时间戳开头 - 判断是否为新的日志条目"""
-        return bool(re.match(r'\[\d{2}:\d{2}:\d{2}\.\d{3}\]', line))
+        return LOG_START_PATTERN.match(line) is not None
 
     def _tail_lines(self, lines=50):
-        """高效获取文件尾部内容 - 优化大文件处理性能"""
+        """高效获取文件尾部内容 - 优化大文件处理性能，并记录读取结束位置供增量读取"""
         if not self.log_path_valid or not self._current_file or not self._current_file.exists():
             return None
 
@@ -738,124 +2864,478 @@ class SmartLogReader:
                     file_size -= read_size
                     f.seek(file_size)
                     block = f.read(read_size)
-                    decoded = block.decode('utf-8', 'ignore')
-                    
-                    # 过滤空行并统计
-                    non_empty_lines = [line for line in decoded.split('\n') if line.strip()]
-                    lines_found += len(non_empty_lines)
-                    data.append('\n'.join(non_empty_lines))
+                    lines_found += block.count(b'\n')
+                    data.append(block)
 
-                # 合并处理结果 - 保持原始顺序（旧在上，新在下）
-                text = ''.join(reversed(data)).splitlines()
+                # 合并后再解码，避免多字节字符被块边界截断
+                raw = b''.join(reversed(data))
+                
+                # 只处理完整行：末尾尚未写完的行留待下次增量读取
+                last_newline = raw.rfind(b'\n')
+                if last_newline < 0:
+                    self._position = file_size
+                    return []
+                self._position = file_size + last_newline + 1
+                raw = raw[:last_newline + 1]
+                
+                # 未从文件开头读取时，第一行可能不完整，丢弃
+                if file_size > 0:
+                    raw = raw[raw.find(b'\n') + 1:]
+
+                # 过滤空行 - 保持原始顺序（旧在上，新在下）
+                text = [line for line in raw.decode('utf-8', 'ignore').splitlines() if line.strip()]
                 return text[-lines:]  # 返回最后lines行
         except Exception as e:
             logging.error(f"文件读取错误: {str(e)}")
             return None
 
-    def _filter_debug_logs(self, lines):
-        """过滤调试日志 - 跳过包含[DBG]的行"""
-        if not self.skip_debug_log:
-            return lines
+    def _read_new_lines(self):
+        """增量读取 - 只读取上次位置之后新写入的完整行"""
+        if not self.log_path_valid or not self._current_file:
+            return []
+
+        try:
+            file_size = self._current_file.stat().st_size
+            if file_size == self._position:
+                return []  # 没有新内容
+            if file_size < self._position or file_size - self._position > self.MAX_INCREMENTAL_BYTES:
+                # 文件被截断重建，或积压过多：丢弃已有条目，重新从尾部读取
+                logging.info(f"日志文件大小异常变化，重新从尾部读取: {self._current_file}")
+                self._needs_bootstrap = True
+                self._entries.clear()
+                self._entry_repeats.clear()
+                self.content_generation += 1
+                return []
+
+            with open(self._current_file, 'rb') as f:
+                f.seek(self._position)
+                data = f.read(file_size - self._position)
+
+            # 只处理完整行，未写完的行留待下次读取
+            last_newline = data.rfind(b'\n')
+            if last_newline < 0:
+                return []
+            self._position += last_newline + 1
+            return [line for line in data[:last_newline + 1].decode('utf-8', 'ignore').splitlines() if line.strip()]
+        except OSError as e:
+            logging.error(f"增量读取日志失败: {str(e)}")
+            return []
+
+    def _ingest_line(self, line, live=True):
+        """处理一行日志 - 合并跨行条目并更新任务状态
+
+        live 为 False 表示打开文件时读取的历史尾部内容，只用于恢复状态，不计入指标
+        """
+        is_start = self._is_log_start(line)
+        if self._pending_error_ms is not None:
+            # BetterGI 的错误消息在级别行的下一行，取到消息后再记录错误事件
+            self._emit_event("error", "" if is_start else line.strip(), self._pending_error_ms)
+            self._pending_error_ms = None
+        
+        if is_start:
+            self._current_entry_time_ms = parse_log_time_ms(line)
+            self._advance_log_clock(self._current_entry_time_ms)
+            # 新的日志条目，跳过调试日志（如果启用）
+            self._skip_current_entry = self.skip_debug_log and '[DBG]' in line
+            self._entry_keyword_hits.clear()
+            if not self._skip_current_entry:
+                # 上一条目已完整（不会再有续行），与更早的相同条目合并
+                if self.collapse_repeats:
+                    self._collapse_last_entry()
+                self._entries.append(line)
+                self._entry_repeats.append(None)
+                self.content_generation += 1
+            if self._level_detectors or (live and (self.metrics is not None or self.event_sink is not None
+                                                   or self.level_rates is not None)):
+                match = self.log_format_pattern.match(line)
+                level = match.group(2) if match else None
+                if level in self._level_detectors:
+                    self._record_rate_event(self._level_detectors[level])
+                if live and self.level_rates is not None:
+                    self.level_rates.record(level, self._last_ingest_time)
+                if live and self.metrics is not None:
+                    self.metrics.record_entry(level, self._current_entry_time_ms)
+                if live and self.event_sink is not None and level == "ERR":
+                    if match.group(3):
+                        self._emit_event("error", match.group(3))
+                    else:
+                        self._pending_error_ms = self._event_time_ms()
+        elif not self._skip_current_entry and self._entries:
+            # 追加到当前条目（异常信息等）
+            self._entries[-1] += " " + line.strip()
+            self.content_generation += 1
+
+        # 关键字频率规则：只统计保留的条目，续行中的关键字计入所属条目，每个条目每条规则最多计一次
+        if not self._skip_current_entry:
+            for rule_index, (keyword, detector) in enumerate(self._keyword_detectors):
+                if keyword in line and rule_index not in self._entry_keyword_hits:
+                    self._entry_keyword_hits.add(rule_index)
+                    self._record_rate_event((detector,))
+        
+        # 关键字告警规则
+        if live and self.alert_engine is not None:
+            self.alert_engine.process_line(line, self._event_time_ms())
+
+        self._update_state_from_line(line, live)
+
+    # 日志条目开头 [HH:MM:SS.mmm] 时间戳的长度，比较消息时忽略
+    TIMESTAMP_LENGTH = 14
+
+    def _merge_repeat(self, repeat, last_entry, last_repeat):
+        """合并两条相同条目的重复信息 - 返回 (合计次数, 最后一次的时间)"""
+        count = repeat[0] if repeat else 1
+        if last_repeat:
+            return count + last_repeat[0], last_repeat[1]
+        return count + 1, last_entry[1:self.TIMESTAMP_LENGTH - 1]
+
+    def _collapse_last_entry(self):
+        """最后一条日志条目与前一条消息相同（只有时间戳不同）时合并，记录重复次数和最后时间"""
+        if len(self._entries) < 2:
+            return
+        if self._entries[-1][self.TIMESTAMP_LENGTH:] != self._entries[-2][self.TIMESTAMP_LENGTH:]:
+            return
+        last_entry = self._entries.pop()
+        last_repeat = self._entry_repeats.pop()
+        self._entry_repeats[-1] = self._merge_repeat(self._entry_repeats[-1], last_entry, last_repeat)
+
+    def _display_entries(self):
+        """构建显示用的日志条目 - 重复条目附加 “×次数 ~最后时间”
+
+        最后一条可能还会追加续行，暂不合并到状态中，只在显示时临时合并
+        """
+        entries = list(self._entries)
+        repeats = list(self._entry_repeats)
+        if (self.collapse_repeats and len(entries) >= 2
+                and entries[-1][self.TIMESTAMP_LENGTH:] == entries[-2][self.TIMESTAMP_LENGTH:]):
+            last_entry, last_repeat = entries.pop(), repeats.pop()
+            repeats[-1] = self._merge_repeat(repeats[-1], last_entry, last_repeat)
+        return [entry if repeat is None else f"{entry} ×{repeat[0]} ~{repeat[1][:8]}"
+                for entry, repeat in zip(entries, repeats)]
+
+    def _update_state_from_line(self, line, live=True):
+        """根据单行日志更新配置组、任务和进度状态"""
+        # 1. 更新配置组（只更新"加载"或"开始"的配置组）
+        if "配置组" in line and (config_match := self.config_pattern.search(line)):
+            if "加载" in line or "开始" in line:
+                if config_match.group(1) != self.current_config:
+                    self.current_config = config_match.group(1)
+                    self.status_generation += 1
+                    if live:
+                        self._emit_event("config_start", config_match.group(1))
+            elif live and "执行结束" in line:
+                self._emit_event("config_end", config_match.group(1))
+
+        # 2. 更新任务状态（任务和进度由匹配器一次识别）
+        new_task, progress = self.pattern_matcher.match_line(line)
+        if new_task is not None and new_task != self.current_task:
+            self._detect_task_switching(new_task)
+            if live and self.metrics is not None:
+                self.metrics.record_task_switch()
+            self.current_task = new_task
+            self.status_generation += 1
+            if live:
+                self._emit_event("task_start")
+
+        # 3. 更新进度信息，并送入速率估算器
+        progress = self._cache_task_progress(progress)
+        if progress:
+            previous_display = (self.current_progress, self.current_eta)
+            progress_type, self.current_progress, current, total = progress
+            self._record_progress_event(progress_type, current, total, self._current_entry_time_ms)
+            if (self.current_progress, self.current_eta) != previous_display:
+                self.status_generation += 1
+            if live and self.metrics is not None and current is not None:
+                self.metrics.record_progress(current, total)
+            if live:
+                self._emit_event("progress", self.current_progress)
+
+    def _event_time_ms(self):
+        """当前日志时间对应的时间戳（毫秒），尚未读到时间戳时使用当前时间"""
+        if self._log_clock_ms is None:
+            return int(time.time() * 1000)
+        return self._log_clock_epoch_ms + self._log_clock_ms
+
+    def _emit_event(self, kind, detail="", timestamp_ms=None):
+        """将事件发送到事件存储（未启用时不做任何处理）"""
+        if self.event_sink is None:
+            return
+        if timestamp_ms is None:
+            timestamp_ms = self._event_time_ms()
+        self.event_sink.record_event(timestamp_ms, kind, self.current_config, self.current_task, detail)
+
+    @property
+    def high_frequency_warning(self):
+        """是否有频率检测规则处于告警状态"""
+        return any(detector.active for detector in self.rate_detectors)
+
+    def _advance_log_clock(self, log_time_ms):
+        """将当天毫秒时间戳转换为单调递增的日志时间，并推进所有检测器"""
+        if log_time_ms is None:
+            return
+        if self._log_clock_ms is None:
+            self._log_clock_ms = log_time_ms
+            # 日志时间从当前日志文件所属日期的零点起算（本地时间）
+            file_date = self.current_date
+            if self._current_file is not None and (date_match := re.search(r'(\d{8})(?:_\d+)?\.log$', self._current_file.name)):
+                try:
+                    file_date = datetime.strptime(date_match.group(1), '%Y%m%d').date()
+                except ValueError:
+                    pass
+            self._log_clock_epoch_ms = int(datetime.combine(file_date, datetime.min.time()).timestamp() * 1000)
+        else:
+            day_offset = self._log_clock_ms - self._log_clock_ms % 86400000
+            clock = day_offset + log_time_ms
+            if clock < self._log_clock_ms - 43200000:
+                clock += 86400000  # 时间戳回退超过12小时，视为跨越午夜
+            if clock > self._log_clock_ms:
+                self._log_clock_ms = clock
+        for detector in self.rate_detectors:
+            detector.advance(self._log_clock_ms)
+
+    def _record_rate_event(self, detectors):
+        """在当前日志时间记录一次事件"""
+        if self._log_clock_ms is None:
+            return
+        for detector in detectors:
+            detector.add(self._log_clock_ms)
+
+    def _detect_task_switching(self, new_task):
+        """检测任务切换频率 - 每次任务切换按日志时间计入滑动窗口，识别异常高频切换"""
+        if new_task != self.current_task:
+            self._record_rate_event(self._switch_detectors)
+
+    def _format_log_line(self, line):
+        """格式化日志行 - 移除类名部分，简化显示"""
+        return LogLayoutEngine.format_line(line)
+
+    def format_entry(self, entry):
+        """格式化单条日志条目（供搜索结果等外部显示使用）"""
+        return self._format_log_line(entry)
+
+    def _cache_task_progress(self, progress):
+        """缓存匹配器识别出的进度 - 返回 (进度类型, 显示文本, 当前值, 总数)，无进度时返回 None"""
+        if progress is None:
+            return None
+        progress_type, text, current, total, task_name = progress
+        if task_name is not None:
+            # 缓存这个任务的进度信息（限制条目数，避免长时间运行时无限增长）
+            self.task_progress[task_name] = text
+            self.task_progress.move_to_end(task_name)
+            if len(self.task_progress) > self.TASK_PROGRESS_LIMIT:
+                self.task_progress.popitem(last=False)
+        return progress_type, text, current, total
+
+    def _extract_progress_info(self, line):
+        """从日志行中提取进度信息 - 支持多种进度格式"""
+        progress = self._cache_task_progress(self.pattern_matcher.match_line(line)[1])
+        return progress[1] if progress else None
+
+    def _record_progress_event(self, progress_type, current, total, log_time_ms):
+        """将数值进度事件送入对应任务的速率估算器，并更新预计剩余时间"""
+        self.current_eta = None
+        if current is None or log_time_ms is None:
+            return
+        
+        # 配置组级别的进度（第N个脚本）按配置组估算，其余按当前任务估算
+        scope = self.current_config if progress_type == "任务开始进度" else self.current_task
+        key = (progress_type, scope)
+        estimator = self._progress_estimators.get(key)
+        if estimator is None:
+            estimator = ProgressRateEstimator()
+            self._progress_estimators[key] = estimator
+            if len(self._progress_estimators) > self.TASK_PROGRESS_LIMIT:
+                self._progress_estimators.popitem(last=False)
+        else:
+            self._progress_estimators.move_to_end(key)
+        
+        estimator.update(current, total, log_time_ms)
+        self.current_eta = estimator.eta_seconds()
+
+    def get_progress_display(self):
+        """获取任务行中的进度显示文本（可估算时附带 ETA mm:ss）"""
+        if self.current_eta is None:
+            return self.current_progress
+        minutes, seconds = divmod(int(round(self.current_eta)), 60)
+        return f"{self.current_progress} ETA {minutes:02d}:{seconds:02d}"
+
+    @property
+    def warning_generation(self):
+        """警告状态版本号 - 各频率检测器版本号之和"""
+        return sum(detector.version for detector in self.rate_detectors)
+
+    def get_generations(self):
+        """获取 (日志内容, 状态, 警告, 速率状态行) 版本号"""
+        return self.content_generation, self.status_generation, self.warning_generation, self.rate_generation
+
+    def is_error_content(self, content):
+        """判断内容是否为日志路径错误提示"""
+        return bool(content) and "日志路径配置错误" in content[0]
+
+    def get_status_lines(self, rate_warning=None):
+        """构建状态行 - 高频警告行（可选）+ 日志速率行（可选）+ 配置组行 + 任务行，供各前端共用
+
+        rate_warning: 是否显示高频警告行，未指定时按日志时间的检测结果；
+        日志停止更新时日志时间不再前进，前端可按实际时间自行决定不再显示
+        """
+        status_lines = [
+            f"[当前配置组] {self.current_config}",
+            f"[当前任务] [{self.get_progress_display()}] {self.current_task}"
+        ]
+        if self.rate_line is not None:
+            status_lines.insert(0, self.rate_line)
+        
+        # 添加高频警告状态行（多个规则告警时合并为一行）
+        if rate_warning is None:
+            rate_warning = self.high_frequency_warning
+        if rate_warning:
+            warnings = " | ".join(d.describe() for d in self.rate_detectors if d.active)
+            status_lines.insert(0, f"⚠️ {warnings} ⚠️")
+        
+        return status_lines
+
+    def get_state(self):
+        """获取读取器当前状态 - 供状态服务等外部消费者使用"""
+        return {
+            "config_group": self.current_config,
+            "task": self.current_task,
+            "progress": self.current_progress,
+            "eta_seconds": None if self.current_eta is None else round(self.current_eta),
+            "high_frequency_warning": self.high_frequency_warning,
+            "recent_entries": [self._format_log_line(line) for line in self._recent_entries]
+        }
+
+    def _file_identity(self, path, head_length):
+        """计算文件标识 - inode 加文件头摘要，用于确认快照对应的仍是同一个文件"""
+        with open(path, 'rb') as f:
+            head = f.read(head_length)
+        return {
+            "inode": path.stat().st_ino,
+            "head_length": len(head),
+            "head_sha1": hashlib.sha1(head).hexdigest()
+        }
+
+    def export_snapshot(self):
+        """导出读取状态快照（文件标识、读取偏移、日志条目和任务状态），无法导出时返回 None"""
+        if not self.log_path_valid or self._current_file is None or self._needs_bootstrap:
+            return None
+        try:
+            identity = self._file_identity(self._current_file, min(self._position, self.SNAPSHOT_HEAD_BYTES))
+        except OSError as e:
+            logging.debug(f"计算日志文件标识失败: {str(e)}")
+            return None
+        return {
+            "version": self.SNAPSHOT_VERSION,
+            "file": str(self._current_file),
+            "identity": identity,
+            "position": self._position,
+            "entries": list(self._entries),
+            "entry_repeats": list(self._entry_repeats),
+            "skip_current_entry": self._skip_current_entry,
+            "current_config": self.current_config,
+            "current_task": self.current_task,
+            "current_progress": self.current_progress,
+            "task_progress": list(self.task_progress.items()),
+            "log_clock_ms": self._log_clock_ms,
+            "log_clock_epoch_ms": self._log_clock_epoch_ms,
+            "current_entry_time_ms": self._current_entry_time_ms
+        }
+
+    def restore_snapshot(self, snapshot):
+        """从快照恢复读取状态 - 文件标识一致时从记录的偏移继续增量读取，返回是否恢复成功"""
+        if not snapshot or snapshot.get("version") != self.SNAPSHOT_VERSION or not self.log_path_valid:
+            return False
+        try:
+            # 快照必须对应当前活跃的日志文件，且文件未被截断或替换
+            if self._current_file is None or str(self._current_file) != snapshot["file"]:
+                return False
+            position = int(snapshot["position"])
+            if self._current_file.stat().st_size < position:
+                return False
+            identity = snapshot["identity"]
+            if self._file_identity(self._current_file, identity["head_length"]) != identity:
+                return False
             
-        filtered_lines = []
-        for line in lines:
-            # 跳过包含[DBG]的调试日志行
-            if '[DBG]' not in line:
-                filtered_lines.append(line)
+            entries = list(snapshot["entries"])
+            entry_repeats = [tuple(repeat) if repeat else None for repeat in snapshot["entry_repeats"]]
+            if len(entry_repeats) != len(entries):
+                raise ValueError("重复信息与日志条目数量不一致")
+            task_progress = OrderedDict((str(k), str(v)) for k, v in snapshot["task_progress"])
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logging.warning(f"状态快照无效，改为从日志尾部读取: {str(e)}")
+            return False
+        
+        self._position = position
+        self._needs_bootstrap = False
+        self._entries.clear()
+        self._entries.extend(entries)
+        self._entry_repeats.clear()
+        self._entry_repeats.extend(entry_repeats)
+        self._skip_current_entry = bool(snapshot.get("skip_current_entry", True))
+        self.current_config = snapshot.get("current_config", self.current_config)
+        self.current_task = snapshot.get("current_task", self.current_task)
+        self.current_progress = snapshot.get("current_progress", self.current_progress)
+        while len(task_progress) > self.TASK_PROGRESS_LIMIT:
+            task_progress.popitem(last=False)
+        self.task_progress = task_progress
+        self._log_clock_ms = snapshot.get("log_clock_ms")
+        self._log_clock_epoch_ms = snapshot.get("log_clock_epoch_ms", 0)
+        self._current_entry_time_ms = snapshot.get("current_entry_time_ms")
+        self.content_generation += 1
+        self.status_generation += 1
+        logging.info(f"从状态快照恢复，继续读取 {self._current_file} 偏移 {position}")
         
-        return filtered_lines
+        # 程序关闭期间写入的内容是历史日志：只用于恢复状态，不触发告警、不计入指标和事件
+        for line in self._read_new_lines():
+            self._ingest_line(line, live=False)
+        return True
 
-    def _detect_task_switching(self, new_task):
-        """检测任务切换频率 - 识别异常高频切换"""
-        now = time.time()
+    def refresh(self):
+        """读取新日志并更新状态（不做格式化，可在后台线程中调用）"""
+        if not self.log_path_valid:
+            return
         
-        # 记录任务切换时间
-        if new_task != self.current_task:
-            self.task_switch_times.append(now)
-            
-            # 清理超过1分钟的记录
-            while self.task_switch_times and (now - self.task_switch_times[0] > 60):
-                self.task_switch_times.popleft()
-            
-            # 检查1分钟内是否超过5次切换
-            if len(self.task_switch_times) >= 5:
-                if not self.high_frequency_warning:
-                    self.high_frequency_warning = True
-                    self.high_frequency_start = now
-                    logging.warning("任务切换过于频繁！")
-            else:
-                self.high_frequency_warning = False
-                
-        # 检查高频状态是否已结束（超过1分钟无新警告）
-        if self.high_frequency_warning and (now - self.high_frequency_start > 60):
-            self.high_frequency_warning = False
-            logging.info("高频任务切换状态结束")
-            
-    def _format_log_line(self, line):
-        """格式化日志行 - 移除类名部分，简化显示"""
-        match = self.log_format_pattern.match(line)
-        if match:
-            timestamp = match.group(1)
-            log_level = match.group(2)
-            message = match.group(3) or ""  # 确保消息不为None
-            
-            # 特殊处理配置组信息 - 保持完整显示
-            if "配置组" in message:
-                return f"{timestamp[:-5]} {log_level}] {message}"
-            
-            # 完全移除类名部分 - 简化显示
-            return f"{timestamp[:-5]} {log_level}] {message}"
-        return line  # 如果无法匹配，返回原始行
+        # 检查日期变更和文件更新
+        self._detect_date_change()
+        self._update_log_file()
 
-    def _extract_progress_info(self, line):
-        """从日志行中提取进度信息 - 支持多种进度格式"""
-        for progress_type, pattern in self.progress_patterns.items():
-            match = pattern.search(line)
-            if match:
-                groups = match.groups()
-                try:
-                    if progress_type == "任务开始进度" and len(groups) >= 3:
-                        current, total, task_name = groups[:3]
-                        # 缓存这个任务的进度信息
-                        self.task_progress[task_name] = f"{current}/{total}"
-                        return f"{current}/{total}"
-                    elif progress_type == "当前进度" and len(groups) >= 2:
-                        current, total = groups[:2]
-                        return f"{current}/{total}"
-                    elif progress_type == "组任务进度" and len(groups) >= 4:
-                        group_num, current, total, task_name = groups[:4]
-                        return f"{current}/{total}"
-                    # 新增：产出进度格式
-                    elif progress_type == "产出进度" and len(groups) >= 1:
-                        progress_str = groups[0]
-                        return f"{progress_str}个"  # 添加單位
-                    # 新增：运行时间进度格式
-                    elif progress_type == "运行时间进度" and len(groups) >= 2:
-                        # 礦JS本體做好日志秒數顯示轉換的話
-                        # current_time, total_time = groups[:2]
-                        # return f"{current_time}/{total_time}分钟"  # 添加單位
-
-                        current_time, total_time = groups[:2]
-                        # 將小數分鐘轉換為分鐘:秒格式（秒數四捨五入）
-                        try:
-                            current_minutes = float(current_time)
-                            minutes = int(current_minutes)
-                            seconds = round((current_minutes - minutes) * 60)  # 四捨五入到整數秒
-                            
-                            # 處理四捨五入後可能出現60秒的情況
-                            if seconds == 60:
-                                minutes += 1
-                                seconds = 0
-                                
-                            # 格式化為 分鐘.秒 (秒數顯示兩位數)
-                            formatted_time = f"{minutes}.{seconds:02d}"
-                            return f"{formatted_time}/{total_time}分钟"
-                        except (ValueError, TypeError):
-                            # 如果轉換失敗，返回原始格式
-                            return f"{current_time}/{total_time}分钟"
-                except (ValueError, IndexError) as e:
-                    logging.warning(f"进度信息解析失败: {line}, 错误: {e}")
-        return None
+        # 增量读取新日志行并逐行处理（新打开文件、文件被截断或积压过多时从尾部读取历史内容）
+        if not self._needs_bootstrap:
+            self._ingest_new_lines(self._read_new_lines())
+        if self._needs_bootstrap:
+            self._needs_bootstrap = False
+            self._skip_current_entry = True
+            for line in self._tail_lines(self.read_lines) or []:
+                self._ingest_line(line, live=False)
+
+        self._update_rate_line()
+
+    def _update_rate_line(self):
+        """按当前时间推进速率计数器并更新速率状态行，文本变化时递增版本号"""
+        if self.level_rates is None:
+            return
+        now = time.time()
+        self.level_rates.advance(now)
+        rates = "  ".join(f"{level} {count}/分" for level, count in self.level_rates.per_minute())
+        idle_seconds = max(int(now - self._last_ingest_time), 0)
+        if idle_seconds < 60:
+            idle = f"{idle_seconds}秒前"
+        elif idle_seconds < 3600:
+            idle = f"{idle_seconds // 60}分{idle_seconds % 60:02d}秒前"
+        else:
+            idle = f"{idle_seconds // 3600}小时{idle_seconds % 3600 // 60:02d}分前"
+        rate_line = f"[日志速率] {rates}  最后日志 {idle}"
+        if rate_line != self.rate_line:
+            self.rate_line = rate_line
+            self.rate_generation += 1
+
+    def _ingest_new_lines(self, new_lines):
+        """逐行处理增量读取到的新日志并计入指标"""
+        if new_lines:
+            self._last_ingest_time = time.time()
+            if self.metrics is not None:
+                self.metrics.record_lines(len(new_lines))
+        for line in new_lines:
+            self._ingest_line(line)
 
     def get_content(self):
         """安全获取日志内容 - 主入口方法"""
@@ -866,22 +3346,13 @@ class SmartLogReader:
                     "3. 取消注释并设置正确的路径", "4. 保存配置文件后重启程序", "",
                     "详细说明请查看 README.md", "", "按 Alt+P 关闭程序"]
         
-        # 检查日期变更和文件更新
-        self._detect_date_change()
-        self._update_log_file()
-        
-        # 获取日志内容，失败时使用缓存
-        full_content = self._tail_lines(self.read_lines) or list(self._last_valid_content)
-
-        # 合并跨行日志条目
-        merged_content = self._merge_log_lines(full_content)
+        self.refresh()
 
-        # 过滤调试日志（如果启用）
-        if self.skip_debug_log:
-            merged_content = self._filter_debug_logs(merged_content)
+        # 日志内容未变化时直接返回已格式化的内容
+        if self._formatted_generation == self.content_generation:
+            return self._formatted_content
 
-        # 二次过滤确保无空行
-        filtered_content = [line for line in merged_content if line.strip()]
+        filtered_content = self._display_entries()
 
         # 处理文件空内容情况 & 处理全空情况
         if not filtered_content:
@@ -890,78 +3361,46 @@ class SmartLogReader:
             else:
                 filtered_content = ["-- 日志内容为空 --"]
 
-        # 保存当前任务状态用于切换检测
-        previous_task = self.current_task
-
-        # 使用临时变量存储最新状态
-        latest_config = self.current_config
-        latest_task = self.current_task
-        latest_progress = self.current_progress
-
-        # 逆向搜索任务信息 - 从最新日志开始搜索（使用完整的50行內容進行分析）
-        for line in reversed(full_content):
-            # 1. 更新配置（使用完整的50行內容進行分析）
-            if config_match := self.config_pattern.search(line):
-                config_name = config_match.group(1)
-                # 只更新"加载"或"开始"的配置组
-                if "加载" in line or "开始" in line:
-                    latest_config = config_name
-            # 2. 更新任务状态（取最新遇到的）
-            for task_type, pattern in self.task_patterns.items():
-                if match := pattern.search(line):
-                    task_name = match.group(1).strip()
-                    
-                    # 特殊处理：提取纯文件名（不含路径和扩展名）
-                    if '/' in task_name or '\\' in task_name:
-                        # 提取文件名（含扩展名）
-                        base_name = os.path.basename(task_name)
-                        # 移除扩展名，获取纯文件名
-                        task_name = os.path.splitext(base_name)[0]
-                    elif '.' in task_name:
-                        # 如果只有文件名但包含扩展名，也移除扩展名
-                        task_name = os.path.splitext(task_name)[0]
-                    
-                    latest_task = f"{task_type}: {task_name}"
-                    break  # 一行通常只匹配一个任务类型
-
-            # 3. 更新进度信息（取最新遇到的）
-            progress_info = self._extract_progress_info(line)
-            if progress_info:
-                latest_progress = progress_info
-
-        # 最终更新状态
-        self.current_config = latest_config
-        self.current_task = latest_task
-        self.current_progress = latest_progress
-
-        # 检测任务切换频率
-        self._detect_task_switching(previous_task)
-
         # 格式化日志行（只對要顯示的內容進行格式化）
         display_content = filtered_content[-self.display_lines:] if len(filtered_content) > self.display_lines else filtered_content
+        self._recent_entries = display_content
         
-        # 新增：如果启用自动换行，处理换行
-        if self.auto_wrap:
-            formatted_content = []
-            for line in display_content:
-                formatted_line = self._format_log_line(line)
-                wrapped_lines = self._wrap_text_line(formatted_line)
-                formatted_content.extend(wrapped_lines)
-
-            # 重要：换行后可能行数超过 display_lines，需要再次限制
-            if len(formatted_content) > self.display_lines:
-                formatted_content = formatted_content[-self.display_lines:]
-        else:
-            formatted_content = [self._format_log_line(line) for line in display_content]
+        # 格式化并换行（布局引擎不依赖 tkinter，宽度由字形度量提供器查表计算）
+        formatted_content, self._formatted_levels, self._formatted_alert_rules = \
+            self._get_layout_engine().layout_levels(display_content)
 
-        # 更新缓存为格式化后的内容
-        if formatted_content:
-            self._last_valid_content = deque(formatted_content, maxlen=100)
+        self._formatted_generation = self.content_generation
+        self._formatted_content = formatted_content
         return formatted_content
 
+    def get_content_levels(self):
+        """最近一次 get_content 返回的各显示行的日志级别（无法识别时为 None），与内容一一对应"""
+        return self._formatted_levels
+
+    def get_content_alert_rules(self):
+        """最近一次 get_content 返回的各显示行的告警高亮规则编号（不高亮时为 None），与内容一一对应"""
+        return self._formatted_alert_rules
+
+    def _font_key(self):
+        """字体标识（字体名|字号|粗细），用于确认度量文件对应的是当前字体"""
+        font_config = self.font_config or {}
+        return (f"{font_config.get('font_name', 'Consolas')}|{font_config.get('font_size', 11)}|"
+                f"{font_config.get('font_weight', 'normal')}")
+
     def _get_font(self):
-        """获取字体对象用于宽度测量"""
+        """获取字形度量提供器用于宽度测量 - 外部测量器 > 度量文件 > Tk 字体（每个字符只测量一次）"""
+        # 优先使用外部测量器（如终端单元格宽度）
+        if self.measurer is not None:
+            return self.measurer
+        
         if self._font_cache is None and self.font_config:
+            if self.glyph_metrics_file:
+                try:
+                    self._font_cache = FileGlyphWidthTable.load(self.glyph_metrics_file, self._font_key())
+                    logging.info(f"已加载字形度量文件: {self.glyph_metrics_file}")
+                    return self._font_cache
+                except (OSError, ValueError) as e:
+                    logging.info(f"未使用字形度量文件，改为测量字体: {str(e)}")
             try:
                 import tkinter.font as tkfont
                 # 根据字体配置创建字体对象
@@ -969,7 +3408,7 @@ class SmartLogReader:
                 font_size = self.font_config.get("font_size", 11)
                 font_weight = self.font_config.get("font_weight", "normal")
                 
-                self._font_cache = tkfont.Font(
+                font = tkfont.Font(
                     family=font_name,
                     size=font_size,
                     weight=font_weight
@@ -977,159 +3416,430 @@ class SmartLogReader:
             except Exception as e:
                 logging.warning(f"创建字体对象失败: {str(e)}，使用默认字体")
                 # 回退到默认字体
-                self._font_cache = tkfont.Font(family="Consolas", size=11, weight="normal")
+                font = tkfont.Font(family="Consolas", size=11, weight="normal")
+            self._font_cache = GlyphWidthTable(font)
         
         return self._font_cache
+
+    def _get_layout_engine(self):
+        """获取布局引擎（首次换行时创建，只在启用自动换行时才需要字形度量）"""
+        if self._layout_engine is None:
+            metrics = self._get_font() if self.auto_wrap else None
+            highlighter = self.alert_engine.highlight_rule if self.alert_engine is not None else None
+            self._layout_engine = LogLayoutEngine(metrics, self.max_width, self.display_lines, self.auto_wrap, highlighter)
+        return self._layout_engine
+
+    def save_glyph_metrics(self):
+        """将本次测量的字形宽度保存到度量文件（只在配置了度量文件且使用 Tk 字体测量时）"""
+        if (self.glyph_metrics_file and type(self._font_cache) is GlyphWidthTable):
+            self._font_cache.save(self.glyph_metrics_file, self._font_key())
+
+
+# 日志起始行中只索引级别和消息，时间戳和类名对搜索无意义且占大部分字符
+SEARCH_HEADER_PATTERN = re.compile(r'^\[[\d:.]+\]\s+(\[\w+\])\s+[\w.]*\s*(.*)$')
+
+
+def _sorted_contains(sorted_array, value):
+    """在升序数组中二分查找 value 是否存在"""
+    i = bisect_left(sorted_array, value)
+    return i < len(sorted_array) and sorted_array[i] == value
+
+
+class LogSearchIndex:
+    """当天日志全文索引 - 按条目块建立字符二元组倒排索引，在后台线程中增量维护
+
+    索引覆盖当天的日志文件及其 _00N 轮换文件，只保存条目所在文件和起始字节偏移，
+    结果文本在翻页时再从磁盘读取。倒排表只记录包含二元组的条目块编号（每块 BLOCK_ENTRIES 条），
+    出现在大多数块中的常见二元组不再记录（无法缩小候选范围），查询时读取候选块中的条目再校验。
+    内存占用为每条日志约 10 字节（文件编号和偏移）加上倒排表，实测约为日志大小的 10%～15%
+    """
     
-    def _wrap_text_line(self, line):
-        """对单行文本进行换行处理"""
-        if not self.auto_wrap or not line.strip():
-            return [line]
-            
-        font = self._get_font()
-        if not font:
-            return [line]  # 无法获取字体时返回原行
-            
-        try:
-             # 计算缩进宽度（两个全角空格）
-            indent = "　　"
-            indent_width = font.measure(indent)
-            # 计算可用宽度（减去边距）
-            available_width = self.max_width - indent_width - 2# 8像素边距
-            
-            # 如果整行宽度不超过可用宽度，直接返回
-            if font.measure(line) <= available_width:
-                return [line]
-                
-            # 需要换行处理
-            wrapped_lines = []
-            current_line = ""
-            is_first_line = True
-            
-            # 按单词分割（优先在空格处换行）
-            words = line.split(' ')
-            
-            for word in words:
-                if not word:  # 跳过空单词
-                    continue
-                    
-                # 测试添加单词后的宽度
-                test_line = current_line + " " + word if current_line else word
-                if font.measure(test_line) <= available_width:
-                    current_line = test_line
-                else:
-                    # 当前行已满，开始新行
-                    if current_line:
-                        if is_first_line:
-                            wrapped_lines.append(current_line)
-                            is_first_line = False
-                        else:
-                            wrapped_lines.append(indent + current_line)
-                    
-                    # 如果单个单词就超宽，需要强制分割
-                    if font.measure(word) > available_width:
-                        # 对超长单词进行字符级分割
-                        self._wrap_long_word(word, wrapped_lines, font, available_width, indent, is_first_line)
-                        current_line = ""
-                        is_first_line = False
-                    else:
-                        current_line = word
-                        
-             # 添加最后一行
-            if current_line:
-                if is_first_line:
-                    wrapped_lines.append(current_line)
+    BLOCK_ENTRIES = 16        # 每个倒排块包含的条目数
+    DENSE_MIN_BLOCKS = 256    # 二元组出现在超过一半的块中且达到该块数时，视为常见二元组不再记录
+    DENSE = ()                # 常见二元组在倒排表中的标记
+    CHUNK_BYTES = 256 * 1024  # 每次加锁索引的字节数（避免长时间阻塞查询）
+    UPDATE_INTERVAL = 2.0     # 未收到新日志通知时检查文件变化的间隔（秒）
+    MAX_ENTRY_LINES = 20      # 读取单条结果时最多读取的行数
+    SCAN_BATCH = 5000         # 翻页时每次加锁最多检查的候选条目数
+    
+    def __init__(self, log_dir, log_filename_prefix, profiler=None):
+        """profiler: 可选的 RuntimeProfiler，分析期间后台索引工作计入分析结果"""
+        self.log_dir = Path(log_dir)
+        self.log_filename_prefix = log_filename_prefix
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._epoch = 0  # 索引重建次数，结果游标据此判断是否失效
+        self._reset(datetime.now().date())
+    
+    def _reset(self, date):
+        """清空索引（日期变化或文件被截断时重新建立）"""
+        self.date = date
+        self.ready = False  # 是否已完成首次全量索引
+        self.indexed_bytes = 0
+        self._files = []            # 已发现的日志文件（按发现顺序编号）
+        self._file_positions = []   # 各文件已索引到的字节偏移
+        self._file_last_entry = []  # 各文件最后一个条目的编号（-1 表示还没有条目）
+        self._entry_file = array('H')    # 条目编号 -> 文件编号
+        self._entry_offset = array('Q')  # 条目编号 -> 起始字节偏移
+        self._postings = {}  # 二元组 -> 包含该二元组的条目块编号（升序）
+        self._epoch += 1
+
+    def start(self):
+        """启动后台索引线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止后台索引线程"""
+        self._running = False
+        self._wake.set()
+    
+    def notify(self):
+        """通知有新日志写入，后台线程立即增量更新"""
+        self._wake.set()
+    
+    def _run(self):
+        """后台循环：增量索引新写入的内容"""
+        while self._running:
+            try:
+                self._update()
+            except Exception as e:
+                logging.error(f"更新搜索索引失败: {str(e)}")
+            self._wake.wait(self.UPDATE_INTERVAL)
+            self._wake.clear()
+    
+    def _discover_files(self):
+        """列出当天的日志文件 - 基础文件在前，轮换文件按序号排列"""
+        date_str = self.date.strftime('%Y%m%d')
+        base_file = self.log_dir / f"{self.log_filename_prefix}{date_str}.log"
+        files = [base_file] if base_file.exists() else []
+        files.extend(sorted(self.log_dir.glob(f"{self.log_filename_prefix}{date_str}_*.log")))
+        return files
+    
+    def _update(self):
+        """发现新文件并索引各文件新增的内容"""
+        today = datetime.now().date()
+        if today != self.date:
+            with self._lock:
+                self._reset(today)
+        
+        for path in self._discover_files():
+            if path not in self._files:
+                with self._lock:
+                    self._files.append(path)
+                    self._file_positions.append(0)
+                    self._file_last_entry.append(-1)
+        
+        for file_index, path in enumerate(self._files):
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            if size < self._file_positions[file_index]:
+                # 文件被截断或替换，已有偏移失效，整体重建
+                logging.info(f"日志文件被截断，重建搜索索引: {path}")
+                with self._lock:
+                    self._reset(self.date)
+                return
+            while self._running and self._file_positions[file_index] < size:
+                if self.profiler is not None:
+                    progressed = self.profiler.run_background(self._index_chunk, file_index, path)
                 else:
-                    wrapped_lines.append(indent + current_line)
-                
-            return wrapped_lines if wrapped_lines else [line]
-            
-        except Exception as e:
-            logging.warning(f"换行处理失败: {str(e)}，返回原始行")
-            return [line]
+                    progressed = self._index_chunk(file_index, path)
+                if not progressed:
+                    break
+        self.ready = True
     
-    def _wrap_long_word(self, word, wrapped_lines, font, available_width, indent, is_first_line):
-        """处理超长单词的字符级分割"""
-        current_chunk = ""
-        for char in word:
-            test_chunk = current_chunk + char
-            if font.measure(test_chunk) <= available_width:
-                current_chunk = test_chunk
-            else:
-                if current_chunk:
-                    if is_first_line:
-                        wrapped_lines.append(current_chunk)
-                        is_first_line = False
-                    else:
-                        wrapped_lines.append(indent + current_chunk)
-                current_chunk = char
-                
-        if current_chunk:
-            if is_first_line:
-                wrapped_lines.append(current_chunk)
+    def _index_chunk(self, file_index, path):
+        """索引文件中的下一块完整行，返回是否有进展"""
+        position = self._file_positions[file_index]
+        try:
+            with open(path, 'rb') as f:
+                f.seek(position)
+                data = f.read(self.CHUNK_BYTES)
+        except OSError as e:
+            logging.debug(f"读取日志文件失败: {str(e)}")
+            return False
+        
+        # 只索引完整的行，最后一行可能尚未写完
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            if len(data) < self.CHUNK_BYTES:
+                return False
+            end = len(data)  # 超长的单行，直接按块索引
+        
+        with self._lock:
+            offset = position
+            for raw_line in data[:end].splitlines(keepends=True):
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+                entry_id = self._file_last_entry[file_index]
+                is_start = LOG_START_PATTERN.match(line) is not None
+                if entry_id < 0 or is_start:
+                    # 新的日志条目（文件开头没有时间戳的内容也单独作为一条）
+                    entry_id = len(self._entry_offset)
+                    self._entry_file.append(file_index)
+                    self._entry_offset.append(offset)
+                    self._file_last_entry[file_index] = entry_id
+                    if is_start and (header := SEARCH_HEADER_PATTERN.match(line)):
+                        line = f"{header.group(1)} {header.group(2)}"
+                self._add_postings(entry_id, line.casefold())
+                offset += len(raw_line)
+            self._file_positions[file_index] = position + end
+            self.indexed_bytes += end
+        return True
+    
+    def _add_postings(self, entry_id, text):
+        """将一行文本中的二元组加入倒排表（记录条目所在的块）"""
+        postings = self._postings
+        block = entry_id // self.BLOCK_ENTRIES
+        for gram in set(map(operator.add, text, text[1:])):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = array('I', (block,))
+            elif posting is self.DENSE or posting[-1] == block:
+                continue
+            elif posting[-1] < block:
+                posting.append(block)
+                if len(posting) >= self.DENSE_MIN_BLOCKS and len(posting) * 2 > block:
+                    postings[gram] = self.DENSE
+            elif not _sorted_contains(posting, block):
+                # 较早文件的跨行内容晚于其他文件写入，按顺序插入
+                posting.insert(bisect_left(posting, block), block)
+    
+    def search(self, query):
+        """查询包含 query 的日志条目（不区分大小写），返回按时间倒序逐页读取的结果游标"""
+        needle = query.strip().casefold()
+        if len(needle) < 2:
+            raise ValueError("请至少输入2个字符")
+        grams = {needle[i:i + 2] for i in range(len(needle) - 1)}
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in grams]
+            if any(posting is None for posting in postings):
+                postings = []
             else:
-                wrapped_lines.append(indent + current_chunk)
+                postings = sorted((posting for posting in postings if posting is not self.DENSE), key=len)
+                if postings:
+                    # 复制最短的倒排表作为扫描顺序，其余倒排表用于二分校验
+                    postings[0] = array('I', postings[0])
+                elif self._entry_offset:
+                    # 全部是常见二元组：逐块扫描所有条目
+                    postings = [range((len(self._entry_offset) - 1) // self.BLOCK_ENTRIES + 1)]
+            return LogSearchResult(self, needle, postings, self._epoch)
+    
+    def _read_matches(self, locations, needle, files):
+        """从磁盘读取日志条目（起始行加后续跨行内容，合并方式与读取器一致），返回包含 needle（已 casefold）的条目
+
+        与建立索引时一致，时间戳和类名不参与匹配；
+        locations 为 [(文件, 起始偏移)]，同一文件中相邻的条目一次读取后按偏移切分；
+        files 为调用方持有的 {文件: 已打开的文件对象}，连续读取多个块时复用；
+        needle 不含空格时不会跨越合并续行时加入的空格，整段内容不包含 needle 时直接跳过，不再逐条合并
+        """
+        matches = []
+        whole_check = ' ' not in needle
+        start = 0
+        while start < len(locations):
+            path = locations[start][0]
+            end = start + 1
+            while end < len(locations) and locations[end][0] is path and locations[end][1] > locations[end - 1][1]:
+                end += 1
+            offsets = [offset for _, offset in locations[start:end]]
+            start = end
+            try:
+                f = files.get(path)
+                if f is None:
+                    f = files[path] = open(path, 'rb')
+                f.seek(offsets[0])
+                data = f.read(offsets[-1] - offsets[0])
+                # 最后一条读取到下一个条目开头为止
+                last_lines = [f.readline()]
+                for _ in range(self.MAX_ENTRY_LINES - 1):
+                    raw_line = f.readline()
+                    if not raw_line.endswith(b'\n') or LOG_START_PATTERN.match(raw_line[:16].decode('ascii', errors='replace')):
+                        break
+                    last_lines.append(raw_line)
+            except OSError as e:
+                logging.debug(f"读取搜索结果失败: {str(e)}")
+                continue
+            data += b''.join(last_lines)
+            if whole_check and needle not in data.decode('utf-8', errors='replace').casefold():
+                continue
             
+            offsets.append(offsets[0] + len(data))
+            for entry_start, entry_end in zip(offsets, offsets[1:]):
+                lines = data[entry_start - offsets[0]:entry_end - offsets[0]].decode('utf-8', errors='replace').split('\n')
+                if len(lines) > 1 and not lines[-1]:
+                    lines.pop()  # 以换行结尾时最后一项为空
+                first_line = lines[0].rstrip('\r')
+                continuation = "".join(" " + line.strip() for line in lines[1:self.MAX_ENTRY_LINES])
+                header = SEARCH_HEADER_PATTERN.match(first_line)
+                searchable = f"{header.group(1)} {header.group(2)}" if header else first_line
+                if needle in (searchable + continuation).casefold():
+                    matches.append(first_line + continuation)
+        return matches
+
+
+class LogSearchResult:
+    """搜索结果游标 - 从最新的候选块向前扫描，翻页时才从磁盘读取块内条目并校验"""
+    
+    READ_BLOCKS = 8  # 每次加锁最多取出的候选块数
+    
+    def __init__(self, index, needle, postings, epoch):
+        self._index = index
+        self.needle = needle
+        self._epoch = epoch
+        self._primary = postings[0] if postings else array('I')
+        self._others = postings[1:]
+        self._cursor = len(self._primary)  # 下一个待检查候选块的位置（倒序扫描）
+        self._pending = []  # 已校验但尚未返回的结果（按时间倒序）
+    
+    @property
+    def exhausted(self):
+        """是否已没有更多结果"""
+        return (self._cursor == 0 and not self._pending) or self._epoch != self._index._epoch
+    
+    def next_page(self, size):
+        """读取下一页匹配的日志条目（按时间倒序）"""
+        files = {}
+        try:
+            self._fill_pending(size, files)
+        finally:
+            for f in files.values():
+                f.close()
+        results = self._pending[:size]
+        del self._pending[:size]
+        return results
+    
+    def _fill_pending(self, size, files):
+        """扫描候选块，直到待返回的结果够一页或没有更多候选块"""
+        index = self._index
+        while len(self._pending) < size and self._cursor > 0:
+            blocks = []
+            with index._lock:
+                if self._epoch != index._epoch:
+                    break  # 索引已重建（例如跨天），旧的条目编号失效
+                scanned = 0
+                while self._cursor > 0 and len(blocks) < self.READ_BLOCKS and scanned < index.SCAN_BATCH:
+                    self._cursor -= 1
+                    scanned += 1
+                    block = self._primary[self._cursor]
+                    if all(_sorted_contains(posting, block) for posting in self._others):
+                        first = block * index.BLOCK_ENTRIES
+                        blocks.append([(index._files[index._entry_file[entry_id]], index._entry_offset[entry_id])
+                                       for entry_id in range(first, min(first + index.BLOCK_ENTRIES, len(index._entry_offset)))])
+            # 二元组只能筛选候选块，读取原文后确认条目是否真正包含查询内容
+            for locations in blocks:
+                self._pending.extend(reversed(index._read_matches(locations, self.needle, files)))
+
+
+def plan_scroll_update(old_lines, new_lines):
+    """比较前后两帧的日志行，返回 (删除顶部行数, 保留行数)
+
+    日志区域通常是旧内容向上滚动并在末尾追加新行：删除顶部若干行后，保留与新内容开头相同的行，
+    其后的旧行删除、新内容剩余的行追加到末尾。选择保留行数最多的方案，没有可保留的行时全部替换
+    """
+    best_drop, best_keep = len(old_lines), 0
+    if not new_lines:
+        return best_drop, best_keep
+    for drop in range(len(old_lines)):
+        if old_lines[drop] != new_lines[0]:
+            continue
+        keep = 1
+        limit = min(len(old_lines) - drop, len(new_lines))
+        while keep < limit and old_lines[drop + keep] == new_lines[keep]:
+            keep += 1
+        if keep > best_keep:
+            best_drop, best_keep = drop, keep
+            if keep == len(old_lines) - drop:
+                break  # 剩余旧行全部保留，不会有更优的方案
+    return best_drop, best_keep
+
+
+class FloatingLogViewer(tk.Tk if TK_AVAILABLE else object):
+    READER_POLL_INTERVAL = 20  # 启动时检查后台读取器是否就绪的间隔（毫秒）
+    SNAPSHOT_INTERVAL = 10000  # 定期保存状态快照的间隔（毫秒）
     
+    def __init__(self, config, measure_startup=False):
+        """悬浮日志查看器主窗口 - 基于tkinter的透明悬浮窗口
 
-class FloatingLogViewer(tk.Tk):
-    def __init__(self, config):
-        """悬浮日志查看器主窗口 - 基于tkinter的透明悬浮窗口"""
+        启动时先显示窗口和占位内容，日志读取器在后台线程中加载，
+        字体枚举和全局快捷键钩子延迟到首帧之后
+        measure_startup: 启动耗时测量模式，首帧显示后记录耗时并退出
+        """
         super().__init__()
         self.config = config
+        self.measure_startup = measure_startup
+        self._startup_marks = {}  # 启动阶段耗时（毫秒）
         
-        # 获取初始的日志配置（只在程序开始时加载一次）
-        initial_log_config = config.get_initial_log_config()
-        log_dir = initial_log_config["log_path"]
-        log_filename_prefix = initial_log_config["log_filename_prefix"]
-        log_path_configured = initial_log_config["log_path_configured"]
-        display_lines = config.get("display_lines", 11)
-        skip_debug_log = config.get("skip_debug_log", False)
-        auto_wrap = config.get("auto_wrap", False)  # 新增
-        dynamic_height = config.get("dynamic_height", False)
-        max_width = config.get("max_width", 460)
+        # 日志读取器、指标导出和状态服务在后台线程中创建
+        self.reader = None
+        self.metrics = None
+        self.metrics_exporter = None
+        self.status_server = None
+        self.event_store = None
+        self.alert_engine = None
+        self.profiler = RuntimeProfiler(config.get("profile_seconds", 30))  # 按需性能分析（Alt+O）
+        self._loaded_reader = None
+        self._reader_ready = threading.Event()
         
-        # 准备字体配置传递给 SmartLogReader
-        font_config = {
-            "font_name": config.get("font_name", "Consolas"),
-            "font_size": config.get("font_size", 11),
-            "font_weight": config.get("font_weight", "bold")
-        }
+        # 状态快照：上次的画面和读取位置，启动时立即显示并从记录的偏移继续读取
+        self._snapshot = load_state_snapshot() if config.get("state_snapshot", True) else None
+        self._rendered_lines = []  # 最近一次显示的内容
+        self._text_rows = None  # 文本区域中当前的行 [(文本, 样式标签)]，None 表示需要整屏重绘
+        self._text_header_count = 0  # 文本区域中当前的状态行数
+        self._status_line_count = 2  # 最近一帧的状态行数（限制显示行数和动态高度用）
+        self._level_tags = {}  # 日志级别 -> 样式标签（只包含配置了颜色的级别）
+        self._snapshot_generations = None  # 最近一次保存快照时的读取器版本号
         
-        # 初始化日志读取器 - 添加新参数
-        self.reader = SmartLogReader(
-            log_dir, 
-            log_filename_prefix, 
-            log_path_configured, 
-            display_lines, 
-            skip_debug_log,
-            dynamic_height,
-            auto_wrap,        # 新增
-            max_width,        # 新增
-            font_config       # 新增
-        )
-        self._prev_content = []  # 上一次显示的内容
+        # 字体：启动时不枚举系统字体，首帧后再校验
+        self._font_family = config.get("font_name", "Consolas")
+        self._font_families = None  # 系统字体列表缓存
+        
+        self._shown_generations = None  # 已显示的读取器版本号 (日志内容, 状态, 警告)
+        self._shown_color = None  # 已显示的文本颜色
         self.last_change_time = datetime.now()  # 最后内容变更时间
         
         # 颜色配置
-        self.normal_color = config.get("normal_color", "#00FF00")
-        self.stale_color = config.get("stale_color", "#FF0000")
-        self.high_freq_color = config.get("high_freq_color", "#FFA500")
+        render = config.settings.render
+        self.normal_color = render.normal_color
+        self.stale_color = render.stale_color
+        self.high_freq_color = render.high_freq_color
+        self._force_update = False  # 强制刷新标志（样式切换后即使内容未变也重绘）
         
         # 性能优化：字体缓存
         self._font_cache = None
         self._last_font_config = None
+        self._line_height = None  # 缓存字体的行高（像素）
+        self._glyph_widths = None  # 缓存字体的字形宽度表（状态行截断用）
         
         # 窗口状态
         self.monitor_running = True
         self.drag_start_pos = None  # 拖动状态变量
         self.current_width = config.get("max_width", 460)  # 使用max_width作为当前宽度
+        self.current_height = config.get("max_height", 220)  # 当前窗口高度（动态高度时随内容变化）
         
         # 功能状态
         self.transparent_mode = config.get("transparent_mode", False)  # 从配置读取透明模式状态
         self.click_through = config.get("click_through", False)  # 从配置读取不可选中模式状态
         self.author_style2_active = config.get("author_style2", False)  # 从配置读取仿BGI日志窗口样式状态
         
+        # 搜索模式（首次进入时才建立索引）
+        self.search_index = None
+        self.search_mode = False
+        self.search_entry = None
+        self._search_result = None  # 当前查询的结果游标
+        self._search_pages = []     # 已读取的结果页
+        self._search_page = 0       # 当前显示的页码
+        
+        # 时间跳转模式（在当天日志中按时间戳二分查找）
+        self.jump_mode = False
+        self.jump_entry = None
+        self._jump_file = None   # 跳转时的日志文件
+        self._jump_range = None  # 当前显示条目的字节范围 (起始偏移, 结束偏移)
+        
         # 窗口配置 - 使用保存的位置，如果 window_x/window_y 为 None 则使用 initial_x/initial_y
         self.preset_x = config.get("initial_x", 0)
         self.preset_y = config.get("initial_y", 0)
@@ -1156,30 +3866,185 @@ class FloatingLogViewer(tk.Tk):
         if window_y is None:
             logging.info(f"window_y 为空，使用预设位置: {self.preset_y}")
 
-        self.max_width = config.get("max_width", 460)
-        self.max_height = config.get("max_height", 220)
-        self.display_lines = config.get("display_lines", 11)
-        self.refresh_interval = config.get("refresh_interval", 1000)
-        self.dynamic_height=self.config.get("dynamic_height", False)
+        layout = config.settings.layout
+        self.max_width = layout.max_width
+        self.max_height = layout.max_height
+        self.display_lines = layout.display_lines
+        self.refresh_interval = layout.refresh_interval
+        self.dynamic_height = layout.dynamic_height
 
-        # 初始化界面
+        # 初始化界面（先显示占位内容）
         self._setup_window()
         self._setup_ui()
         self._setup_keyboard_shortcuts()  # 新增：设置键盘快捷键
+        self._mark_startup("window")
+        
+        # 在后台线程中加载日志读取器，就绪后开始刷新
+        threading.Thread(target=self._load_reader_in_background, daemon=True).start()
+        self.after(self.READER_POLL_INTERVAL, self._wait_for_reader)
+
+    def _create_reader(self):
+        """根据当前设置创建日志读取器"""
+        # 获取初始的日志配置（只在程序开始时加载一次）
+        initial_log_config = self.config.get_initial_log_config()
+        reader_settings = self.config.settings.reader
+        
+        # 准备字体配置传递给 SmartLogReader
+        font_config = {
+            "font_name": self._font_family,
+            "font_size": reader_settings.font_size,
+            "font_weight": reader_settings.font_weight
+        }
+        
+        return SmartLogReader(
+            initial_log_config["log_path"],
+            initial_log_config["log_filename_prefix"],
+            initial_log_config["log_path_configured"],
+            reader_settings.display_lines,
+            reader_settings.skip_debug_log,
+            reader_settings.dynamic_height,
+            reader_settings.auto_wrap,
+            reader_settings.max_width,
+            font_config,
+            metrics=self.metrics,
+            rate_rules=self.config.get_rate_rules(),
+            event_sink=self.event_store,
+            pattern_matcher=LogPatternMatcher(self.config.get_user_patterns()),
+            glyph_metrics_file=self._glyph_metrics_path(),
+            collapse_repeats=reader_settings.collapse_repeats,
+            alert_engine=self.alert_engine,
+            level_rates=reader_settings.show_level_rates
+        )
+
+    def _glyph_metrics_path(self):
+        """字形度量文件路径（相对路径以程序目录为准），未配置时返回 None"""
+        glyph_metrics_file = self.config.settings.reader.glyph_metrics_file
+        if not glyph_metrics_file:
+            return None
+        return Path(get_base_path()) / glyph_metrics_file
+
+    def _load_reader_in_background(self):
+        """后台线程：启动指标导出、状态服务、事件存储和告警引擎，创建读取器并读取日志尾部（不访问Tk）"""
+        try:
+            self.metrics, self.metrics_exporter = start_metrics_exporter(self.config)
+            self.status_server = start_status_server(self.config)
+            self.event_store = start_event_store(self.config)
+            self.alert_engine = start_alert_engine(self.config)
+            reader = self._create_reader()
+            # 快照对应同一文件时从记录的偏移继续增量读取，否则预先读取日志尾部
+            reader.restore_snapshot(self._snapshot)
+            reader.refresh()  # 首帧只需格式化
+            self._loaded_reader = reader
+        except Exception as e:
+            logging.error(f"后台加载日志读取器失败: {str(e)}")
+        finally:
+            self._reader_ready.set()
+
+    def _wait_for_reader(self):
+        """等待后台读取器就绪，就绪后显示首帧并启动刷新循环"""
+        if not self._reader_ready.is_set():
+            self.after(self.READER_POLL_INTERVAL, self._wait_for_reader)
+            return
+        
+        # 后台加载失败时在主线程中重试一次
+        self.reader = self._loaded_reader or self._create_reader()
+        self._loaded_reader = None
+        self._snapshot = None
+        self._mark_startup("reader")
+        
         self._start_auto_refresh()
+        if self.config.get("state_snapshot", True):
+            self.after(self.SNAPSHOT_INTERVAL, self._snapshot_loop)
+        self.update_idletasks()
+        self._mark_startup("first_frame")
         
-        # 确保清理可能残留的全局快捷键
-        if KEYBOARD_AVAILABLE:
-            try:
-                keyboard.unhook_all()
-                logging.info("清理可能残留的全局快捷键")
-            except Exception as e:
-                logging.warning(f"清理全局快捷键时出现警告: {str(e)}")
+        # 首帧之后再校验字体、启动全局快捷键钩子
+        self.after(1, self._validate_font)
+        self.after(1, self._start_global_shortcuts)
         
-        # 初始化全局快捷键管理器
+        if self.measure_startup:
+            self._report_startup_times()
+            self.after(1, self.destroy)
+
+    def _snapshot_loop(self):
+        """定期保存状态快照"""
+        self._save_snapshot()
+        self.after(self.SNAPSHOT_INTERVAL, self._snapshot_loop)
+
+    def _save_snapshot(self):
+        """保存当前画面和读取状态到快照文件（读取器版本号未变化时跳过）"""
+        if self.reader is None or not self.config.get("state_snapshot", True):
+            return
+        generations = self.reader.get_generations()[:3]  # 速率状态行不属于快照内容
+        if generations == self._snapshot_generations:
+            return
+        snapshot = self.reader.export_snapshot()
+        if snapshot is None:
+            return
+        snapshot["rendered_lines"] = self._rendered_lines
+        save_state_snapshot(snapshot)
+        self._snapshot_generations = generations
+
+    def _start_global_shortcuts(self):
+        """启动全局快捷键（延迟到首帧之后，keyboard 库在监听线程中导入）"""
+        # 初始化全局快捷键管理器（启动时会清理可能残留的全局快捷键）
         self.shortcut_manager = GlobalShortcutManager(self)
         self.shortcut_manager.start_listening()
 
+    def _mark_startup(self, stage):
+        """记录启动阶段完成时间（自程序开始执行起的毫秒数）"""
+        self._startup_marks[stage] = (time.perf_counter() - _STARTUP_BEGIN) * 1000
+
+    def _report_startup_times(self):
+        """输出启动耗时并追加到 config.txt 同目录的 startup_times.csv"""
+        imports_ms = (_STARTUP_IMPORTS_DONE - _STARTUP_BEGIN) * 1000
+        marks = self._startup_marks
+        logging.warning(
+            f"启动耗时: 模块导入 {imports_ms:.1f} ms, 窗口显示 {marks['window']:.1f} ms, "
+            f"读取器就绪 {marks['reader']:.1f} ms, 首帧 {marks['first_frame']:.1f} ms"
+        )
+        
+        csv_file = Path(get_base_path()) / "startup_times.csv"
+        try:
+            write_header = not csv_file.exists()
+            with open(csv_file, 'a', encoding='utf-8') as f:
+                if write_header:
+                    f.write("time,version,frozen,imports_ms,window_ms,reader_ms,first_frame_ms\n")
+                f.write(f"{datetime.now().isoformat(timespec='seconds')},{__version__},"
+                        f"{int(getattr(sys, 'frozen', False))},{imports_ms:.1f},{marks['window']:.1f},"
+                        f"{marks['reader']:.1f},{marks['first_frame']:.1f}\n")
+        except OSError as e:
+            logging.error(f"写入启动耗时记录失败: {str(e)}")
+
+    def _get_font_families(self):
+        """获取系统字体列表（枚举较慢，结果缓存）"""
+        if self._font_families is None:
+            import tkinter.font as tkfont
+            self._font_families = set(tkfont.families())
+        return self._font_families
+
+    def _validate_font(self):
+        """校验配置的字体是否存在，不存在时回退到默认字体（首帧之后执行）"""
+        font_name = self.config.get("font_name", "Consolas")
+        if font_name in self._get_font_families() or self._font_family != font_name:
+            return
+        
+        logging.warning(f"字体 '{font_name}' 不可用，使用默认字体")
+        self._font_family = "Consolas"
+        self.text.config(font=self._build_font_tuple())
+        if self.reader is not None:
+            self.reader = self._create_reader()
+            self._force_immediate_display_update()
+
+    def _build_font_tuple(self):
+        """根据当前设置构建文本组件使用的字体"""
+        reader_settings = self.config.settings.reader
+        font_size = reader_settings.font_size
+        font_weight = reader_settings.font_weight
+        if font_weight != "normal":
+            return (self._font_family, font_size, font_weight)
+        return (self._font_family, font_size)
+
     def _setup_window(self):
         """窗口视觉配置 - 设置透明、置顶等属性"""
         # 设置窗口标题，让系统识别
@@ -1245,6 +4110,8 @@ class FloatingLogViewer(tk.Tk):
     def _setup_taskbar_icon(self):
         """设置任务栏图标 - 使用Windows API"""
         try:
+            import ctypes
+            
             # 定义Windows API常量
             GWL_EXSTYLE = -20
             WS_EX_APPWINDOW = 0x00040000
@@ -1267,30 +4134,7 @@ class FloatingLogViewer(tk.Tk):
             logging.error(f"设置任务栏图标失败: {str(e)}")
         
     def _setup_ui(self):
-        """界面元素初始化 - 创建文本显示区域"""
-        font_name = self.config.get("font_name", "Consolas")
-        font_size = self.config.get("font_size", 11)
-        font_weight = self.config.get("font_weight", "bold")
-        
-        # 验证字体是否存在
-        available_fonts = tkfont.families()
-        if font_name not in available_fonts:
-            logging.warning(f"字体 '{font_name}' 不可用，使用默认字体")
-            font_name = "Consolas"  # 回退到默认字体
-        
-        try:
-            # 创建字体配置
-            font_config = (font_name, font_size)
-            if font_weight != "normal":
-                font_config = (font_name, font_size, font_weight)
-            
-            # 测试字体是否可用
-            test_font = tkfont.Font(font=font_config)
-            _ = test_font.measure("test")
-        except Exception as e:
-            logging.error(f"字体配置失败: {str(e)}，使用系统默认字体")
-            font_config = ("TkDefaultFont", font_size)
-            
+        """界面元素初始化 - 创建文本显示区域并显示占位内容（字体是否存在在首帧后校验）"""
         # 创建文本显示组件
         # 根据透明模式设置不同的背景
         text_bg = self.config.get("bg_color", "#000000")  # 文本区域使用与窗口相同的背景色
@@ -1303,13 +4147,17 @@ class FloatingLogViewer(tk.Tk):
             self,
             bg=text_bg,
             fg=self.normal_color,
-            font=font_config,
             borderwidth=0,
             insertwidth=0,
             wrap=wrap_mode,  # 修改：根据配置设置换行模式
             height=self.display_lines,
             state='disabled'
         )
+        try:
+            self.text.config(font=self._build_font_tuple())
+        except tk.TclError as e:
+            logging.error(f"字体配置失败: {str(e)}，使用系统默认字体")
+            self.text.config(font=("TkDefaultFont", self.config.get("font_size", 11)))
         self.text.pack(expand=True, fill='both')
         
         # 仅在非不可选中模式下启用拖动功能
@@ -1319,8 +4167,13 @@ class FloatingLogViewer(tk.Tk):
         else:
             logging.info("不可选中模式已启用，拖动功能已禁用")
         
-        # 立即显示日志内容
-        self._update_display()
+        # 显示占位内容（优先使用快照中上次的画面），日志读取器就绪后替换
+        placeholder = "正在加载日志…"
+        if self._snapshot and isinstance(self._snapshot.get("rendered_lines"), list):
+            placeholder = '\n'.join(str(line) for line in self._snapshot["rendered_lines"]) or placeholder
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, placeholder)
+        self.text.config(state='disabled')
 
     def _setup_keyboard_shortcuts(self):
         """设置键盘快捷键 - Alt+P关闭程序, Alt+U重置位置（当全局快捷键不可用时启用）"""
@@ -1334,7 +4187,13 @@ class FloatingLogViewer(tk.Tk):
             self.bind("<Alt-KeyPress-I>", self._on_transparent_toggle_shortcut)
             self.bind("<Alt-KeyPress-n>", self._on_click_through_toggle_shortcut)
             self.bind("<Alt-KeyPress-N>", self._on_click_through_toggle_shortcut)
-            logging.info("全局快捷键不可用，已启用窗口内快捷键: Alt+P(关闭), Alt+U(重置位置), Alt+I(透明模式), Alt+N(不可选中)")
+            self.bind("<Alt-KeyPress-f>", self._on_search_shortcut)
+            self.bind("<Alt-KeyPress-F>", self._on_search_shortcut)
+            self.bind("<Alt-KeyPress-t>", self._on_jump_shortcut)
+            self.bind("<Alt-KeyPress-T>", self._on_jump_shortcut)
+            self.bind("<Alt-KeyPress-o>", self._on_profile_shortcut)
+            self.bind("<Alt-KeyPress-O>", self._on_profile_shortcut)
+            logging.info("全局快捷键不可用，已启用窗口内快捷键: Alt+P(关闭), Alt+U(重置位置), Alt+I(透明模式), Alt+N(不可选中), Alt+F(搜索), Alt+T(时间跳转), Alt+O(性能分析)")
         else:
             logging.info("全局快捷键可用，窗口内快捷键已禁用")
             
@@ -1410,6 +4269,8 @@ class FloatingLogViewer(tk.Tk):
             return False
         
         try:
+            import ctypes
+            
             # 定义Windows API常量
             GWL_EXSTYLE = -20
             WS_EX_TRANSPARENT = 0x00000020
@@ -1472,19 +4333,6 @@ class FloatingLogViewer(tk.Tk):
         # 强制立即刷新显示，不等待下一次自动刷新
         self._force_immediate_display_update()
 
-    def _force_immediate_display_update(self):
-        """强制立即更新显示，不依赖日志内容变化"""
-        # 清除之前的内容缓存，确保强制更新
-        self._prev_content = []
-        self.last_change_time = datetime.now()
-        
-        # 强制调用更新显示
-        self._update_display()
-        
-        # 确保窗口完全刷新
-        self.update_idletasks()
-        self.update()
-
     def clear_font_cache(self):
         """清理字体缓存"""
         if self._font_cache:
@@ -1494,16 +4342,18 @@ class FloatingLogViewer(tk.Tk):
 
     def _refresh_ui_after_style_change(self):
         """样式变更后刷新UI"""
-        # 从配置中重新读取所有设置
-        self.normal_color = self.config.get("normal_color", "#00FF00")
-        self.stale_color = self.config.get("stale_color", "#FF0000")
-        self.high_freq_color = self.config.get("high_freq_color", "#FFA500")
+        # 读取样式切换时重新生成的设置对象
+        settings = self.config.settings
+        self.normal_color = settings.render.normal_color
+        self.stale_color = settings.render.stale_color
+        self.high_freq_color = settings.render.high_freq_color
         
         # 更新窗口属性 - 使用max_width和max_height
-        self.max_width = self.config.get("max_width", 460)
-        self.max_height = self.config.get("max_height", 220)
-        self.display_lines = self.config.get("display_lines", 11)
-        self.refresh_interval = self.config.get("refresh_interval", 1000)
+        self.max_width = settings.layout.max_width
+        self.max_height = settings.layout.max_height
+        self.display_lines = settings.layout.display_lines
+        self.refresh_interval = settings.layout.refresh_interval
+        self.dynamic_height = settings.layout.dynamic_height
         
         # 清理字体缓存
         self.clear_font_cache()
@@ -1514,7 +4364,7 @@ class FloatingLogViewer(tk.Tk):
         self.text.tag_delete("high_freq_warning")
         
         # 更新窗口视觉设置
-        bg_color = self.config.get("bg_color", "#000000")
+        bg_color = settings.render.bg_color
 
         # 先清除所有特殊属性
         self.attributes('-transparentcolor', '')
@@ -1527,27 +4377,20 @@ class FloatingLogViewer(tk.Tk):
         else:
             # 正常模式
             self.configure(bg=bg_color)
-            window_alpha = self.config.get("window_alpha", 0.7)
-            self.attributes('-alpha', window_alpha)
+            self.attributes('-alpha', settings.render.window_alpha)
         
         # 更新文本组件
         font_name = self.config.get("font_name", "Consolas")
-        font_size = self.config.get("font_size", 11)
-        font_weight = self.config.get("font_weight", "bold")
         
-        # 验证字体是否存在
-        available_fonts = tkfont.families()
-        if font_name not in available_fonts:
+        # 验证字体是否存在（系统字体列表已缓存）
+        if font_name not in self._get_font_families():
             logging.warning(f"字体 '{font_name}' 不可用，使用默认字体")
             font_name = "Consolas"
-        
-        font_config = (font_name, font_size)
-        if font_weight != "normal":
-            font_config = (font_name, font_size, font_weight)
+        self._font_family = font_name
+        font_config = self._build_font_tuple()
             
         # 根据换行设置决定 wrap 模式
-        auto_wrap = self.config.get("auto_wrap", False)
-        wrap_mode = tk.WORD if auto_wrap else tk.NONE
+        wrap_mode = tk.WORD if settings.layout.auto_wrap else tk.NONE
         
         # 更新文本组件背景和字体
         self.text.config(
@@ -1562,35 +4405,10 @@ class FloatingLogViewer(tk.Tk):
         current_x = self.winfo_x()
         current_y = self.winfo_y()
         self.geometry(f"{self.max_width}x{self.max_height}+{current_x}+{current_y}")
+        self.current_width, self.current_height = self.max_width, self.max_height
         
         # 重要：重新創建 SmartLogReader 以應用新的配置
-        initial_log_config = self.config.get_initial_log_config()
-        log_dir = initial_log_config["log_path"]
-        log_filename_prefix = initial_log_config["log_filename_prefix"]
-        log_path_configured = initial_log_config["log_path_configured"]
-        skip_debug_log = self.config.get("skip_debug_log", False)
-        auto_wrap = self.config.get("auto_wrap", False)
-        dynamic_height = self.config.get("dynamic_height", False)
-        
-        # 准备字体配置
-        font_config_dict = {
-            "font_name": font_name,
-            "font_size": font_size,
-            "font_weight": font_weight
-        }
-        
-        # 重新創建 reader 以應用新的配置
-        self.reader = SmartLogReader(
-            log_dir, 
-            log_filename_prefix, 
-            log_path_configured, 
-            self.display_lines, 
-            skip_debug_log,
-            dynamic_height,
-            auto_wrap,
-            self.max_width,
-            font_config_dict
-        )
+        self.reader = self._create_reader()
         
         # 強制刷新顯示
         self._update_display()
@@ -1608,6 +4426,190 @@ class FloatingLogViewer(tk.Tk):
         # 立即保存重置后的位置到config.txt
         self.config.save_window_state(self.preset_x, self.preset_y, self.transparent_mode, self.click_through, self.author_style2_active)
 
+    def _on_search_shortcut(self, event=None):
+        """Alt+F 快捷键处理函数 - 进入/退出日志搜索模式"""
+        if self.search_mode:
+            self._exit_search_mode()
+        else:
+            self._enter_search_mode()
+        return "break"
+
+    def _enter_search_mode(self):
+        """进入搜索模式 - 显示输入框，首次进入时在后台建立当天日志的索引"""
+        if self.reader is None or not self.reader.log_path_valid:
+            return
+        if self.search_index is None:
+            self.search_index = LogSearchIndex(self.reader.log_dir, self.reader.log_filename_prefix, self.profiler)
+            self.search_index.start()
+        self._exit_jump_mode()
+        
+        self.search_mode = True
+        self.search_entry = self._create_query_entry()
+        self.search_entry.bind("<Return>", self._run_search)
+        self.search_entry.bind("<Escape>", lambda event: self._exit_search_mode())
+        self.search_entry.bind("<Next>", lambda event: self._show_search_page(self._search_page + 1))
+        self.search_entry.bind("<Prior>", lambda event: self._show_search_page(self._search_page - 1))
+        self._show_search_lines(["[搜索] 输入关键字后按 Enter 搜索当天日志，Esc 退出"])
+        self.focus_force()
+        self.search_entry.focus_set()
+        logging.info("进入搜索模式")
+
+    def _exit_search_mode(self):
+        """退出搜索模式 - 移除输入框并恢复日志显示（索引保留并继续增量更新）"""
+        if not self.search_mode:
+            return
+        self.search_mode = False
+        self.search_entry.destroy()
+        self.search_entry = None
+        self._search_result = None
+        self._search_pages = []
+        logging.info("退出搜索模式")
+        self._force_immediate_display_update()
+
+    def _run_search(self, event=None):
+        """执行搜索并显示第一页结果"""
+        query = self.search_entry.get()
+        try:
+            self._search_result = self.search_index.search(query)
+        except ValueError as e:
+            self._show_search_lines([f"[搜索] {e}"])
+            return "break"
+        self._search_pages = []
+        self._show_search_page(0)
+        return "break"
+
+    def _show_search_page(self, page):
+        """显示指定页的搜索结果，向后翻页时才从磁盘读取下一页"""
+        if self._search_result is None or page < 0:
+            return "break"
+        if page >= len(self._search_pages):
+            if self._search_result.exhausted:
+                return "break"
+            results = self._search_result.next_page(self.display_lines)
+            if not results:
+                return "break"
+            self._search_pages.append([self.reader.format_entry(entry) for entry in results])
+            page = len(self._search_pages) - 1
+        self._search_page = page
+        
+        first = sum(len(p) for p in self._search_pages[:page]) + 1
+        last = first + len(self._search_pages[page]) - 1
+        more = "" if self._search_result.exhausted and page == len(self._search_pages) - 1 else "，PgDn 下一页"
+        building = "" if self.search_index.ready else f"，索引中 {self.search_index.indexed_bytes // (1024 * 1024)}MB"
+        header = f"[搜索] \"{self._search_result.needle}\" 第 {first}-{last} 条{more}{building}"
+        self._show_search_lines([header] + self._search_pages[page])
+        return "break"
+
+    def _create_query_entry(self):
+        """创建搜索/时间跳转共用的输入框（显示在文本区域上方）"""
+        entry = tk.Entry(
+            self,
+            bg=self.config.get("bg_color", "#000000"),
+            fg=self.normal_color,
+            insertbackground=self.normal_color,
+            font=self.text['font'],
+            relief=tk.FLAT
+        )
+        entry.pack(side=tk.TOP, fill='x', before=self.text)
+        return entry
+
+    def _on_jump_shortcut(self, event=None):
+        """Alt+T 快捷键处理函数 - 进入/退出时间跳转模式"""
+        if self.jump_mode:
+            self._exit_jump_mode()
+        else:
+            self._enter_jump_mode()
+        return "break"
+
+    def _enter_jump_mode(self):
+        """进入时间跳转模式 - 显示输入框，输入时间后在当天日志中二分查找并显示该时间附近的日志"""
+        if self.reader is None or not self.reader.log_path_valid:
+            return
+        self._exit_search_mode()
+        
+        self.jump_mode = True
+        self.jump_entry = self._create_query_entry()
+        self.jump_entry.bind("<Return>", self._run_jump)
+        self.jump_entry.bind("<Escape>", lambda event: self._exit_jump_mode())
+        self.jump_entry.bind("<Next>", lambda event: self._show_jump_page(1))
+        self.jump_entry.bind("<Prior>", lambda event: self._show_jump_page(-1))
+        self._show_search_lines(["[跳转] 输入时间（HH:MM 或 HH:MM:SS）后按 Enter 跳转到当天日志的该时间，Esc 退出"])
+        self.focus_force()
+        self.jump_entry.focus_set()
+        logging.info("进入时间跳转模式")
+
+    def _exit_jump_mode(self):
+        """退出时间跳转模式 - 移除输入框并恢复实时日志显示"""
+        if not self.jump_mode:
+            return
+        self.jump_mode = False
+        self.jump_entry.destroy()
+        self.jump_entry = None
+        self._jump_file = None
+        self._jump_range = None
+        logging.info("退出时间跳转模式")
+        self._force_immediate_display_update()
+
+    def _run_jump(self, event=None):
+        """二分查找输入时间对应的位置，显示之前的少量条目和之后的条目"""
+        try:
+            time_ms = parse_time_of_day(self.jump_entry.get())
+        except ValueError as e:
+            self._show_search_lines([f"[跳转] {e}"])
+            return "break"
+        self._jump_file = self.reader.get_current_file()
+        if self._jump_file is None:
+            return "break"
+        context = self.display_lines // 3  # 目标时间之前显示的条目数
+        try:
+            with open(self._jump_file, 'rb') as f:
+                offset = seek_log_time(f, time_ms)
+                before, start = read_log_entries_before(f, offset, context) if context else ([], offset)
+                after, end = read_log_entries(f, offset, self.display_lines - len(before))
+        except OSError as e:
+            self._show_search_lines([f"[跳转] 读取日志失败: {e}"])
+            return "break"
+        self._jump_range = (start, end)
+        self._show_jump_entries(before + after)
+        return "break"
+
+    def _show_jump_page(self, direction):
+        """向前（-1）或向后（1）翻一页，从当前显示范围的边界继续读取"""
+        if self._jump_range is None:
+            return "break"
+        start, end = self._jump_range
+        try:
+            with open(self._jump_file, 'rb') as f:
+                if direction > 0:
+                    entries, next_end = read_log_entries(f, end, self.display_lines)
+                    self._jump_range = (end, next_end) if entries else self._jump_range
+                else:
+                    entries, previous_start = read_log_entries_before(f, start, self.display_lines)
+                    self._jump_range = (previous_start, start) if entries else self._jump_range
+        except OSError as e:
+            self._show_search_lines([f"[跳转] 读取日志失败: {e}"])
+            return "break"
+        if entries:
+            self._show_jump_entries(entries)
+        return "break"
+
+    def _show_jump_entries(self, entries):
+        """显示跳转结果"""
+        header = f"[跳转] {self.jump_entry.get().strip()} 附近，PgUp/PgDn 翻页，Esc 退出"
+        if not entries:
+            header = f"[跳转] {self.jump_entry.get().strip()} 之后没有日志"
+        self._show_search_lines([header] + [self.reader.format_entry(entry) for entry in entries])
+
+    def _show_search_lines(self, lines):
+        """在文本区域显示搜索提示或结果"""
+        self._apply_layout(lines)
+        self.text.config(state=tk.NORMAL)
+        self._text_rows = None  # 退出搜索后整屏重绘
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, '\n'.join(lines))
+        self.text.config(fg=self.normal_color, state='disabled')
+        self._shown_color = self.normal_color
+
     def _on_close_shortcut(self, event=None):
         """Alt+P 快捷键处理函数"""
         logging.info("检测到 Alt+P 快捷键，关闭程序")
@@ -1630,21 +4632,37 @@ class FloatingLogViewer(tk.Tk):
         """启动自动刷新循环 - 定时更新日志显示"""
         def update_loop():
             try:
-                self._update_display()
+                tick_start = time.perf_counter()
+                if self.profiler.active:
+                    self.profiler.run(self._update_display)
+                else:
+                    self._update_display()
+                if self.metrics is not None:
+                    self.metrics.record_tick(time.perf_counter() - tick_start)
+                if self.alert_engine is not None and self.alert_engine.take_bell():
+                    self.bell()
                 self.after(self.refresh_interval, update_loop)
             except Exception as e:
                 logging.critical(f"刷新循环异常: {str(e)}")
 
+        if self.config.get("profile_on_start", False):
+            self.profiler.start()
         update_loop()
 
+    def _on_profile_shortcut(self, event=None):
+        """Alt+O 快捷键处理函数 - 开始性能分析，分析进行中时提前结束并保存结果"""
+        self.profiler.toggle()
+        return "break"
+
     # 只比较日志内容，不包括状态行
     def _force_immediate_display_update(self):
         """强制立即更新显示，不依赖日志内容变化"""
         # 设置强制更新标志
         self._force_update = True
         
-        # 清除之前的内容缓存，确保强制更新
-        self._prev_content = []
+        # 清除已显示的版本号，确保强制更新（样式可能已变化，整屏重绘并重新配置标签）
+        self._shown_generations = None
+        self._text_rows = None
         self.last_change_time = datetime.now()
         
         # 强制调用更新显示
@@ -1654,32 +4672,16 @@ class FloatingLogViewer(tk.Tk):
         self.update_idletasks()
         self.update()
         
-    # 只比较日志内容，不包括状态行
-    def _get_content_hash(self, content):
-        """获取内容的哈希值用于比较变化"""
-        if not content:
-            return hash(str(content))
-        
-        # 检查是否是错误信息
-        if content and "日志路径配置错误" in content[0]:
-            return hash(tuple(content))
-        
-        # 动态确定状态行数
-        status_lines = 2  # 默认：配置组行 + 任务行
-        
-        # 如果有高频警告，状态行数增加1
-        if content and content[0].startswith("⚠️"):
-            status_lines = 3  # 高频警告行 + 配置组行 + 任务行
-        
-        # 跳过状态行，只比较日志内容
-        if len(content) <= status_lines:
-            return hash(tuple(content))
-        
-        log_content = content[status_lines:]
-        return hash(tuple(log_content))
-    
     def _update_display(self):
         """更新显示内容 - 核心刷新逻辑"""
+        if self.reader is None:
+            return  # 读取器仍在后台加载，保留占位内容
+        if self.search_mode or self.jump_mode:
+            # 搜索/跳转模式下不覆盖显示的结果，只继续读取日志（并更新搜索索引）
+            self.reader.refresh()
+            if self.search_index is not None:
+                self.search_index.notify()
+            return
         new_content = self.reader.get_content()
         current_time = datetime.now()
 
@@ -1687,6 +4689,7 @@ class FloatingLogViewer(tk.Tk):
         content_changed = False
         color_changed = False
         text_color = self.normal_color  # 默认颜色
+        rate_warning = False
 
         # 如果返回的是错误信息，直接显示错误信息
         if new_content and "日志路径配置错误" in new_content[0]:
@@ -1696,103 +4699,69 @@ class FloatingLogViewer(tk.Tk):
             content_changed = True  # 错误信息总是需要显示
             color_changed = True    # 颜色也需要更新
         else:
-            # 构建显示内容：配置组+任务状态 + 日志内容
-            task_display = f"[当前任务] [{self.reader.current_progress}] {self.reader.current_task}"
-            
-            display_content = [
-                f"[当前配置组] {self.reader.current_config}",
-                task_display
-            ] + new_content
-
-            # 添加高频切换警告状态行
-            if self.reader.high_frequency_warning:
-                display_content.insert(0, f"⚠️ 任务切换过于频繁 ({len(self.reader.task_switch_times)}次/分钟) ⚠️")
-                
-            # 如果启用自动换行，处理状态行的截断
-            if self.config.get("auto_wrap", False):
-                display_content = self._truncate_status_lines(display_content)
-                
-            # 限制最多显示行数
-            max_display_lines = self.display_lines + 2  # 加上2行状态行
-            if len(display_content) > max_display_lines:
-                display_content = display_content[:max_display_lines]
-
-            # 判断是否需要更新
-            stale_seconds = (current_time - self.last_change_time).total_seconds()
-            # 比较日志内容
-            content_hash = self._get_content_hash(display_content)
-            prev_content_hash = self._get_content_hash(self._prev_content)
-            content_changed = content_hash != prev_content_hash
+            # 通过读取器的版本号判断变化，无需构建和比较整帧内容
+            generations = self.reader.get_generations()
+            shown = self._shown_generations
+            content_changed = shown is None or generations[0] != shown[0]
+            frame_changed = generations != shown
             
             # 确定文本颜色（优先级：高频警告 > 超时警告 > 正常）
-            if self.reader.high_frequency_warning:
+            # 频率告警按日志时间结束；日志停止更新超过最长检测窗口时不再显示
+            stale_seconds = (current_time - self.last_change_time).total_seconds()
+            rate_warning = (self.reader.high_frequency_warning
+                            and (content_changed or stale_seconds <= self.reader.max_rate_window))
+            if rate_warning:
                 text_color = self.high_freq_color
-            elif stale_seconds > 60:  # 超过60秒无更新显示红色警告
+            elif stale_seconds > 60 and not content_changed:  # 超过60秒无更新显示红色警告
                 text_color = self.stale_color
             else:
                 text_color = self.normal_color
                 
-            color_changed = self.text.cget("fg") != text_color
+            color_changed = self._shown_color != text_color
 
             # 如果内容和颜色都未变化，跳过更新（除非是强制更新）
-            if not content_changed and not color_changed and not hasattr(self, '_force_update'):
+            if not frame_changed and not color_changed and not self._force_update:
                 return
+            
+            # 构建显示内容：(高频警告) + 配置组 + 任务状态 + 日志内容
+            status_lines = self.reader.get_status_lines(rate_warning)
+            display_content = status_lines + new_content
+                
+            # 如果启用自动换行，处理状态行的截断
+            if self.config.settings.layout.auto_wrap:
+                display_content = self._truncate_status_lines(display_content, len(status_lines))
+                
+            # 限制最多显示行数（状态行有2-4行：高频警告行和日志速率行可选）
+            self._status_line_count = len(status_lines)
+            max_display_lines = self.display_lines + len(status_lines)
+            if len(display_content) > max_display_lines:
+                display_content = display_content[:max_display_lines]
+            
+            self._shown_generations = generations
 
-        # 动态调整窗口宽度
-        self._adjust_window_width(display_content)
+        # 计算窗口尺寸，整帧只应用一次几何变化
+        self._apply_layout(display_content)
 
-        # 执行界面更新
+        # 每行的样式标签：状态行使用标题样式，日志行按告警规则和日志级别着色
+        if display_content and "日志路径配置错误" in display_content[0]:
+            header_count = 0
+            line_tags = [None] * len(display_content)
+        else:
+            header_count = len(status_lines)
+            header_tags = ["config_header", "task_header"]
+            if self.reader.rate_line is not None:
+                header_tags.insert(0, "config_header")  # 日志速率行与配置组行使用相同样式
+            if rate_warning:
+                header_tags.insert(0, "high_freq_warning")
+            line_tags = header_tags + [self._content_line_tag(level, rule_index) for level, rule_index
+                                       in zip(self.reader.get_content_levels(), self.reader.get_content_alert_rules())]
+
+        # 执行界面更新（只改写变化的行）
         self.text.config(state=tk.NORMAL)
-        self.text.delete(1.0, tk.END)
-        self.text.insert(tk.END, '\n'.join(display_content))
+        self._render_rows(list(zip(display_content, line_tags)), header_count)
         self.text.config(fg=text_color)
-
-        # 根据状态行数动态计算索引
-        if not (display_content and "日志路径配置错误" in display_content[0]):
-            # 动态计算状态行数
-            status_lines = 2
-            if self.reader.high_frequency_warning:
-                status_lines = 3
-            
-            # 获取分开的状态行和任务行颜色 - 从当前配置中获取最新值
-            status_color = self.config.get("status_header_color", "#87CEFA")
-            task_color = self.config.get("task_header_color", "#87CEFA")
-            
-            # 获取当前字体配置 - 从当前配置中获取最新值
-            font_name = self.config.get("font_name", "Consolas")
-            font_size = self.config.get("font_size", 10)
-            font_weight = self.config.get("font_weight", "bold")
-            
-            # 配置字体样式 - 使用从配置中获取的最新值
-            status_font_config = (font_name, font_size, font_weight)
-            task_font_config = (font_name, font_size, font_weight)
-            # 删除现有标签（确保样式切换时标签被清除）
-            self.text.tag_delete("config_header")
-            self.text.tag_delete("task_header")
-            self.text.tag_delete("high_freq_warning")
-            
-            # 配置组行特殊样式 - 使用当前配置的状态行颜色和字体
-            config_line = 1 if status_lines == 2 else 2
-            self.text.tag_configure("config_header", 
-                                foreground=status_color,
-                                font=status_font_config)
-            self.text.tag_add("config_header", f"{config_line}.0", f"{config_line}.end")
-            
-            # 任务行样式 - 使用当前配置的任务行颜色和字体
-            task_line = 2 if status_lines == 2 else 3
-            self.text.tag_configure("task_header", 
-                                foreground=task_color,
-                                font=task_font_config,
-                                relief=tk.RIDGE,
-                                borderwidth=2)
-            self.text.tag_add("task_header", f"{task_line}.0", f"{task_line}.end")
-            
-            # 高频警告行样式
-            if self.reader.high_frequency_warning:
-                self.text.tag_configure("high_freq_warning", 
-                                    foreground=self.high_freq_color,
-                                    font=(font_name, font_size, font_weight))
-                self.text.tag_add("high_freq_warning", "1.0", "1.end")
+        self._shown_color = text_color
+        self._rendered_lines = display_content
 
         # 重新禁用编辑
         self.text.config(state='disabled')
@@ -1800,122 +4769,181 @@ class FloatingLogViewer(tk.Tk):
         # 更新状态记录
         if content_changed:
             self.last_change_time = current_time
-            self._prev_content = display_content
             
         # 清除强制更新标志
-        if hasattr(self, '_force_update'):
-            delattr(self, '_force_update')
-            
+        self._force_update = False
+        
+        # 推送状态变化到本地状态服务
+        self._publish_status()
+
+    def _publish_status(self):
+        """将读取器状态发布到本地状态服务（未启用时不做任何处理）"""
+        if self.status_server is None or self.reader is None:
+            return
+        state = self.reader.get_state()
+        state["last_change_time"] = self.last_change_time.isoformat(timespec='seconds')
+        self.status_server.publish(state)
+
+    def _configure_line_tags(self):
+        """按当前渲染设置配置各样式标签（状态行、日志级别、告警规则），整屏重绘时调用"""
+        render = self.config.settings.render
+        font_config = render.header_font
+        self.text.tag_configure("config_header", foreground=render.status_header_color, font=font_config)
+        self.text.tag_configure("task_header",
+                                foreground=render.task_header_color,
+                                font=font_config,
+                                relief=tk.RIDGE,
+                                borderwidth=2)
+        self.text.tag_configure("high_freq_warning", foreground=self.high_freq_color, font=font_config)
+        
+        # 日志级别颜色（配置值留空的级别不着色）
+        self._level_tags = {}
+        for level, color in render.level_colors:
+            self._level_tags[level] = f"level_{LEVEL_COLOR_KEYS[level]}"
+            self.text.tag_configure(self._level_tags[level], foreground=color)
+        
+        # 告警规则颜色（与告警引擎的规则顺序一致）
+        if self.alert_engine is not None:
+            for index, color in enumerate(render.alert_colors):
+                self.text.tag_configure(f"alert_{index}", foreground=color)
+
+    def _content_line_tag(self, level, rule_index):
+        """日志行的样式标签 - 告警规则高亮优先，其次按日志级别，都不适用时返回 None"""
+        if rule_index is not None:
+            return f"alert_{rule_index}"
+        return self._level_tags.get(level)
+
+    def _render_rows(self, rows, header_count):
+        """把 [(文本, 样式标签)] 写入文本区域 - 只改写变化的状态行，日志区域按滚动删除顶部行、追加新行
+
+        样式标签只应用到新写入的行，每个标签每帧合并为一次 tag_add 调用
+        """
+        old_rows = self._text_rows
+        if old_rows is None or header_count != self._text_header_count or not header_count:
+            # 整屏重绘：首帧、样式切换、搜索结束、状态行数变化或错误提示
+            self.text.delete(1.0, tk.END)
+            self.text.insert(tk.END, '\n'.join(text for text, _ in rows))
+            self._configure_line_tags()
+            new_lines = range(1, len(rows) + 1)
+        else:
+            new_lines = []
+            # 状态行：逐行替换发生变化的行
+            for line_num, (old_row, row) in enumerate(zip(old_rows, rows[:header_count]), 1):
+                if old_row != row:
+                    if old_row[1]:
+                        self.text.tag_remove(old_row[1], f"{line_num}.0", f"{line_num}.end")
+                    self.text.delete(f"{line_num}.0", f"{line_num}.end")
+                    self.text.insert(f"{line_num}.0", row[0])
+                    new_lines.append(line_num)
             
-        # 动态调整窗口高度
-        if self.dynamic_height:
-            try:
-                total_lines = int(self.text.index('end-1c').split('.')[0])
-                line_height = tkfont.Font(font=self.text['font']).metrics('linespace')
-                max_lines =  self.display_lines+2
-                new_height = self.max_height
-                
-                new_height = min(total_lines, max_lines) * line_height
-                new_height = min(new_height, self.max_height)  # 限制不能超过 max_height
+            # 日志区域：删除滚出顶部的行和末尾变化的行，追加新行
+            drop, keep = plan_scroll_update(old_rows[header_count:], rows[header_count:])
+            if keep:
+                self.text.delete(f"{header_count + drop + keep}.end", tk.END)
+                if drop:
+                    self.text.delete(f"{header_count + 1}.0", f"{header_count + drop + 1}.0")
+            else:
+                self.text.delete(f"{header_count}.end", tk.END)
+            added = rows[header_count + keep:]
+            if added:
+                self.text.insert(tk.END, '\n' + '\n'.join(text for text, _ in added))
+            new_lines.extend(range(header_count + keep + 1, len(rows) + 1))
+        
+        # 按标签合并新写入行的区间，每个标签只调用一次 tag_add
+        tag_ranges = {}
+        for line_num in new_lines:
+            tag = rows[line_num - 1][1]
+            if tag:
+                tag_ranges.setdefault(tag, []).extend((f"{line_num}.0", f"{line_num}.end"))
+        for tag, ranges in tag_ranges.items():
+            self.text.tag_add(tag, *ranges)
+        
+        self._text_rows = rows
+        self._text_header_count = header_count
 
-                current_x = self.winfo_x()
-                current_y = self.winfo_y()
-                self.geometry(f"{self.current_width}x{int(new_height)}+{current_x}+{current_y}")
-            except Exception as e:
-                logging.error(f"动态调整窗口高度失败: {str(e)}")
+    def _truncate_status_lines(self, content, status_lines):
+        """按像素宽度截断前 status_lines 行状态行，确保不换行，超出部分以省略号代替
 
-    def _truncate_status_lines(self, content):
-        """截断状态行，确保不换行"""
+        任务行保留标题和任务类型，从任务名中间省略，保留区分度最高的结尾部分
+        """
         if not content or len(content) < 2:
             return content
-            
-        # 确定状态行数
-        status_lines = 2  # 默认：配置组行 + 任务行
-        if content and content[0].startswith("⚠️"):
-            status_lines = 3  # 高频警告行 + 配置组行 + 任务行
-        
-        # 对状态行进行硬截断
-        truncated_content = []
-        for i, line in enumerate(content):
-            if i < status_lines:
-                # 状态行：硬截断到 max_width 字符数（估算）
-                max_chars = self.max_width // 8  # 估算字符数
-                if len(line) > max_chars:
-                    truncated_content.append(line[:max_chars])
-                else:
-                    truncated_content.append(line)
+        try:
+            self._get_layout_font()
+        except Exception as e:
+            logging.error(f"状态行截断失败: {str(e)}")
+            return content
+        
+        available_width = self.max_width - 2  # 与宽度计算相同的2像素边距
+        truncated_content = list(content)
+        for i in range(min(status_lines, len(content))):
+            line = content[i]
+            if i == status_lines - 1:
+                # 任务行："[当前任务] [进度] 任务类型: 任务名"
+                type_end = line.find(": ")
+                keep = type_end + 2 if type_end >= 0 else 0
+                truncated_content[i] = self._glyph_widths.elide_middle(line, available_width, keep)
             else:
-                # 日志内容行：保持原样，由换行逻辑处理
-                truncated_content.append(line)
-                
+                truncated_content[i] = self._glyph_widths.fit(line, available_width)
+        # 日志内容行保持原样，由换行逻辑处理
         return truncated_content
 
-    def _adjust_window_width(self, content):
-        """根据内容动态调整窗口尺寸 - 自适应宽度"""
+    def _get_layout_font(self):
+        """获取布局计算使用的字体 - 按当前设置对象缓存（样式切换时设置对象整体替换），同时缓存行高"""
+        settings = self.config.settings
+        
+        # 设置对象或字体族变化时才重新读取文本组件的字体
+        if self._font_cache is None or self._last_font_config != (settings, self._font_family):
+            import tkinter.font as tkfont
+            self._font_cache = tkfont.Font(font=self.text['font'])
+            self._last_font_config = (settings, self._font_family)
+            self._line_height = self._font_cache.metrics('linespace')
+            self._glyph_widths = GlyphWidthTable(self._font_cache)
+            logging.debug("字体缓存已更新")
+        return self._font_cache
+
+    def _compute_window_width(self, content):
+        """根据内容计算窗口宽度 - 自适应宽度（只计算，不修改窗口）"""
         # 如果启用自动换行，固定宽度为 max_width
-        if self.config.get("auto_wrap", False):
-            new_width = self.max_width
-            if new_width != self.current_width:
-                self.current_width = new_width
-                current_x = self.winfo_x()
-                current_y = self.winfo_y()
-                self.geometry(f"{new_width}x{self.max_height}+{current_x}+{current_y}")
-            return
-        if not content:
-            return
+        if self.config.settings.layout.auto_wrap:
+            return self.max_width
+        if not content or not any(content):
+            return self.current_width
         try:
-            # 使用字体缓存优化性能
-            current_font_config = self.text['font']
-            
-            # 检查字体配置是否发生变化
-            if (self._font_cache is None or 
-                self._last_font_config != current_font_config):
-                
-                self._font_cache = tk.font.Font(font=current_font_config)
-                self._last_font_config = current_font_config
-                logging.debug("字体缓存已更新")
-            
-            font = self._font_cache
-            max_width = 0
-            
-            # 计算每行文本的像素宽度
-            for line in content:
-                line_width = font.measure(line)
-                if line_width > max_width:
-                    max_width = line_width
-            
-            # 添加边距（左右各4像素）
-            max_width += 2# 8像素边距
-            
-            # 应用宽度限制（使用max_width作为最大宽度）
-            max_width = min(max_width, self.max_width)
-                
-            # 检查是否需要调整宽度
-            if max_width != self.current_width:
-                self.current_width = max_width
-                
-                # 使用当前窗口位置，而不是初始位置
-                current_x = self.winfo_x()
-                current_y = self.winfo_y()
-                self.geometry(f"{max_width}x{self.max_height}+{current_x}+{current_y}")
-
+            # 计算每行文本的像素宽度，加2像素边距
+            font = self._get_layout_font()
+            width = max(font.measure(line) for line in content) + 2
         except Exception as e:
             logging.error(f"宽度计算失败: {str(e)}")
-            self._fallback_width_calculation(content)
-
-
-    def _fallback_width_calculation(self, content):
-        """回退的宽度计算方法（当主要方法失败时使用）"""
-        if content and any(content):  # 确保content有实际内容
-            max_chars = max(len(line) for line in content)
-            new_width = max_chars * 8 + 2# 8像素边距  # 估算字符宽度
-            new_width = min(new_width, self.max_width)  # 不超过最大宽度
-            if new_width != self.current_width:
-                self.current_width = new_width
-                # 使用当前窗口位置
-                current_x = self.winfo_x()
-                current_y = self.winfo_y()
-                self.geometry(f"{new_width}x{self.max_height}+{current_x}+{current_y}")
+            # 回退：按每个字符8像素估算
+            width = max(len(line) for line in content) * 8 + 2
+        
+        # 应用宽度限制（使用max_width作为最大宽度）
+        return min(width, self.max_width)
+
+    def _compute_window_height(self, content):
+        """根据显示行数计算窗口高度 - 未启用动态高度时固定为 max_height"""
+        if not self.dynamic_height:
+            return self.max_height
+        try:
+            self._get_layout_font()
+            # 读取器已按窗口宽度完成换行，每个元素就是一个显示行
+            visible_lines = max(min(len(content), self.display_lines + self._status_line_count), 1)
+            return min(visible_lines * self._line_height, self.max_height)  # 限制不能超过 max_height
+        except Exception as e:
+            logging.error(f"动态调整窗口高度失败: {str(e)}")
+            return self.current_height
+
+    def _apply_layout(self, content):
+        """单次布局 - 计算最终宽高，只在尺寸确实变化时调用一次 geometry
+
+        只设置尺寸不设置位置，窗口保持在原处，也不需要查询当前坐标
+        """
+        width = self._compute_window_width(content)
+        height = self._compute_window_height(content)
+        if (width, height) != (self.current_width, self.current_height):
+            self.current_width, self.current_height = width, height
+            self.geometry(f"{width}x{height}")
 
     def destroy(self):
         """安全关闭程序 - 保存窗口位置和状态到config.txt"""
@@ -1924,9 +4952,39 @@ class FloatingLogViewer(tk.Tk):
         if hasattr(self, 'shortcut_manager'):
             self.shortcut_manager.stop_listening()
         
+        # 停止搜索索引线程
+        if self.search_index is not None:
+            self.search_index.stop()
+        
+        # 停止本地状态服务、指标导出、事件存储和告警引擎
+        if self.status_server is not None:
+            self.status_server.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        if self.event_store is not None:
+            self.event_store.stop()
+        if self.alert_engine is not None:
+            self.alert_engine.stop()
+        
+        # 性能分析进行中时保存已收集的结果
+        self.profiler.stop()
+        
         # 确保禁用鼠标穿透
         self._set_window_click_through(False)
         
+        # 启动耗时测量模式下不改写配置文件
+        if self.measure_startup:
+            self.monitor_running = False
+            super().destroy()
+            return
+        
+        # 保存状态快照，下次启动时立即显示
+        self._save_snapshot()
+        
+        # 保存本次测量的字形宽度（配置了度量文件时），下次换行无需再测量字体
+        if self.reader is not None:
+            self.reader.save_glyph_metrics()
+        
         # 使用当前窗口位置
         current_x = self.winfo_x()
         current_y = self.winfo_y()
@@ -1936,19 +4994,1007 @@ class FloatingLogViewer(tk.Tk):
         self.monitor_running = False
         super().destroy()
 
+class TerminalLogViewer:
+    """终端日志查看器 - 基于curses渲染与悬浮窗相同的状态行和日志行"""
+    
+    # curses 基础颜色编号：BLACK=0 RED=1 GREEN=2 YELLOW=3 BLUE=4 MAGENTA=5 CYAN=6 WHITE=7
+    PAIR_NORMAL = 1
+    PAIR_STALE = 2
+    PAIR_HIGH_FREQ = 3
+    PAIR_STATUS_HEADER = 4
+    PAIR_TASK_HEADER = 5
+    PAIR_ALERT = 6
+    PAIR_LEVEL_COLORS = {"error_color": 7, "warning_color": 8, "debug_color": 9}  # 日志级别着色
+    
+    def __init__(self, config, max_frames=None, refresh_interval=None):
+        self.config = config
+        self.max_frames = max_frames  # 渲染指定帧数后退出（基准测试用）
+        self.refresh_interval = refresh_interval or config.get("refresh_interval", 1000)
+        self.measurer = CellWidthMeasurer()
+        
+        self.reader = None
+        self.status_server = None
+        self.metrics = None
+        self.metrics_exporter = None
+        self.event_store = None
+        self.alert_engine = None
+        self.profiler = RuntimeProfiler(self.config.get("profile_seconds", 30))  # 按需性能分析（p 键）
+        self._level_pairs = {}  # 日志级别 -> 颜色对编号（只包含配置了颜色的级别）
+        self._rows = []  # 上一帧已绘制的行 (文本, 属性)
+        self._shown_generations = None  # 已显示的读取器版本号
+        self._shown_text_attr = None  # 已显示的日志文本属性
+        self.last_change_time = datetime.now()  # 最后内容变更时间
+        
+        # 帧统计
+        self.frame_count = 0
+        self.total_frame_time = 0.0
+    
+    def run(self):
+        """启动终端前端 - curses 运行期间暂存控制台日志，退出后再输出"""
+        try:
+            import curses
+        except ImportError:
+            logging.error("当前环境不支持 curses，无法启动终端前端")
+            return
+        
+        import logging.handlers
+        root_logger = logging.getLogger()
+        console_handlers = list(root_logger.handlers)
+        buffer_handler = logging.handlers.MemoryHandler(capacity=1000, flushLevel=logging.CRITICAL + 1)
+        for handler in console_handlers:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(buffer_handler)
+        
+        self.status_server = start_status_server(self.config)
+        self.metrics, self.metrics_exporter = start_metrics_exporter(self.config)
+        self.event_store = start_event_store(self.config)
+        self.alert_engine = start_alert_engine(self.config)
+        try:
+            curses.wrapper(self._main)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.status_server is not None:
+                self.status_server.stop()
+            if self.metrics_exporter is not None:
+                self.metrics_exporter.stop()
+            if self.event_store is not None:
+                self.event_store.stop()
+            if self.alert_engine is not None:
+                self.alert_engine.stop()
+            self.profiler.stop()
+            root_logger.removeHandler(buffer_handler)
+            for handler in console_handlers:
+                root_logger.addHandler(handler)
+                buffer_handler.setTarget(handler)
+            buffer_handler.flush()
+            buffer_handler.close()
+        
+        if self.frame_count:
+            average_ms = self.total_frame_time / self.frame_count * 1000
+            logging.info(f"终端前端退出 - 共渲染 {self.frame_count} 帧, 平均每帧 {average_ms:.2f} ms")
+    
+    def _create_reader(self, columns, rows):
+        """根据终端尺寸创建日志读取器"""
+        initial_log_config = self.config.get_initial_log_config()
+        reader_settings = self.config.settings.reader
+        # 终端可用行数需扣除状态行（最多3行，显示日志速率时再加1行）
+        status_rows = 4 if reader_settings.show_level_rates else 3
+        display_lines = max(1, min(reader_settings.display_lines, rows - status_rows))
+        
+        self.reader = SmartLogReader(
+            initial_log_config["log_path"],
+            initial_log_config["log_filename_prefix"],
+            initial_log_config["log_path_configured"],
+            display_lines,
+            reader_settings.skip_debug_log,
+            False,  # 终端中不需要自适应高度
+            reader_settings.auto_wrap,
+            columns - 1,  # 保留最后一列，避免写入右下角时报错
+            None,
+            measurer=self.measurer,
+            metrics=self.metrics,
+            rate_rules=self.config.get_rate_rules(),
+            event_sink=self.event_store,
+            pattern_matcher=LogPatternMatcher(self.config.get_user_patterns()),
+            collapse_repeats=reader_settings.collapse_repeats,
+            alert_engine=self.alert_engine,
+            level_rates=reader_settings.show_level_rates
+        )
+    
+    def _init_colors(self, curses):
+        """将配置中的十六进制颜色映射为 curses 基础颜色"""
+        if not curses.has_colors():
+            return
+        
+        curses.start_color()
+        try:
+            curses.use_default_colors()
+            background = -1
+        except curses.error:
+            background = curses.COLOR_BLACK
+        
+        color_keys = {
+            self.PAIR_NORMAL: "normal_color",
+            self.PAIR_STALE: "stale_color",
+            self.PAIR_HIGH_FREQ: "high_freq_color",
+            self.PAIR_STATUS_HEADER: "status_header_color",
+            self.PAIR_TASK_HEADER: "task_header_color",
+            self.PAIR_ALERT: "alert_color",
+        }
+        for pair_number, key in color_keys.items():
+            curses.init_pair(pair_number, self._hex_to_curses_color(self.config.get(key, "#FFFFFF")), background)
+        
+        # 日志级别颜色（配置值留空的级别使用普通文字颜色）
+        for key, pair_number in self.PAIR_LEVEL_COLORS.items():
+            if self.config.get(key, ""):
+                curses.init_pair(pair_number, self._hex_to_curses_color(self.config.get(key)), background)
+        self._level_pairs = {level: self.PAIR_LEVEL_COLORS[key] for level, key in LEVEL_COLOR_KEYS.items()
+                             if self.config.get(key, "")}
+    
+    @staticmethod
+    def _hex_to_curses_color(hex_color):
+        """十六进制颜色转换为最接近的 curses 基础颜色编号"""
+        try:
+            value = hex_color.lstrip('#')
+            red, green, blue = (int(value[i:i + 2], 16) for i in (0, 2, 4))
+        except (ValueError, AttributeError):
+            return 7  # 无法解析时使用白色
+        # curses 基础颜色编号按 RGB 三个比特位排列
+        return (red > 127) * 1 + (green > 127) * 2 + (blue > 127) * 4
+    
+    def _main(self, stdscr):
+        """curses 主循环"""
+        import curses
+        
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        self._init_colors(curses)
+        stdscr.timeout(self.refresh_interval)
+        
+        rows, columns = stdscr.getmaxyx()
+        self._create_reader(columns, rows)
+        if self.config.get("profile_on_start", False):
+            self.profiler.start()
+        
+        while True:
+            frame_start = time.perf_counter()
+            if self.profiler.active:
+                self.profiler.run(lambda: self._render_frame(stdscr, curses, rows, columns))
+            else:
+                self._render_frame(stdscr, curses, rows, columns)
+            frame_seconds = time.perf_counter() - frame_start
+            self.total_frame_time += frame_seconds
+            if self.metrics is not None:
+                self.metrics.record_tick(frame_seconds)
+            self.frame_count += 1
+            if self.alert_engine is not None and self.alert_engine.take_bell():
+                curses.beep()
+            
+            if self.max_frames is not None and self.frame_count >= self.max_frames:
+                break
+            
+            key = stdscr.getch()
+            if key in (ord('q'), ord('Q'), 27):  # q 或 Esc 退出
+                break
+            if key in (ord('p'), ord('P')):  # p 开始/结束性能分析
+                self.profiler.toggle()
+            if key == curses.KEY_RESIZE:
+                # 终端尺寸变化：按新尺寸重建读取器并整屏重绘
+                rows, columns = stdscr.getmaxyx()
+                self._create_reader(columns, rows)
+                self._rows = []
+                self._shown_generations = None
+                stdscr.erase()
+    
+    def _build_rows(self, curses):
+        """构建本帧要显示的行及其属性，内容和颜色都未变化时返回 None"""
+        new_content = self.reader.get_content()
+        
+        if self.reader.is_error_content(new_content):
+            error_attr = curses.color_pair(self.PAIR_STALE)
+            return [(line, error_attr) for line in new_content]
+        
+        # 日志内容版本号变化时更新最后变更时间
+        current_time = datetime.now()
+        generations = self.reader.get_generations()
+        if self._shown_generations is None or generations[0] != self._shown_generations[0]:
+            self.last_change_time = current_time
+        
+        # 确定文本颜色（优先级：高频警告 > 超时警告 > 正常）
+        # 频率告警按日志时间结束；日志停止更新超过最长检测窗口时不再显示
+        stale_seconds = (current_time - self.last_change_time).total_seconds()
+        rate_warning = self.reader.high_frequency_warning and stale_seconds <= self.reader.max_rate_window
+        if rate_warning:
+            text_attr = curses.color_pair(self.PAIR_HIGH_FREQ)
+        elif stale_seconds > 60:
+            text_attr = curses.color_pair(self.PAIR_STALE)
+        else:
+            text_attr = curses.color_pair(self.PAIR_NORMAL)
+        
+        if generations == self._shown_generations and text_attr == self._shown_text_attr:
+            return None
+        self._shown_generations = generations
+        self._shown_text_attr = text_attr
+        
+        if self.status_server is not None:
+            state = self.reader.get_state()
+            state["last_change_time"] = self.last_change_time.isoformat(timespec='seconds')
+            self.status_server.publish(state)
+        
+        status_lines = self.reader.get_status_lines(rate_warning)
+        header_attrs = [curses.color_pair(self.PAIR_STATUS_HEADER) | curses.A_BOLD,
+                        curses.color_pair(self.PAIR_TASK_HEADER) | curses.A_BOLD]
+        if self.reader.rate_line is not None:
+            header_attrs.insert(0, header_attrs[0])  # 日志速率行与配置组行使用相同样式
+        if rate_warning:
+            header_attrs.insert(0, curses.color_pair(self.PAIR_HIGH_FREQ) | curses.A_BOLD)
+        
+        # 日志行颜色：告警规则高亮 > 日志级别 > 当前文本颜色
+        alert_attr = curses.color_pair(self.PAIR_ALERT)
+        level_attrs = {level: curses.color_pair(pair) for level, pair in self._level_pairs.items()}
+        content_rows = []
+        for line, level, rule_index in zip(new_content, self.reader.get_content_levels(),
+                                           self.reader.get_content_alert_rules()):
+            if rule_index is not None:
+                content_rows.append((line, alert_attr))
+            else:
+                content_rows.append((line, level_attrs.get(level, text_attr)))
+        return list(zip(status_lines, header_attrs)) + content_rows
+    
+    def _render_frame(self, stdscr, curses, rows, columns):
+        """渲染一帧 - 只重绘发生变化的行"""
+        new_rows = self._build_rows(curses)
+        if new_rows is None:
+            return  # 读取器版本号和颜色都未变化，跳过整帧
+        new_rows = new_rows[:rows]
+        
+        for index in range(max(len(new_rows), len(self._rows))):
+            row = new_rows[index] if index < len(new_rows) else None
+            if index < len(self._rows) and self._rows[index] == row:
+                continue  # 行未变化，跳过
+            
+            try:
+                stdscr.move(index, 0)
+                stdscr.clrtoeol()
+                if row is not None:
+                    text, attr = row
+                    stdscr.addstr(index, 0, self.measurer.truncate(text, columns - 1), attr)
+            except curses.error:
+                pass  # 终端过小时忽略越界写入
+        
+        self._rows = new_rows
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+
+# 事件类型编码（列式事件存储使用）
+EVENT_KIND_CODES = {"task_start": 0, "config_start": 1, "config_end": 2, "progress": 3, "error": 4}
+
+
+class EventColumns:
+    """列式事件存储 - 将事件按固定大小分块保存为紧凑的类型化数组
+
+    每块包含五列：时间戳(毫秒)、类型编码、任务编号、当前值、总数（没有进度值的事件为 NaN）；
+    可以序列化，进程池返回后按文件顺序合并
+    """
+    
+    CHUNK_SIZE = 65536
+    COLUMN_TYPES = ('q', 'B', 'I', 'd', 'd')  # int64, uint8, uint32, float64, float64
+    
+    def __init__(self):
+        self.task_names = []  # 任务编号 -> 任务名
+        self._task_ids = {}
+        self.chunks = []      # 每块为五列数组组成的元组
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def task_id(self, name):
+        """获取任务名对应的编号（首次出现时分配）"""
+        task_id = self._task_ids.get(name)
+        if task_id is None:
+            task_id = self._task_ids[name] = len(self.task_names)
+            self.task_names.append(name)
+        return task_id
+    
+    def append(self, timestamp_ms, kind, task, current=math.nan, total=math.nan):
+        """追加一个事件（按时间顺序）"""
+        if not self.chunks or len(self.chunks[-1][0]) >= self.CHUNK_SIZE:
+            self.chunks.append(tuple(array(code) for code in self.COLUMN_TYPES))
+        timestamps, kinds, tasks, currents, totals = self.chunks[-1]
+        timestamps.append(timestamp_ms)
+        kinds.append(EVENT_KIND_CODES[kind])
+        tasks.append(self.task_id(task or ""))
+        currents.append(math.nan if current is None else current)
+        totals.append(math.nan if total is None else total)
+        self._size += 1
+    
+    def merge(self, other):
+        """合并紧随其后的事件（任务编号按名称重新映射）"""
+        mapping = [self.task_id(name) for name in other.task_names]
+        for timestamps, kinds, tasks, currents, totals in other.chunks:
+            self.chunks.append((timestamps, kinds, array('I', map(mapping.__getitem__, tasks)), currents, totals))
+        self._size += len(other)
+        return self
+    
+    def columns(self):
+        """返回拼接后的五列 - NumPy 可用时为 ndarray（零拷贝读取各块），否则为 array"""
+        if NUMPY_AVAILABLE:
+            np = get_numpy()
+            dtypes = (np.int64, np.uint8, np.uint32, np.float64, np.float64)
+            return tuple(
+                np.concatenate([np.frombuffer(chunk[i], dtype=dtype) for chunk in self.chunks])
+                if self.chunks else np.empty(0, dtype=dtype)
+                for i, dtype in enumerate(dtypes)
+            )
+        columns = tuple(array(code) for code in self.COLUMN_TYPES)
+        for chunk in self.chunks:
+            for column, part in zip(columns, chunk):
+                column.extend(part)
+        return columns
+
+
+class TimelineStats:
+    """时间线统计 - 基于列式事件计算运行时长、进度速率、分位数和直方图
+
+    NumPy 可用时全部使用向量化运算；未安装时逐条计算，结果相同
+    """
+    
+    def __init__(self, events):
+        self.task_names = events.task_names
+        self.timestamps, self.kinds, self.tasks, self.currents, self.totals = events.columns()
+        self.vectorized = NUMPY_AVAILABLE
+    
+    def task_durations(self):
+        """已结束的任务运行时长（毫秒）- 从任务开始到下一个任务开始或配置组结束，返回 (任务编号, 时长)"""
+        task_code, end_code = EVENT_KIND_CODES["task_start"], EVENT_KIND_CODES["config_end"]
+        if self.vectorized:
+            np = get_numpy()
+            mask = (self.kinds == task_code) | (self.kinds == end_code)
+            timestamps, kinds, tasks = self.timestamps[mask], self.kinds[mask], self.tasks[mask]
+            starts = kinds[:-1] == task_code
+            return tasks[:-1][starts], np.diff(timestamps)[starts]
+        
+        tasks, durations = [], []
+        previous = None  # (任务编号, 开始时间)
+        for timestamp, kind, task in zip(self.timestamps, self.kinds, self.tasks):
+            if kind != task_code and kind != end_code:
+                continue
+            if previous is not None:
+                tasks.append(previous[0])
+                durations.append(timestamp - previous[1])
+            previous = (task, timestamp) if kind == task_code else None
+        return tasks, durations
+    
+    def progress_rates(self):
+        """同一任务相邻两次进度之间的速率（每分钟完成数，只统计时间和进度都增加的区间），返回 (任务编号, 速率)"""
+        progress_code = EVENT_KIND_CODES["progress"]
+        if self.vectorized:
+            np = get_numpy()
+            mask = (self.kinds == progress_code) & ~np.isnan(self.currents)
+            timestamps, tasks, currents = self.timestamps[mask], self.tasks[mask], self.currents[mask]
+            order = self._group_order(tasks)  # 按任务分组，组内保持时间顺序
+            timestamps, tasks, currents = timestamps[order], tasks[order], currents[order]
+            elapsed = np.diff(timestamps)
+            advanced = np.diff(currents)
+            valid = (tasks[1:] == tasks[:-1]) & (elapsed > 0) & (advanced > 0)
+            return tasks[1:][valid], advanced[valid] / elapsed[valid] * 60000
+        
+        tasks, rates = [], []
+        last_progress = {}  # 任务编号 -> (时间, 当前值)
+        for timestamp, kind, task, current in zip(self.timestamps, self.kinds, self.tasks, self.currents):
+            if kind != progress_code or math.isnan(current):
+                continue
+            if task in last_progress:
+                elapsed = timestamp - last_progress[task][0]
+                advanced = current - last_progress[task][1]
+                if elapsed > 0 and advanced > 0:
+                    tasks.append(task)
+                    rates.append(advanced / elapsed * 60000)
+            last_progress[task] = (timestamp, current)
+        return tasks, rates
+    
+    def _group_order(self, tasks):
+        """按任务编号稳定排序的下标（任务数不超过65536时转为16位整数，NumPy 会使用基数排序）"""
+        np = get_numpy()
+        if len(self.task_names) <= 65536:
+            tasks = tasks.astype(np.uint16)
+        return np.argsort(tasks, kind='stable')
+
+    def percentiles(self, values, percents):
+        """计算分位数（线性插值，与 numpy.percentile 默认方式一致），空数据返回 NaN"""
+        if len(values) == 0:
+            return [math.nan] * len(percents)
+        if self.vectorized:
+            return [float(v) for v in get_numpy().percentile(values, percents)]
+        ordered = sorted(values)
+        result = []
+        for percent in percents:
+            position = (len(ordered) - 1) * percent / 100
+            lower = int(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            result.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+        return result
+    
+    def histogram(self, values, edges):
+        """按给定边界统计直方图（左闭右开，最后一个区间包含右边界），返回各区间计数"""
+        if self.vectorized:
+            return [int(c) for c in get_numpy().histogram(values, bins=edges)[0]]
+        counts = [0] * (len(edges) - 1)
+        for value in values:
+            if edges[0] <= value <= edges[-1]:
+                counts[min(bisect_right(edges, value), len(edges) - 1) - 1] += 1
+        return counts
+    
+    def summarize_by_task(self, tasks, values, percents=(50, 90)):
+        """按任务汇总 - 返回 {任务名: (次数, 分位数列表)}"""
+        summary = {}
+        if self.vectorized:
+            np = get_numpy()
+            order = self._group_order(tasks)
+            tasks, values = tasks[order], values[order]
+            boundaries = np.flatnonzero(np.diff(tasks)) + 1
+            for group_tasks, group_values in zip(np.split(tasks, boundaries), np.split(values, boundaries)):
+                if len(group_values):
+                    summary[self.task_names[group_tasks[0]]] = (len(group_values), self.percentiles(group_values, percents))
+            return summary
+        
+        groups = {}
+        for task, value in zip(tasks, values):
+            groups.setdefault(task, []).append(value)
+        for task, group_values in groups.items():
+            summary[self.task_names[task]] = (len(group_values), self.percentiles(group_values, percents))
+        return summary
+
+
+def _naive_timeline_stats(records, edges, percents=(50, 90)):
+    """逐条记录的朴素实现（基准测试对照）- 记录为字典列表"""
+    durations = {}
+    previous = None
+    for record in records:
+        if record["kind"] not in ("task_start", "config_end"):
+            continue
+        if previous is not None:
+            durations.setdefault(previous["task"], []).append(record["ts"] - previous["ts"])
+        previous = record if record["kind"] == "task_start" else None
+    
+    rates = {}
+    last_progress = {}
+    for record in records:
+        if record["kind"] != "progress" or record["current"] is None:
+            continue
+        last = last_progress.get(record["task"])
+        if last is not None:
+            elapsed = record["ts"] - last["ts"]
+            advanced = record["current"] - last["current"]
+            if elapsed > 0 and advanced > 0:
+                rates.setdefault(record["task"], []).append(advanced / elapsed * 60000)
+        last_progress[record["task"]] = record
+    
+    def percentile_list(values):
+        ordered = sorted(values)
+        result = []
+        for percent in percents:
+            position = (len(ordered) - 1) * percent / 100
+            lower = int(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            result.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+        return result
+    
+    histogram = [0] * (len(edges) - 1)
+    for values in durations.values():
+        for value in values:
+            for i in range(len(edges) - 1):
+                if edges[i] <= value < edges[i + 1] or (i == len(edges) - 2 and value == edges[-1]):
+                    histogram[i] += 1
+                    break
+    return ({task: (len(v), percentile_list(v)) for task, v in durations.items()},
+            {task: (len(v), percentile_list(v)) for task, v in rates.items()},
+            histogram)
+
+
+# 运行时长直方图区间（毫秒）
+DURATION_HISTOGRAM_EDGES = [0, 10000, 30000, 60000, 300000, 900000, 3600000, 86400000]
+DURATION_HISTOGRAM_LABELS = ["<10秒", "10-30秒", "30秒-1分", "1-5分", "5-15分", "15分-1小时", ">1小时"]
+
+
+def benchmark_timeline_stats(event_count=1000000, seed=1):
+    """基准测试：合成一天的任务/进度事件，比较列式统计与逐条记录实现的耗时并校验结果一致"""
+    import random
+    rng = random.Random(seed)
+    
+    # 合成一天的事件：约每20秒切换一次任务，任务期间每1~5秒输出一次进度，偶尔结束配置组或出错
+    events = EventColumns()
+    records = []
+    timestamp = 0
+    task = None
+    current = 0
+    task_names = [f"JS脚本: 任务{i}" for i in range(200)]
+    for _ in range(event_count):
+        roll = rng.random()
+        if task is None or roll < 0.05:
+            kind, task, current = "task_start", rng.choice(task_names), 0
+            timestamp += rng.randint(100, 2000)
+        elif roll < 0.052:
+            kind = "config_end"
+        elif roll < 0.06:
+            kind = "error"
+        else:
+            kind = "progress"
+            current += rng.randint(0, 2)
+        timestamp += rng.randint(50, 150)
+        progress_value = current if kind == "progress" else None
+        events.append(timestamp, kind, task, progress_value, 100 if progress_value is not None else None)
+        records.append({"ts": timestamp, "kind": kind, "task": task, "current": progress_value})
+        if kind == "config_end":
+            task = None
+    
+    start = time.perf_counter()
+    naive_durations, naive_rates, naive_histogram = _naive_timeline_stats(records, DURATION_HISTOGRAM_EDGES)
+    naive_seconds = time.perf_counter() - start
+    
+    if NUMPY_AVAILABLE:
+        get_numpy()  # 导入耗时不计入统计耗时
+    start = time.perf_counter()
+    stats = TimelineStats(events)
+    duration_tasks, durations = stats.task_durations()
+    rate_tasks, rates = stats.progress_rates()
+    duration_summary = stats.summarize_by_task(duration_tasks, durations)
+    rate_summary = stats.summarize_by_task(rate_tasks, rates)
+    histogram = stats.histogram(durations, DURATION_HISTOGRAM_EDGES)
+    columnar_seconds = time.perf_counter() - start
+    
+    def close(a, b):
+        return a.keys() == b.keys() and all(
+            a[k][0] == b[k][0] and all(math.isclose(x, y, rel_tol=1e-9) for x, y in zip(a[k][1], b[k][1])) for k in a)
+    matches = (close(duration_summary, naive_durations) and close(rate_summary, naive_rates)
+               and histogram == naive_histogram)
+    
+    mode = "NumPy 向量化" if stats.vectorized else "逐条计算（NumPy 未安装）"
+    print(f"时间线统计基准：{len(events)} 个事件，{mode}")
+    print(f"  逐条记录实现: {naive_seconds * 1000:.1f} ms")
+    print(f"  列式统计:     {columnar_seconds * 1000:.1f} ms（{naive_seconds / columnar_seconds:.1f} 倍）")
+    print(f"  结果一致: {'是' if matches else '否'}")
+    return 0 if matches else 1
+
+
+def benchmark_layout(line_count=20000, max_width=460, metrics_file=None, seed=1, font_config=None):
+    """基准测试：合成中英文混合的日志行，比较布局引擎与逐次测量字符串的换行实现并校验结果一致
+
+    有图形界面时按原读取器的方式对照：逐次测量实现每个候选字符串都调用 Tk 字体测量，
+    布局引擎从空的字形宽度表开始（计入首次测量每个字符的开销）；
+    无图形界面时两者共用同一张字形宽度表（度量文件或终端单元格宽度），只比较换行算法本身
+    """
+    import random
+    rng = random.Random(seed)
+    
+    font_config = font_config or {}
+    root = None
+    if TK_AVAILABLE:
+        try:
+            import tkinter.font as tkfont
+            root = tk.Tk()
+            root.withdraw()
+            font = tkfont.Font(root=root, family=font_config.get("font_name", "Consolas"),
+                               size=font_config.get("font_size", 11), weight=font_config.get("font_weight", "normal"))
+        except tk.TclError as e:
+            logging.info(f"无法创建 Tk 字体，只比较换行算法: {str(e)}")
+            if root is not None:
+                root.destroy()
+                root = None
+    
+    metrics = None
+    if root is not None:
+        naive_font, metrics = font, GlyphWidthTable(font)
+        source = f"Tk 字体 {font_config.get('font_name', 'Consolas')} {font_config.get('font_size', 11)}"
+        naive_label = "逐次测量实现（每次调用字体测量）"
+    elif metrics_file is not None:
+        try:
+            metrics = FileGlyphWidthTable.load(metrics_file)
+            source = f"度量文件 {metrics_file}"
+        except (OSError, ValueError) as e:
+            logging.warning(f"无法加载字形度量文件，改用单元格宽度: {str(e)}")
+    if metrics is None:
+        metrics = FileGlyphWidthTable({}, 8, 16, 16)
+        source = "单元格宽度（半角8像素，全角16像素）"
+    if root is None:
+        # 无字体可测：逐次测量实现也查同一张表，耗时差异只反映换行算法，不含字体测量开销
+        naive_font = metrics
+        naive_label = "逐次测量算法（查表）"
+    
+    # 合成日志行：中文消息、英文单词、路径和偶尔出现的超长无空格字符串
+    words = ["开始执行JS脚本:", "当前进度：", "传送失败，重试", "配置组", "AutoFish", "pathing",
+             "assets/pathing/蒙德/风起地.json", "OK", "→", "执行结束", "Teleport", "完成"]
+    lines = []
+    for index in range(line_count):
+        parts = [rng.choice(words) for _ in range(rng.randint(3, 20))]
+        if rng.random() < 0.05:
+            parts.append("超长" * rng.randint(20, 60))
+        lines.append(f"[{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}.000] [INF] BetterGenshinImpact.Task {' '.join(parts)}")
+    formatted = [LogLayoutEngine.format_line(line) for line in lines]
+    
+    start = time.perf_counter()
+    naive = [wrapped for line in formatted for wrapped in _naive_wrap_line(line, naive_font, max_width)]
+    naive_seconds = time.perf_counter() - start
+    
+    engine = LogLayoutEngine(metrics, max_width, line_count * 100)
+    start = time.perf_counter()
+    result = engine.layout(lines)
+    engine_seconds = time.perf_counter() - start
+    matches = result == naive
+    if root is not None:
+        root.destroy()
+    
+    print(f"换行布局基准：{line_count} 行，宽度 {max_width}，{source}")
+    if root is None:
+        print("  未能创建 Tk 字体：两者使用同一字形宽度表，只比较换行算法，不代表字体测量开销的节省")
+    print(f"  {naive_label}: {naive_seconds * 1000:.1f} ms")
+    print(f"  布局引擎: {engine_seconds * 1000:.1f} ms（{naive_seconds / engine_seconds:.1f} 倍）")
+    print(f"  结果一致: {'是' if matches else '否'}")
+    return 0 if matches else 1
+
+
+class RunStats:
+    """按名称统计的运行段 - 可合并的部分聚合
+
+    每个文件独立统计：首次开始/结束事件之前的“头部”时间段属于上一个文件未结束的运行，
+    文件末尾未结束的运行保留为“尾部”，按文件顺序合并时再连接起来
+    """
+    
+    def __init__(self):
+        self.runs = {}              # 名称 -> [次数, 总时长(毫秒), 失败数]
+        self.seen_event = False     # 是否出现过开始/结束事件
+        self.head_end_ms = None     # 第一个开始/结束事件的时间
+        self.head_failures = 0      # 第一个事件之前的失败数
+        self.open = None            # 未结束的运行 [名称, 开始时间, 失败数]
+        self.last_ms = None         # 最后一条日志的时间
+    
+    def start(self, name, time_ms):
+        """开始新的运行（同时结束当前运行）"""
+        self.end(time_ms)
+        self.open = [name, time_ms, 0]
+    
+    def end(self, time_ms):
+        """结束当前运行"""
+        if not self.seen_event:
+            self.seen_event = True
+            self.head_end_ms = time_ms
+        if self.open is not None:
+            self._add_run(self.open[0], time_ms - self.open[1], self.open[2])
+            self.open = None
+    
+    def failure(self):
+        """记录一次失败，计入当前运行"""
+        if self.open is not None:
+            self.open[2] += 1
+        elif not self.seen_event:
+            self.head_failures += 1
+    
+    def _add_run(self, name, duration_ms, failures, runs=1):
+        stats = self.runs.setdefault(name, [0, 0, 0])
+        stats[0] += runs
+        stats[1] += max(duration_ms, 0)
+        stats[2] += failures
+    
+    def merge(self, other):
+        """合并紧随其后的文件的统计结果"""
+        if self.open is not None:
+            if other.seen_event:
+                # 上一个文件未结束的运行在下一个文件的第一个事件处结束
+                name, start_ms, failures = self.open
+                self._add_run(name, other.head_end_ms - start_ms, failures + other.head_failures)
+                self.open = None
+            else:
+                self.open[2] += other.head_failures
+        elif not self.seen_event:
+            self.seen_event = other.seen_event
+            self.head_end_ms = other.head_end_ms
+            self.head_failures += other.head_failures
+        
+        for name, (runs, duration_ms, failures) in other.runs.items():
+            self._add_run(name, duration_ms, failures, runs)
+        if other.seen_event:
+            self.open = other.open and list(other.open)
+        if other.last_ms is not None:
+            self.last_ms = other.last_ms
+    
+    def finish(self):
+        """统计结束：未结束的运行计算到最后一条日志为止"""
+        if self.open is not None and self.last_ms is not None:
+            name, start_ms, failures = self.open
+            self._add_run(name, self.last_ms - start_ms, failures)
+            self.open = None
+
+
+class LogAnalytics:
+    """多天日志统计的部分结果 - 单个文件的统计或按文件顺序合并后的统计"""
+    
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.entries = 0
+        self.errors = 0
+        self.switches = 0
+        self.storms = 0     # 任务切换风暴次数（窗口内切换次数达到阈值）
+        self.groups = RunStats()
+        self.scripts = RunStats()
+        self.events = EventColumns()  # 任务/配置组/进度/错误事件，用于分位数和速率统计
+        self.pattern_stats = {}  # (类型, 模式名称) -> [检查次数, 命中次数, 累计秒数]
+    
+    def merge(self, other):
+        """合并紧随其后的文件的统计结果"""
+        self.files += other.files
+        self.bytes += other.bytes
+        self.entries += other.entries
+        self.errors += other.errors
+        self.switches += other.switches
+        self.storms += other.storms
+        self.groups.merge(other.groups)
+        self.scripts.merge(other.scripts)
+        self.events.merge(other.events)
+        for key, (checks, hits, seconds) in other.pattern_stats.items():
+            stats = self.pattern_stats.setdefault(key, [0, 0, 0.0])
+            stats[0] += checks
+            stats[1] += hits
+            stats[2] += seconds
+        return self
+    
+    def format_report(self, storm_rule):
+        """生成统计报告文本行"""
+        def format_duration(ms):
+            seconds = ms // 1000
+            return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        
+        _, _, _, threshold, window = storm_rule
+        lines = [
+            f"文件 {self.files} 个，共 {self.bytes / (1024 * 1024):.1f}MB，日志条目 {self.entries}，错误 {self.errors}",
+            f"任务切换 {self.switches} 次，切换风暴 {self.storms} 次（{window}秒内切换{threshold}次及以上）",
+        ]
+        
+        # 分位数、进度速率和时长分布由列式事件统计
+        timeline = TimelineStats(self.events)
+        duration_tasks, durations = timeline.task_durations()
+        duration_summary = timeline.summarize_by_task(duration_tasks, durations)
+        rate_summary = timeline.summarize_by_task(*timeline.progress_rates(), percents=(50,))
+        
+        for title, stats in (("配置组", self.groups), ("脚本/任务", self.scripts)):
+            lines.append("")
+            header = f"[{title}] 次数 | 总时长 | 平均时长 | 失败数"
+            lines.append(header + (" | P50/P90时长 | 进度速率(每分钟)" if stats is self.scripts else ""))
+            ranked = sorted(stats.runs.items(), key=lambda item: item[1][1], reverse=True)
+            for name, (runs, duration_ms, failures) in ranked:
+                line = (f"  {name}: {runs} | {format_duration(duration_ms)} | "
+                        f"{format_duration(duration_ms // runs)} | {failures}")
+                if stats is self.scripts:
+                    if name in duration_summary:
+                        p50, p90 = duration_summary[name][1]
+                        line += f" | {format_duration(int(p50))}/{format_duration(int(p90))}"
+                    else:
+                        line += " | -"
+                    line += f" | {rate_summary[name][1][0]:.2f}" if name in rate_summary else " | -"
+                lines.append(line)
+            if not ranked:
+                lines.append("  （无）")
+        
+        lines.append("")
+        lines.append("[脚本/任务运行时长分布]")
+        for label, count in zip(DURATION_HISTOGRAM_LABELS, timeline.histogram(durations, DURATION_HISTOGRAM_EDGES)):
+            lines.append(f"  {label}: {count}")
+        
+        lines.append("")
+        lines.append("[模式匹配统计] 检查次数 | 命中次数 | 耗时(毫秒)")
+        for (kind, name), (checks, hits, seconds) in self.pattern_stats.items():
+            lines.append(f"  {'任务' if kind == 'task' else '进度'}/{name}: {checks} | {hits} | {seconds * 1000:.1f}")
+        return lines
+
+
+def analyze_log_file(path, storm_rule, user_patterns=(), since_ms=None):
+    """统计单个日志文件（在进程池中执行，逐行流式读取）
+
+    时间换算为绝对毫秒数（文件日期 + 当天时间，跨午夜时累加一天），便于跨文件连接运行段
+    user_patterns: 自定义任务/进度模式（见 parse_user_pattern），与悬浮窗使用相同的匹配器
+    since_ms: 只统计当天该时间（毫秒数）之后的日志，用二分查找定位起始位置，不读取之前的内容
+    """
+    result = LogAnalytics()
+    result.files = 1
+    matcher = LogPatternMatcher(user_patterns)
+    _, _, _, threshold, window = storm_rule
+    window_ms = window * 1000
+    
+    date_match = re.search(r'(\d{8})(?:_\d+)?\.log$', path.name)
+    day_ms = 0
+    if date_match:
+        day_ms = (datetime.strptime(date_match.group(1), '%Y%m%d') - datetime(1970, 1, 1)).days * 86400000
+    
+    clock_ms = None        # 当前日志条目的绝对时间
+    current_task = None
+    switch_times = deque()  # 滑动窗口内的任务切换时间
+    in_storm = False
+    
+    try:
+        with open(path, 'rb') as f:
+            if since_ms is not None:
+                f.seek(seek_log_time(f, since_ms))
+            for raw_line in f:
+                result.bytes += len(raw_line)
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+                
+                if LOG_START_PATTERN.match(line):
+                    time_ms = parse_log_time_ms(line)
+                    if time_ms is not None:
+                        absolute_ms = day_ms + time_ms
+                        if clock_ms is not None:
+                            while absolute_ms < clock_ms - 43200000:
+                                absolute_ms += 86400000  # 时间戳回退超过12小时，视为跨越午夜
+                        clock_ms = max(absolute_ms, clock_ms or absolute_ms)
+                        result.groups.last_ms = result.scripts.last_ms = clock_ms
+                    result.entries += 1
+                    match = LOG_FORMAT_PATTERN.match(line)
+                    if match and match.group(2) == "ERR" and clock_ms is not None:
+                        result.errors += 1
+                        result.groups.failure()
+                        result.scripts.failure()
+                        result.events.append(clock_ms, "error", current_task)
+                if clock_ms is None:
+                    continue  # 文件开头没有时间戳的残片
+                
+                # 配置组开始/结束（与读取器相同：只把“加载”或“开始”视为开始）
+                if "配置组" in line and (config_match := CONFIG_GROUP_PATTERN.search(line)):
+                    if "执行结束" in line:
+                        result.scripts.end(clock_ms)
+                        result.groups.end(clock_ms)
+                        result.events.append(clock_ms, "config_end", current_task)
+                    elif "加载" in line or "开始" in line:
+                        if result.groups.open is None or result.groups.open[0] != config_match.group(1):
+                            result.groups.start(config_match.group(1), clock_ms)
+                            result.events.append(clock_ms, "config_start", current_task)
+                
+                task, progress = matcher.match_line(line)
+                if task is not None and task != current_task:
+                    current_task = task
+                    result.switches += 1
+                    result.scripts.start(task, clock_ms)
+                    result.events.append(clock_ms, "task_start", task)
+                    
+                    # 任务切换风暴：窗口内切换次数达到阈值时计一次，回落到阈值以下后结束
+                    switch_times.append(clock_ms)
+                    while switch_times[0] <= clock_ms - window_ms:
+                        switch_times.popleft()
+                    if len(switch_times) >= threshold and not in_storm:
+                        in_storm = True
+                        result.storms += 1
+                    elif len(switch_times) < threshold:
+                        in_storm = False
+                
+                if progress is not None and progress[2] is not None:
+                    result.events.append(clock_ms, "progress", current_task, progress[2], progress[3])
+    except OSError as e:
+        logging.error(f"读取日志文件失败 {path}: {str(e)}")
+    result.pattern_stats = {(kind, name): [checks, hits, seconds]
+                            for kind, name, checks, hits, seconds in matcher.get_stats()}
+    return result
+
+
+def run_log_analytics(config, days, workers=None, since_ms=None):
+    """多天日志统计命令 - 在进程池中并行统计最近 days 天的日志文件，按文件顺序合并结果
+
+    since_ms: 每天只统计该时间（当天毫秒数）之后的日志
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from datetime import timedelta
+    
+    initial_log_config = config.get_initial_log_config()
+    log_dir = Path(initial_log_config["log_path"]) if initial_log_config["log_path_configured"] else None
+    if log_dir is None or not log_dir.is_dir():
+        print("日志路径配置错误，请在 config.txt 中设置正确的 log_path")
+        return 1
+    prefix = initial_log_config["log_filename_prefix"]
+    
+    # 与悬浮窗相同的任务切换规则用于统计切换风暴
+    storm_rule = next((rule for rule in config.get_rate_rules() if rule[1] == "task_switch"),
+                      parse_rate_rule("任务切换", DEFAULT_TASK_SWITCH_RULE))
+    
+    # 按日期顺序收集文件：基础文件在前，轮换文件按序号排列
+    today = datetime.now().date()
+    first_day = today - timedelta(days=max(days, 1) - 1)
+    files = []
+    for offset in range((today - first_day).days + 1):
+        date_str = (first_day + timedelta(days=offset)).strftime('%Y%m%d')
+        base_file = log_dir / f"{prefix}{date_str}.log"
+        if base_file.exists():
+            files.append(base_file)
+        files.extend(sorted(log_dir.glob(f"{prefix}{date_str}_*.log")))
+    
+    start_time = time.perf_counter()
+    total = LogAnalytics()
+    if files:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map 按提交顺序返回结果，跨文件的运行段据此正确连接
+            user_patterns = config.get_user_patterns()
+            for partial in executor.map(analyze_log_file, files, [storm_rule] * len(files), [user_patterns] * len(files),
+                                        [since_ms] * len(files)):
+                total.merge(partial)
+    total.groups.finish()
+    total.scripts.finish()
+    
+    since = "" if since_ms is None else f"（每天 {since_ms // 3600000:02d}:{since_ms // 60000 % 60:02d} 之后）"
+    print(f"日志统计 {first_day} ~ {today}{since}，耗时 {time.perf_counter() - start_time:.2f} 秒")
+    for line in total.format_report(storm_rule):
+        print(line)
+    return 0
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="BetterGI日志悬浮窗")
+    parser.add_argument("--tui", action="store_true",
+                        help="在终端中运行（curses 前端），无需图形界面")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="终端前端渲染指定帧数后退出（用于基准测试）")
+    parser.add_argument("--interval", type=int, default=None,
+                        help="终端前端刷新间隔（毫秒），默认使用 refresh_interval")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="测量启动耗时：显示首帧后记录各阶段耗时到 startup_times.csv 并退出")
+    parser.add_argument("--analyze", action="store_true",
+                        help="统计最近几天的日志（配置组/脚本运行次数、时长、失败数和任务切换风暴）后退出")
+    parser.add_argument("--days", type=int, default=30,
+                        help="--analyze 统计的天数（含今天），默认30")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="--analyze 使用的进程数，默认为CPU核心数")
+    parser.add_argument("--since", type=parse_time_of_day, default=None, metavar="HH:MM[:SS]",
+                        help="--analyze 每天只统计该时间之后的日志（按时间戳二分查找起始位置）")
+    parser.add_argument("--benchmark-stats", type=int, nargs='?', const=1000000, default=None, metavar="EVENTS",
+                        help="时间线统计基准测试：合成指定数量的事件（默认100万），比较列式统计与逐条实现后退出")
+    parser.add_argument("--benchmark-layout", type=int, nargs='?', const=20000, default=None, metavar="LINES",
+                        help="换行布局基准测试：合成指定数量的日志行（默认2万），比较布局引擎与逐次测量实现后退出（无需图形界面）")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    # 打包为exe时进程池的子进程需要在此处理（未打包时无需导入 multiprocessing）
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    
+    args = parse_args()
+    
+    if args.benchmark_stats is not None:
+        sys.exit(benchmark_timeline_stats(args.benchmark_stats))
+    
+    if args.benchmark_layout is not None:
+        config_loader = ConfigLoader("config.txt")
+        glyph_metrics_file = config_loader.get("glyph_metrics_file", "")
+        sys.exit(benchmark_layout(args.benchmark_layout, config_loader.get("max_width", 460),
+                                  Path(get_base_path()) / glyph_metrics_file if glyph_metrics_file else None,
+                                  font_config={key: config_loader.get(key) for key in ("font_name", "font_size", "font_weight")}))
+    
+    if args.analyze:
+        # 多天日志统计：不启动任何界面
+        sys.exit(run_log_analytics(ConfigLoader("config.txt"), args.days, args.workers, args.since))
+    
+    if args.tui:
+        # 终端前端：不加载 tkinter 窗口和全局快捷键
+        TerminalLogViewer(ConfigLoader("config.txt"), args.frames, args.interval).run()
+        sys.exit(0)
+    
+    if not TK_AVAILABLE:
+        logging.critical("未安装 tkinter，无法显示悬浮窗；请安装 python3-tk，或使用 --tui 终端前端")
+        sys.exit(1)
+    
     try:
         # 加载配置并启动程序
         config_loader = ConfigLoader("config.txt")
-        viewer = FloatingLogViewer(config_loader)
+        viewer = FloatingLogViewer(config_loader, measure_startup=args.measure_startup)
         viewer.mainloop()
     except Exception as e:
         logging.critical(f"程序崩溃: {str(e)}")
         # 确保在崩溃时也清理全局快捷键
         if KEYBOARD_AVAILABLE:
             try:
-                import keyboard
-                keyboard.unhook_all()
+                get_keyboard().unhook_all()
                 logging.info("程序崩溃时清理全局快捷键")
             except:
                 pass
\ No newline at end of file
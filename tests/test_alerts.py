@@ -0,0 +1,31 @@
+import random
+
+from main import AhoCorasickAutomaton
+
+
+def expected(keywords, text):
+    return {index for index, keyword in enumerate(keywords) if keyword in text}
+
+
+def test_overlapping_and_nested_keywords():
+    keywords = ["he", "she", "his", "hers", "传送", "传送失败", "失败"]
+    automaton = AhoCorasickAutomaton(keywords)
+    for text in ["ushers", "this", "传送失败，重试", "重试失败", "", "hhhe", "传送"]:
+        assert automaton.find(text) == expected(keywords, text), text
+
+
+def test_duplicate_keywords_report_every_index():
+    automaton = AhoCorasickAutomaton(["ab", "ab", "b"])
+    assert automaton.find("xaby") == {0, 1, 2}
+
+
+def test_matches_substring_search():
+    """随机关键字和文本（小字母表，大量重叠和失败跳转）与 in 的结果一致"""
+    rng = random.Random(0)
+    for _ in range(500):
+        keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5)))
+                    for _ in range(rng.randint(1, 8))]
+        automaton = AhoCorasickAutomaton(keywords)
+        for _ in range(20):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+            assert automaton.find(text) == expected(keywords, text), (keywords, text)
@@ -0,0 +1,58 @@
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from main import required_literal
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    (r'开始执行: (.+)', "开始执行: "),
+    (r'^当前进度：(\d+)%$', "当前进度："),
+    (r'a\x41b', "aAb"),                        # 数字转义整体作为一个字符
+    (r'\101bc', "Abc"),                        # 八进制转义
+    (r'(a)\1xyz', "xyz"),                      # 反向引用打断字面串
+    (r'\N{LATIN SMALL LETTER A}bc', "abc"),
+    (r'a\.b', "a.b"),
+    (r'ab?c', "a"),                            # 可选字符不一定出现
+    (r'ab*cd', "cd"),
+    (r'进度[:：]\s*(\d+)/(\d+)', "进度"),
+    (r'(?x) a b c ', "abc"),                   # 详细模式忽略空白
+])
+def test_known_literals(pattern, literal):
+    assert required_literal(re.compile(pattern)) == literal
+
+
+@pytest.mark.parametrize("pattern, flags", [
+    (r'ab|cd', 0),             # 顶层分支
+    (r'(?i)abc', 0),           # 内联忽略大小写
+    (r'abc', re.IGNORECASE),
+    (r'(ab', 0),               # 无法解析
+])
+def test_no_literal_when_not_guaranteed(pattern, flags):
+    # required_literal 只使用 pattern 和 flags 属性，可以传入无法编译的表达式
+    assert required_literal(SimpleNamespace(pattern=pattern, flags=flags)) == ""
+
+
+ATOMS = ["a", "b", "c", "A", r"\.", ".", "[ab]", r"\d", r"\x61", r"\101", "(a|b)", "(?:ab)", r"\b", "^"]
+QUANTIFIERS = ["", "", "", "?", "*", "+", "{2}", "{0,2}", "+?"]
+
+
+def test_literal_is_sound():
+    """随机正则：每次匹配的内容都必须包含提取出的字面串"""
+    rng = random.Random(0)
+    for _ in range(3000):
+        source = "".join(rng.choice(ATOMS) + rng.choice(QUANTIFIERS) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.1:
+            source += "|" + rng.choice(ATOMS)
+        try:
+            pattern = re.compile(source)
+        except re.error:
+            continue
+        literal = required_literal(pattern)
+        for _ in range(40):
+            text = "".join(rng.choice("abcA.1") for _ in range(rng.randint(0, 10)))
+            match = pattern.search(text)
+            if match:
+                assert literal in match.group(0), (source, literal, text)
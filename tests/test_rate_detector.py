@@ -0,0 +1,67 @@
+from main import SlidingWindowRateDetector
+
+
+def make_detector(threshold=3, window_seconds=60):
+    return SlidingWindowRateDetector("测试", threshold, window_seconds)
+
+
+def test_threshold_reached_within_window():
+    detector = make_detector()
+    detector.add(0)
+    detector.add(1000)
+    assert not detector.active
+    detector.add(2000)
+    assert detector.active
+    assert detector.count == 3
+
+
+def test_events_expire_at_window_edge():
+    # 60秒窗口分为60个1秒的分桶：0秒的事件在60秒所在的分桶开始时移出
+    detector = make_detector()
+    for time_ms in (0, 1000, 2000):
+        detector.add(time_ms)
+    detector.advance(59999)
+    assert detector.active and detector.count == 3
+    detector.advance(60000)
+    assert not detector.active and detector.count == 2
+    detector.advance(62000)
+    assert detector.count == 0
+
+
+def test_events_spread_wider_than_window_do_not_trigger():
+    detector = make_detector()
+    for time_ms in (0, 30000, 60000, 90000):
+        detector.add(time_ms)
+    assert not detector.active
+    assert detector.count == 2
+
+
+def test_long_gap_clears_all_buckets():
+    detector = make_detector()
+    for time_ms in (0, 100, 200):
+        detector.add(time_ms)
+    detector.advance(10 * 60000)
+    assert detector.count == 0
+    assert not detector.active
+
+
+def test_out_of_order_event_older_than_window_is_ignored():
+    detector = make_detector()
+    detector.add(120000)
+    detector.add(30000)  # 比窗口更早的乱序事件
+    assert detector.count == 1
+    detector.add(119000)  # 窗口内的乱序事件仍计入
+    assert detector.count == 2
+
+
+def test_version_changes_with_state_and_count():
+    detector = make_detector()
+    versions = []
+    for time_ms in (0, 1000, 2000, 3000):
+        detector.add(time_ms)
+        versions.append(detector.version)
+    assert versions[1] == versions[0] == 0
+    assert versions[3] > versions[2] > versions[1]  # 进入告警，告警中计数变化
+    detector.reset()
+    assert not detector.active and detector.count == 0
+    assert detector.version > versions[3]
@@ -0,0 +1,130 @@
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from main import LOG_START_PATTERN, SEARCH_HEADER_PATTERN, LogSearchIndex
+
+PREFIX = "better-genshin-impact"
+
+
+def write_log(path, entries):
+    """写入日志文件，entries 为 [(起始行, [续行...])]"""
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for first_line, continuation in entries:
+            f.write(first_line + "\n")
+            for line in continuation:
+                f.write(line + "\n")
+
+
+def naive_search(paths, needle):
+    """逐条扫描：合并续行，时间戳和类名不参与匹配，结果按时间倒序"""
+    results = []
+    for path in paths:
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f.read().splitlines():
+                if LOG_START_PATTERN.match(line) or not entries:
+                    entries.append([line, ""])
+                else:
+                    entries[-1][1] += " " + line.strip()
+        for first_line, continuation in entries:
+            header = SEARCH_HEADER_PATTERN.match(first_line)
+            searchable = f"{header.group(1)} {header.group(2)}" if header else first_line
+            if needle.casefold() in (searchable + continuation).casefold():
+                results.append(first_line + continuation)
+    return results[::-1]
+
+
+def all_results(index, query):
+    result = index.search(query)
+    found = []
+    while not result.exhausted:
+        found.extend(result.next_page(50))
+    return found
+
+
+@pytest.fixture
+def build_index(tmp_path):
+    """写入当天的日志文件（及轮换文件）并等待后台索引完成"""
+    indexes = []
+
+    def build(files):
+        date_str = datetime.now().strftime("%Y%m%d")
+        paths = []
+        for suffix, entries in files:
+            path = tmp_path / f"{PREFIX}{date_str}{suffix}.log"
+            write_log(path, entries)
+            paths.append(path)
+        index = LogSearchIndex(tmp_path, PREFIX)
+        indexes.append(index)
+        index.start()
+        deadline = time.monotonic() + 30
+        while not index.ready:
+            assert time.monotonic() < deadline, "索引超时"
+            time.sleep(0.01)
+        return index, paths
+
+    yield build
+    for index in indexes:
+        index.stop()
+
+
+def synthetic_entries(count, seed):
+    rng = random.Random(seed)
+    words = ["传送失败", "AutoFish", "钓鱼", "pathing", "Teleport", "完成", "重试", "配置组", "OK"]
+    levels = ["INF", "INF", "INF", "WRN", "ERR", "DBG"]
+    entries = []
+    for i in range(count):
+        level = rng.choice(levels)
+        message = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        first_line = (f"[{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000] [{level}] "
+                      f"BetterGenshinImpact.Service.AutoFishTask {message} #{i}")
+        continuation = []
+        if level == "ERR" and rng.random() < 0.5:
+            continuation = [f"   at Frame{rng.randint(0, 9)}.Run()", "System.TimeoutException: 超时"]
+        entries.append((first_line, continuation))
+    return entries
+
+
+QUERIES = [
+    "传送失败",       # 常见词
+    "autofish",      # 大小写不敏感
+    "[err]",         # 级别
+    "frame7",        # 只出现在续行中
+    "超时",           # 只出现在续行中
+    "#4099",         # 唯一条目
+    "inf",           # 常见二元组（全部被标记为 DENSE，逐块扫描）
+    "[inf] ok",      # 常见二元组与普通二元组混合
+    "不存在的内容",    # 没有结果
+    "servic",        # 只出现在类名中，不应命中
+    "12:00",         # 只出现在时间戳中，不应命中
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_naive_scan(build_index, query):
+    # 5000 条目超过 DENSE_MIN_BLOCKS 个块，[inf] 等常见二元组会被标记为 DENSE
+    index, paths = build_index([("", synthetic_entries(5000, 1)), ("_001", synthetic_entries(300, 2))])
+    assert index._postings.get("in") is LogSearchIndex.DENSE
+    assert all_results(index, query) == naive_search(paths, query)
+
+
+def test_multi_line_entries_and_file_without_leading_timestamp(build_index):
+    entries = [
+        ("残留的上一条目内容 传送失败", []),  # 文件开头没有时间戳的内容单独作为一条
+        ("[09:00:00.000] [ERR] A.B 执行失败", ["   at Teleport.Run()", "   at Task.Start()"]),
+        ("[09:00:01.000] [INF] A.B 传送完成", []),
+    ]
+    index, paths = build_index([("", entries)])
+    for query in ("teleport.run", "task.start", "传送", "执行失败", "传送失败"):
+        assert all_results(index, query) == naive_search(paths, query)
+    assert all_results(index, "teleport.run") == [
+        "[09:00:00.000] [ERR] A.B 执行失败 at Teleport.Run() at Task.Start()"]
+
+
+def test_short_query_rejected(build_index):
+    index, _ = build_index([("", synthetic_entries(10, 3))])
+    with pytest.raises(ValueError):
+        index.search("a")
@@ -0,0 +1,94 @@
+import io
+
+import pytest
+
+from main import parse_time_of_day, read_log_entries, seek_log_time
+
+
+def make_log(times, continuation_every=3):
+    """按给定时间生成日志文件内容（部分条目带续行），返回 (二进制文件对象, {时间: 条目起始偏移})"""
+    data = bytearray()
+    offsets = {}
+    for index, text in enumerate(times):
+        offsets[text] = len(data)
+        data += f"[{text}] [INF] BetterGenshinImpact.Task 条目 {index}\r\n".encode("utf-8")
+        if index % continuation_every == 0:
+            data += "   at 续行 [12:00:00.000] 不是条目开头\r\n".encode("utf-8")
+    return io.BytesIO(bytes(data)), offsets
+
+
+def seek(f, text):
+    return seek_log_time(f, parse_time_of_day(text))
+
+
+def first_entry_at(f, offset):
+    entries, _ = read_log_entries(f, offset, 1)
+    return entries[0][1:13] if entries else None
+
+
+SAME_DAY = ["09:00:00.000", "09:00:00.500", "09:30:00.000", "10:00:00.000", "12:00:00.000", "18:45:10.123"]
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("08:00", "09:00:00.000"),          # 早于首条
+    ("09:00", "09:00:00.000"),          # 恰好等于某条
+    ("09:00:00.001", "09:00:00.500"),   # 两条之间
+    ("11:59:59.999", "12:00:00.000"),
+    ("18:45:10.123", "18:45:10.123"),   # 最后一条
+])
+def test_same_day(target, expected):
+    f, offsets = make_log(SAME_DAY)
+    assert seek(f, target) == offsets[expected]
+
+
+def test_after_last_entry_returns_file_size():
+    f, _ = make_log(SAME_DAY)
+    assert seek(f, "19:00") == len(f.getvalue())
+
+
+def test_continuation_with_timestamp_is_not_an_entry():
+    # 续行中的时间戳不在行首，不会被当作条目
+    f, offsets = make_log(SAME_DAY, continuation_every=1)
+    assert seek(f, "11:00") == offsets["12:00:00.000"]
+    assert first_entry_at(f, seek(f, "11:00")) == "12:00:00.000"
+
+
+CROSS_MIDNIGHT = ["22:30:00.000", "23:00:00.000", "23:59:59.999", "00:00:00.000", "00:30:00.000", "01:15:00.000"]
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("22:00", "22:30:00.000"),          # 早于首条（当天）
+    ("22:30", "22:30:00.000"),
+    ("23:30", "23:59:59.999"),          # 首条之后、午夜之前
+    ("00:00", "00:00:00.000"),          # 午夜之后按次日查找
+    ("00:10", "00:30:00.000"),
+    ("01:15", "01:15:00.000"),          # 末条
+])
+def test_cross_midnight(target, expected):
+    f, offsets = make_log(CROSS_MIDNIGHT)
+    assert seek(f, target) == offsets[expected]
+
+
+def test_cross_midnight_target_after_last_entry_searches_first_day():
+    # 晚于末条的凌晨时间不按次日查找，按首条所在当天查找（早于首条，返回首条）
+    f, offsets = make_log(CROSS_MIDNIGHT)
+    assert seek(f, "02:00") == offsets["22:30:00.000"]
+
+
+def test_file_not_wrapped_does_not_treat_early_target_as_next_day():
+    # 文件只有当天深夜的条目：凌晨的目标时间早于首条，而不是次日（否则会跳到文件末尾）
+    f, offsets = make_log(["22:00:00.000", "23:00:00.000", "23:59:00.000"])
+    assert seek(f, "00:30") == offsets["22:00:00.000"]
+
+
+def test_empty_file_and_file_without_entries():
+    assert seek_log_time(io.BytesIO(b""), 0) == 0
+    no_entries = io.BytesIO("只有续行\r\n没有时间戳\r\n".encode("utf-8"))
+    assert seek_log_time(no_entries, 0) == len(no_entries.getvalue())
+
+
+def test_every_entry_is_found_in_large_file():
+    times = [f"{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000" for i in range(0, 86400, 7)]
+    f, offsets = make_log(times)
+    for text in times[::97]:
+        assert seek(f, text) == offsets[text]